@@ -19,10 +19,13 @@ from anasymod.sources import *
 from anasymod.filesets import Filesets
 from anasymod.defines import Define
 from anasymod.targets import CPUTarget, FPGATarget
-from anasymod.enums import ConfigSections, FPGASimCtrl
+from anasymod.enums import ConfigSections, FPGASimCtrl, ResultFileTypes
 from anasymod.utils import statpro
 from anasymod.util import expand_path
-from anasymod.wave import ConvertWaveform
+from anasymod.wave import ConvertWaveform, ConversionSidecar
+from anasymod.utils.probe_waveform import ProbeWaveform
+from anasymod.utils.resample import sample_and_hold
+from anasymod.utils.run_repository import RunRepository
 from anasymod.plugins import Plugin
 from typing import Union
 from importlib import import_module
@@ -42,6 +45,8 @@ class Analysis():
         # Initialize attributes
         self.float_type = False # Defines which data type is used for functional models; default is fixed-point
         self._plugin_args = {} # Namespace object including all options set for generators
+        self._run_repository = None # Repository of stored runs, created on first access
+        self._run_probes = {} # Probe objects of stored runs, one per run id
 
         # Overwrite input location in case it was provided when instantiation the Analysis class
         if input is not None:
@@ -341,11 +346,14 @@ class Analysis():
 
         statpro.statpro_update(statpro.FEATURES.anasymod_build_vivado)
 
-    def emulate(self, server_addr=None, convert_waveform=True):
+    def emulate(self, server_addr=None, convert_waveform=True, run_id=None, run_params=None):
         """
         Program bitstream to FPGA and run simulation/emulation on FPGA
 
         :param server_addr: Address of Vivado hardware server used for communication to FPGA board
+        :param run_id: id the results are stored under in the run repository, see simulate
+        :param run_params: dict of parameters the emulation was run with, see simulate
+        :return: id of the stored run, None if results were not stored
         """
 
         if server_addr is None:
@@ -367,6 +375,9 @@ class Analysis():
         if not os.path.exists(os.path.dirname(target.result_path_raw)):
             mkdir_p(os.path.dirname(target.result_path_raw))
 
+        # result files of stored runs must not be overwritten in place
+        RunRepository.unshare(target)
+
         # run the emulation
         VivadoEmulation(target=target).run_FPGA(
             start_time=self.args.start_time,
@@ -376,17 +387,27 @@ class Analysis():
 
         statpro.statpro_update(statpro.FEATURES.anasymod_emulate_vivado)
 
-        # post-process results
-        if convert_waveform:
+        # post-process results, CSV results are probed directly, if no converted result file was requested
+        if convert_waveform and target.cfg.result_type != ResultFileTypes.CSV:
             ConvertWaveform(
                 result_path_raw=target.result_path_raw,
                 result_type_raw=target.cfg.result_type_raw,
-                result_path=target.cfg.vcd_path,
+                result_path=target.result_path,
                 str_cfg=target.str_cfg,
                 float_type=self.float_type,
-                dt_scale=self._prj_cfg.cfg.dt_scale
+                dt_scale=self._prj_cfg.cfg.dt_scale,
+                compress=self._prj_cfg.cfg.compress_results,
+                result_type=target.cfg.result_type,
+                vcd2fst=self._vcd2fst(target),
+                memory_limit=self._prj_cfg.cfg.convert_memory_limit,
+                convert_workers=self._prj_cfg.cfg.convert_workers
             )
 
+        # drop probe objects holding signals of a previous emulation run
+        target.probes = {}
+
+        return self._store_run(target=target, run_id=run_id, run_params=run_params)
+
     def launch(self, server_addr=None, debug=False):
         """
         Program bitstream to FPGA, setup control infrastructure and wait for interactive commands.
@@ -421,11 +442,18 @@ class Analysis():
         # Return ctrl handle for interactive control
         return ctrl_handle
 
-    def simulate(self, unit=None, id=None, convert_waveform=True, flags=None):
+    def simulate(self, unit=None, id=None, convert_waveform=True, flags=None, run_id=None, run_params=None):
         """
         Run simulation on a pc target.  'flags' contains a list of simulator-specific
         flags, as a sort of escape hatch for features that are not yet supported
         natively through anasymod.
+
+        Results are stored as a run in the run repository, if the keep_runs option is set or run_id or run_params are
+        provided, see probe_runs.
+
+        :param run_id: id the results are stored under in the run repository, consecutive numbers are used if omitted
+        :param run_params: dict of parameters the simulation was run with, e.g. the values of a parameter sweep
+        :return: id of the stored run, None if results were not stored
         """
         # Remove target-specific build dir to make sure there are no old files.
         # However, don't fail when certain files can't be removed, because that
@@ -458,28 +486,96 @@ class Analysis():
             sim.unit = unit
             sim.id = id
 
+        # result files of stored runs must not be overwritten in place
+        RunRepository.unshare(target)
         sim.simulate()
         statpro.statpro_update(statpro.FEATURES.anasymod_sim + self.args.simulator_name)
 
         # post-process results
-        if convert_waveform:
+        if convert_waveform and self._prj_cfg.cfg.lazy_convert:
+            # only store information needed for conversion, signals are converted when probed or viewed
+            ConversionSidecar(target.result_path_raw).write(
+                str_cfg=target.str_cfg,
+                float_type=self.float_type,
+                debug=self._prj_cfg.cfg.cpu_debug_mode,
+                dt_scale=self._prj_cfg.cfg.dt_scale,
+                include=self._debug_scopes(),
+                exclude=self._prj_cfg.cfg.cpu_debug_exclude
+            )
+        elif convert_waveform:
             ConvertWaveform(
                 result_path_raw=target.result_path_raw,
                 result_type_raw=target.cfg.result_type_raw,
-                result_path=target.cfg.vcd_path,
+                result_path=target.result_path,
                 str_cfg=target.str_cfg,
                 float_type=self.float_type,
                 debug=self._prj_cfg.cfg.cpu_debug_mode,
-                dt_scale=self._prj_cfg.cfg.dt_scale
+                dt_scale=self._prj_cfg.cfg.dt_scale,
+                workers=self._prj_cfg.cfg.vcd_parse_workers,
+                compress=self._prj_cfg.cfg.compress_results,
+                result_type=target.cfg.result_type,
+                vcd2fst=self._vcd2fst(target),
+                memory_limit=self._prj_cfg.cfg.convert_memory_limit,
+                convert_workers=self._prj_cfg.cfg.convert_workers,
+                include=self._debug_scopes(),
+                exclude=self._prj_cfg.cfg.cpu_debug_exclude
             )
 
-    def probe(self, name, emu_time=False):
+        return self._store_run(target=target, run_id=run_id, run_params=run_params)
+
+    def probe(self, name, emu_time=False, interpolate=False, t_start=None, t_stop=None, step=None, grid=None):
         """
         Probe specified signal. Signal will be stored in a numpy array.
+
+        :param name: name of the signal
+        :param emu_time: use emu_time as time basis instead of cycle count
+        :param interpolate: linearly interpolate emu_time in between samples of the time probe
+        :param t_start: start of time window in the selected time basis, the signal's value at t_start is placed at
+                        t_start; parts of the result file before the time window are skipped, if possible
+        :param t_stop: end of time window in the selected time basis, the result file is only read up to t_stop
+        :param step: resample the signal onto a uniform grid with this step size
+        :param grid: resample the signal onto this sorted array of timestamps, overrides step
+        """
+
+        probeobj = self._setup_probeobj(target=getattr(self, self.args.active_target))
+        return probeobj._probe(name=name, emu_time=emu_time, interpolate=interpolate, t_start=t_start, t_stop=t_stop,
+                               step=step, grid=grid)
+
+    def probe_many(self, names, emu_time=False, interpolate=False, align=False, t_start=None, t_stop=None, step=None,
+                   grid=None):
+        """
+        Probe several signals at once, all signals that were not probed before are read from the result file in a
+        single pass.
+
+        :param names: list of signal names, glob patterns like 'top.*.out*' select all matching signals
+        :param emu_time: use emu_time as time basis instead of cycle count
+        :param interpolate: linearly interpolate emu_time in between samples of the time probe
+        :param align: resample all signals onto a common time basis
+        :param t_start: start of time window in the selected time basis, see probe
+        :param t_stop: end of time window in the selected time basis, see probe
+        :param step: resample all signals onto a uniform grid with this step size
+        :param grid: resample all signals onto this sorted array of timestamps, overrides step
+        :return: dict of probed waveforms with full signal names as keys
+        """
+
+        probeobj = self._setup_probeobj(target=getattr(self, self.args.active_target))
+        return probeobj._probe_many(names=names, emu_time=emu_time, interpolate=interpolate, align=align,
+                                    t_start=t_start, t_stop=t_stop, step=step, grid=grid)
+
+    def iter_probe(self, names, t_start=None, t_stop=None, chunk_size=65536):
+        """
+        Iterate over specified signals in chunks of fixed size, aligned on a common time basis. Only the current chunk
+        is kept in memory, which allows to process result files that do not fit into memory.
+
+        :param names: list of signal names
+        :param t_start: start of time window
+        :param t_stop: end of time window
+        :param chunk_size: number of samples per chunk
+        :return: generator of tuples of time array and dict of value arrays (keys are signal names)
         """
 
         probeobj = self._setup_probeobj(target=getattr(self, self.args.active_target))
-        return probeobj._probe(name=name, emu_time=emu_time)
+        return probeobj.iter_chunks(names=names, t_start=t_start, t_stop=t_stop, chunk_size=chunk_size)
 
     def probes(self):
         """
@@ -488,32 +584,138 @@ class Analysis():
         """
 
         probeobj = self._setup_probeobj(target=getattr(self, self.args.active_target))
-        return probeobj._probes()
+        return list(probeobj._probes())
+
+    @property
+    def run_repository(self):
+        """
+        Repository of stored simulation/emulation runs, shared by all targets.
+
+        :rtype: RunRepository
+        """
+        if getattr(self, '_run_repository', None) is None:
+            self._run_repository = RunRepository(root=self._prj_cfg.build_root_runs)
+            self._run_probes = getattr(self, '_run_probes', {})
+        return self._run_repository
+
+    def runs(self, **params):
+        """
+        Get ids of runs of the active target stored in the run repository.
+
+        :param params: only return runs, that were executed with these parameter values, e.g. runs(gain=2)
+        :return: list of run ids in the order the runs were stored
+        """
+        return self.run_repository.runs(target_name=getattr(self, self.args.active_target)._name, **params)
+
+    def run_params(self, run_id):
+        """
+        :return: dict of parameters the stored run was executed with
+        """
+        return self.run_repository.params(run_id)
+
+    def probe_runs(self, name, runs=None, emu_time=False, interpolate=False, t_start=None, t_stop=None, step=None,
+                   grid=None):
+        """
+        Probe specified signal across stored runs of the active target. The signal is resampled onto a time grid shared
+        by all runs and returned as a 2d array with one row per run, so sweeps can be post-processed with vectorized
+        operations.
+
+        :param name: name of the signal
+        :param runs: list of run ids, omit for all stored runs of the active target
+        :param emu_time: use emu_time as time basis instead of cycle count
+        :param interpolate: linearly interpolate emu_time in between samples of the time probe
+        :param t_start: start of time window in the selected time basis
+        :param t_stop: end of time window in the selected time basis
+        :param step: uniform step size of the shared time grid, omit to use each timestamp of any run
+        :param grid: shared time grid as sorted array of timestamps, overrides step
+        :return: tuple of time grid, 2d array of values (run x sample) and list of run ids
+        """
+        target = getattr(self, self.args.active_target)
+        run_repository = self.run_repository
+        runs = [str(run_id) for run_id in runs] if runs is not None else self.runs()
+        if not runs:
+            raise Exception(f'ERROR: No stored runs of target {target._name} were found, please set the keep_runs '
+                            f'option or provide run_id/run_params when running simulate/emulate.')
+
+        waves = []
+        for run_id in runs:
+            if run_id not in self._run_probes:
+                self._run_probes[run_id] = self._create_probeobj(run_repository.target(target, run_id))
+            waves.append(self._run_probes[run_id]._probe(name=name, emu_time=emu_time, interpolate=interpolate,
+                                                          t_start=t_start, t_stop=t_stop))
+
+        if grid is None:
+            if step is None:
+                grid = np.unique(np.concatenate([wave.time for wave in waves]))
+            else:
+                start = t_start if t_start is not None else min(wave.time[0] for wave in waves if len(wave.time))
+                stop = t_stop if t_stop is not None else max(wave.time[-1] for wave in waves if len(wave.time))
+                grid = start + step * np.arange(int(np.floor((stop - start) / step)) + 1)
+        grid = np.asarray(grid)
 
-    def preserve(self, wave):
+        # grid points before the first sample of a run take the first value
+        values = np.stack([sample_and_hold(wave.time, wave.value, grid, initial=wave.value[0] if len(wave.value) else 0)
+                           for wave in waves])
+        return grid, values, runs
+
+    def preserve(self, wave, mode='zoh', grid=None):
         """
         This function preserve the stepping of the waveform 'wave'. This is necessary, if limit checks should be
         conducted on the waveform later on.
 
-        :param wave: 2d numpy.ndarray
+        Supported modes:
+            - 'zoh': in front of each change of value, the old value is repeated with the same timestep, so linear
+              interpolation in between samples (e.g. when plotting) reproduces the steps of the waveform
+            - 'linear': samples are connected linearly, the waveform is left as it is or linearly interpolated onto grid
+            - 'decimate': only samples where the value changes are kept, or the waveform is sampled at each grid point
+
+        :param wave: ProbeWaveform as returned by probe, or 2d numpy.ndarray of times and values
+        :param mode: 'zoh', 'linear' or 'decimate'
+        :param grid: optional sorted array of timestamps the waveform is resampled onto, values are held in between
+                     samples for 'zoh' and 'decimate' and interpolated for 'linear'
 
-        :return: 2d numpy.ndarray
+        :return: ProbeWaveform if a ProbeWaveform was provided, else 2d numpy.ndarray
         """
-        temp_data = None
-        wave_step =[]
+        if mode not in ('zoh', 'linear', 'decimate'):
+            raise Exception(f'ERROR: Unsupported preserve mode {mode}, use zoh, linear or decimate.')
 
-        for d in wave.transpose():
-            if temp_data is not None:
-                if d[1] != temp_data:
-                    wave_step.append([d[0],temp_data]) #old value with same timestep to preserve stepping
-            wave_step.append(d)
-            temp_data = d[1]
+        time, value = np.asarray(wave[0]), np.asarray(wave[1])
 
-        try:
-            #return np.array(wave_step, dtype='float').transpose()
-            return np.array(wave_step, dtype='O').transpose()
-        except:
-            return np.array(wave_step, dtype='O').transpose()
+        if grid is not None:
+            grid = np.asarray(grid)
+            if mode == 'linear':
+                if value.ndim > 1 or value.dtype == object:
+                    raise Exception('ERROR: Linear interpolation is not supported for vectors wider than 64 bits.')
+                value = np.interp(grid, time, value) if len(time) else np.zeros(len(grid))
+            else:
+                # grid points before the first sample take the first value
+                value = sample_and_hold(time, value, grid, initial=value[0] if len(value) else 0)
+            time = grid
+
+        if len(value) > 1:
+            changed = value[1:] != value[:-1]
+            if changed.ndim > 1:
+                changed = changed.reshape(len(changed), -1).any(axis=1)
+        else:
+            changed = np.zeros(0, dtype=bool)
+
+        if mode == 'zoh':
+            # in front of each change of value, repeat the old value with the same timestep to preserve stepping
+            counts = np.concatenate(([1], 1 + changed)).astype(np.int64) if len(value) else np.zeros(0, dtype=np.int64)
+            time_idx = np.repeat(np.arange(len(value)), counts)
+            value_idx = time_idx.copy()
+            value_idx[(np.cumsum(counts) - counts)[1:][changed]] -= 1
+        elif mode == 'decimate' and grid is None:
+            # keep first sample, each change of value and the last sample, which marks the end of the waveform
+            keep = np.concatenate(([True], changed)) if len(value) else np.zeros(0, dtype=bool)
+            keep[-1:] = True
+            time_idx = value_idx = np.flatnonzero(keep)
+        else:
+            time_idx = value_idx = np.arange(len(value))
+
+        if isinstance(wave, ProbeWaveform):
+            return wave.replace(time=time[time_idx], value=value[value_idx])
+        return np.array([time[time_idx], value[value_idx]], dtype='O')
 
     def view(self, result_file=None):
         """
@@ -885,14 +1087,69 @@ class Analysis():
             raise ValueError(f"Provided target type:{target} is not supported")
 
         # check if probe obj is already existing, if not, instantiate one
-
-        #ToDo: In future it should be also possible to instantiate different probe objects, depending on data format that shall be read in
         if target_name not in target.probes.keys():
-            from anasymod.probe import ProbeVCD
-            target.probes[target_name] = ProbeVCD(target=target)
+            target.probes[target_name] = self._create_probeobj(target=target)
 
         return target.probes[target_name]
 
+    def _create_probeobj(self, target):
+        """
+        Instantiate probe object, depending on data format of the converted result file.
+
+        :param target: Target or view of a stored run (RunTarget) that signals shall be extracted from
+        """
+        if target.cfg.result_type == ResultFileTypes.VCD:
+            from anasymod.probe import ProbeVCD
+            return ProbeVCD(target=target)
+        elif target.cfg.result_type == ResultFileTypes.COLUMNS:
+            from anasymod.probe import ProbeColumns
+            return ProbeColumns(target=target)
+        elif target.cfg.result_type == ResultFileTypes.CSV and target.cfg.result_type_raw == ResultFileTypes.CSV:
+            from anasymod.probe import ProbeCSV
+            return ProbeCSV(target=target)
+        else:
+            raise Exception(f'ERROR: Probing results of result_type:{target.cfg.result_type} is not supported, '
+                            f'please select {ResultFileTypes.VCD} or {ResultFileTypes.COLUMNS} as result_type, '
+                            f'or {ResultFileTypes.CSV} for FPGA targets.')
+
+    def _store_run(self, target: Union[FPGATarget, CPUTarget], run_id=None, run_params=None):
+        """
+        Store results of the last simulate/emulate call in the run repository, if requested.
+
+        :return: id of the stored run, None if results were not stored
+        """
+        if not (self._prj_cfg.cfg.keep_runs or run_id is not None or run_params is not None):
+            return None
+
+        # raw result files are only needed, if they are probed directly or were not converted (lazy_convert)
+        converted = target.cfg.result_type != ResultFileTypes.CSV
+        raw = not converted or os.path.isfile(ConversionSidecar(target.result_path_raw).sidecar_path)
+        run_id = self.run_repository.add(target=target, run_id=run_id, params=run_params, converted=converted,
+                                         raw=raw)
+        # drop probe object of a replaced run, as it may hold signals of the old results
+        self._run_probes.pop(run_id, None)
+        return run_id
+
+    def _vcd2fst(self, target: Union[FPGATarget, CPUTarget]):
+        """
+        Path to vcd2fst binary, which is only needed and searched for, if target writes fst result files.
+        """
+        if target.cfg.result_type == ResultFileTypes.FST:
+            return self._prj_cfg.gtkwave_config.vcd2fst
+
+    def _debug_scopes(self):
+        """
+        Scopes of the design modules dumped in cpu_debug_mode, None if everything below the testbench is dumped.
+        """
+        dbg_mods_list = self._prj_cfg.cfg.cpu_debug_hierarchies
+        if not dbg_mods_list:
+            return None
+        elif isinstance(dbg_mods_list[0], int):
+            # only one single debug module was provided
+            return [dbg_mods_list[1]]
+        else:
+            return [dbg_module[1] for dbg_module in dbg_mods_list]
+
     def _build_firmware(self, *args, **kwargs):
         # create target object, but don't generate instrumentation structure again in case target object does not exist yet
         if not hasattr(self, self.act_fpga_target):
@@ -28,6 +28,9 @@ class EmuConfig:
         # define build root for functional models
         self.build_root_functional_models = os.path.join(self.build_root_base, 'models')
 
+        # define root of run repository, which is shared by all targets
+        self.build_root_runs = os.path.join(self.build_root_base, 'runs')
+
         self.build_root = os.path.join(self.build_root_base, active_target)
         if not os.path.exists(self.build_root):
             mkdir_p(self.build_root)
@@ -329,6 +332,7 @@ class GtkWaveConfig():
         self.hints = [lambda: os.path.join(env['GTKWAVE_INSTALL_PATH'], 'bin'),
                       lambda: os.path.join(parent.cfg_dict['INICIO_TOOLS'], parent.cfg_dict['TOOLS_gtkwave'], 'bin')]
         self._gtkwave = gtkwave
+        self._vcd2fst = None
         self.gtkw_config = None
         self.lsf_opts = parent.cfg.lsf_opts
         if 'CAMINO' in os.environ:
@@ -340,6 +344,12 @@ class GtkWaveConfig():
             self._gtkwave = find_tool(name='gtkwave', hints=self.hints)
         return self._gtkwave
 
+    @property
+    def vcd2fst(self):
+        if self._vcd2fst is None:
+            self._vcd2fst = find_tool(name='vcd2fst', hints=self.hints)
+        return self._vcd2fst
+
 class SimVisionConfig():
     def __init__(self, parent: EmuConfig, simvision=None):
         # save reference to parent config
@@ -419,6 +429,45 @@ class Config(BaseConfig):
             design modules, for which all signals shall be stored in result file. e.g.:
             [(0, top.tb_i.filter_i)]"""
 
+        self.cpu_debug_exclude = None
+        """ type(list) : glob patterns of scopes or signals, that shall be dropped when converting results in
+            cpu_debug_mode, e.g. ['top.tb_i.*clk_gen*']. Signals of excluded scopes are skipped while parsing the
+            result file. Patterns must not match the trace port (top.trace_port_gen_i), that holds the probes. """
+
+        self.vcd_parse_workers = 1
+        """ type(int) : number of processes used to parse large VCD result files, when converting or probing
+            results. None uses all available cores. """
+
+        self.convert_workers = 1
+        """ type(int) : number of processes used to decode signals and map them onto emu_time, when converting VCD
+            result files. None uses all available cores. """
+
+        self.probe_cache_limit = 2*1024**3
+        """ type(int) : memory budget in bytes for signals cached in memory by probe calls, once it is exceeded least
+            recently used signals are dropped from the cache. None means no limit. """
+
+        self.probe_disk_cache = True
+        """ type(bool) : store probed signals in a columnar cache next to the result file, so they can be memory-mapped
+            by later probe calls, also from other processes, instead of parsing the result file again. """
+
+        self.compress_results = False
+        """ type(bool) : write converted result files gzip-compressed (*.vcd.gz), parsing and probing of compressed
+            result files is supported transparently. """
+
+        self.lazy_convert = False
+        """ type(bool) : skip conversion of raw result files of CPU targets after simulation. Scaling and time mapping
+            information is stored in a sidecar file next to the raw result file instead; probing converts signals on
+            the fly and viewers convert the raw result file on demand. """
+
+        self.keep_runs = False
+        """ type(bool) : store the results of each simulate/emulate call as a run in the run repository at
+            <build_root_base>/runs, so results of parameter sweeps can be probed across runs, see Analysis.probe_runs. """
+
+        self.convert_memory_limit = None
+        """ type(int) : approximate memory ceiling in bytes for converting raw result files. If set, raw result files
+            are parsed and converted in chunks, so results larger than the available memory can be converted; None
+            parses the whole raw result file at once, which is faster. """
+
         self.flatten_hierarchy = 'rebuilt'
         """ type(str) : Flattening strategy used in synthesis by Vivado.  Can be 'none', 'full', or 'rebuilt'.
             Choosing 'none' is a good strategy for debugging synthesis issues, while 'full' may allow for
@@ -72,4 +72,6 @@ class ResultFileTypes:
     Container including enums for all supported data formats to store simulation/emulation results.
     """
     VCD = 'vcd'
-    CSV = 'csv'
\ No newline at end of file
+    CSV = 'csv'
+    COLUMNS = 'cols'
+    FST = 'fst'
\ No newline at end of file
@@ -0,0 +1,330 @@
+import numpy as np
+
+from anasymod.utils.probe_waveform import ProbeWaveform
+
+__all__ = ["EdgeDetector", "Statistics", "crossings", "frequency", "period", "duty_cycle", "rise_time",
+           "settling_time", "find_settled", "overshoot", "mean", "rms", "peak_to_peak"]
+
+# Measurements on probed waveforms. Waveforms may be given as ProbeWaveform, as 2d array or tuple of time and value
+# array, or - for measurements that can be done in a single pass - as iterable of (time, value) chunks, e.g. as
+# generated from Analysis.iter_probe:
+#     frequency((time, values[name]) for time, values in ana.iter_probe([name]))
+# Values are taken to be held in between samples, as probed waveforms only include the changes of a signal.
+
+def _arrays(wave):
+    """
+    Get time and value array of a waveform as float64 arrays.
+    """
+    if isinstance(wave, ProbeWaveform) and wave.is_wide:
+        raise Exception(f'ERROR: Measurements are not supported for vectors wider than 64 bits: {wave.name}')
+    time, value = wave[0], wave[1]
+    return np.asarray(time, dtype=np.float64), np.asarray(value, dtype=np.float64)
+
+def _chunks(wave):
+    """
+    Iterate over (time, value) chunks of a waveform, a single waveform is a single chunk.
+    """
+    if isinstance(wave, (ProbeWaveform, np.ndarray)) or (isinstance(wave, (tuple, list)) and len(wave) == 2 and
+                                                         not isinstance(wave[0], (tuple, list, ProbeWaveform)) and
+                                                         np.ndim(wave[0]) == 1):
+        yield _arrays(wave)
+    else:
+        for chunk in wave:
+            yield _arrays(chunk)
+
+def _concat(wave):
+    """
+    Get time and value array of a whole waveform, chunks are concatenated.
+    """
+    chunks = list(_chunks(wave))
+    if len(chunks) == 1:
+        return chunks[0]
+    return (np.concatenate([time for time, _ in chunks]) if chunks else np.zeros(0),
+            np.concatenate([value for _, value in chunks]) if chunks else np.zeros(0))
+
+class EdgeDetector:
+    """
+    Detect crossings of a level with hysteresis, chunk by chunk. A rising edge is detected at the first sample above
+    level + hysteresis, after the waveform was below level - hysteresis; falling edges vice versa. State is kept in
+    between chunks, so edges spanning two chunks are found as well.
+    """
+    def __init__(self, level=0, slope='rise', hysteresis=0, interpolate=False):
+        """
+
+        :param level: threshold level
+        :param slope: 'rise' or 'fall'
+        :param hysteresis: half width of the hysteresis band around level
+        :param interpolate: place edges at the linearly interpolated time the waveform crosses level, instead of the
+                            time of the sample that completed the edge
+        """
+        if slope not in ('rise', 'fall'):
+            raise Exception(f'ERROR: Unknown slope type: {slope}')
+        self.level = level
+        self.slope = slope
+        self.hysteresis = hysteresis
+        self.interpolate = interpolate
+
+        self._state = 0
+        """ type(int) : -1 if the waveform was last below, 1 if it was last above the hysteresis band, 0 if unknown """
+        self._last = None
+        """ type(tuple) : time and value of the last sample of the previous chunk """
+
+    def update(self, time, value):
+        """
+        Process next chunk of a waveform.
+
+        :param time: array of timestamps
+        :param value: array of values
+        :return: array of edge times found in this chunk
+        :rtype: numpy.ndarray
+        """
+        time = np.asarray(time, dtype=np.float64)
+        value = np.asarray(value, dtype=np.float64)
+        if len(time) == 0:
+            return np.zeros(0)
+
+        # classify samples as below (-1), above (1) or within (0) the hysteresis band
+        state = (value > self.level + self.hysteresis).astype(np.int8) - (value < self.level - self.hysteresis)
+        if self.slope == 'fall':
+            state = -state
+
+        # an edge is a sample above the band, with the previous sample outside of the band being below it
+        idx = np.flatnonzero(state)
+        outside = np.concatenate(([self._state], state[idx]))
+        edges = idx[(outside[1:] == 1) & (outside[:-1] == -1)]
+        if len(idx):
+            self._state = int(outside[-1])
+
+        if self.interpolate:
+            # interpolate in between the edge sample and the previous sample, which may belong to the previous chunk
+            if self._last is not None:
+                t_prev = np.concatenate(([self._last[0]], time))[edges]
+                v_prev = np.concatenate(([self._last[1]], value))[edges]
+            else:
+                t_prev = time[np.maximum(edges - 1, 0)]
+                v_prev = value[np.maximum(edges - 1, 0)]
+            t, v = time[edges], value[edges]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                frac = np.where(v != v_prev, (self.level - v_prev) / (v - v_prev), 1.0)
+            result = t_prev + np.clip(frac, 0.0, 1.0) * (t - t_prev)
+        else:
+            result = time[edges]
+
+        self._last = (time[-1], value[-1])
+        return result
+
+class Statistics:
+    """
+    Minimum, maximum, mean and RMS value of a waveform, accumulated chunk by chunk. Mean and RMS value are weighted by
+    the time each value is held, until the next sample.
+    """
+    def __init__(self):
+        self.min = np.inf
+        self.max = -np.inf
+        self.duration = 0.0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._last = None
+
+    def update(self, time, value):
+        """
+        Process next chunk of a waveform.
+
+        :param time: array of timestamps
+        :param value: array of values
+        """
+        time = np.asarray(time, dtype=np.float64)
+        value = np.asarray(value, dtype=np.float64)
+        if len(time) == 0:
+            return
+        self.min = min(self.min, value.min())
+        self.max = max(self.max, value.max())
+
+        # the last value of the previous chunk is held until the first sample of this chunk
+        if self._last is not None:
+            time = np.concatenate(([self._last[0]], time))
+            value = np.concatenate(([self._last[1]], value))
+        dt = np.diff(time)
+        self.duration += dt.sum()
+        self._sum += np.dot(value[:-1], dt)
+        self._sum_sq += np.dot(value[:-1] ** 2, dt)
+        self._last = (time[-1], value[-1])
+
+    @property
+    def peak_to_peak(self):
+        return self.max - self.min
+
+    @property
+    def mean(self):
+        if self._last is None:
+            raise Exception('ERROR: Waveform does not include any samples.')
+        return self._sum / self.duration if self.duration > 0 else self._last[1]
+
+    @property
+    def rms(self):
+        if self._last is None:
+            raise Exception('ERROR: Waveform does not include any samples.')
+        return np.sqrt(self._sum_sq / self.duration) if self.duration > 0 else abs(self._last[1])
+
+def _statistics(wave):
+    stats = Statistics()
+    for time, value in _chunks(wave):
+        stats.update(time, value)
+    return stats
+
+def crossings(wave, level=0, slope='rise', hysteresis=0, interpolate=False):
+    """
+    Find times at which the waveform crosses level, see EdgeDetector.
+
+    :param wave: waveform or iterable of waveform chunks
+    :param level: threshold level
+    :param slope: 'rise' or 'fall'
+    :param hysteresis: half width of the hysteresis band around level
+    :param interpolate: linearly interpolate the time the waveform crosses level
+    :return: array of crossing times
+    :rtype: numpy.ndarray
+    """
+    detector = EdgeDetector(level=level, slope=slope, hysteresis=hysteresis, interpolate=interpolate)
+    found = [detector.update(time, value) for time, value in _chunks(wave)]
+    return np.concatenate(found) if found else np.zeros(0)
+
+def frequency(wave, level=0, slope='rise', hysteresis=0, interpolate=False):
+    """
+    Average frequency, measured from the first to the last crossing of level, see crossings.
+
+    :return: frequency in 1/time unit of the waveform
+    """
+    edges = crossings(wave, level=level, slope=slope, hysteresis=hysteresis, interpolate=interpolate)
+    if len(edges) < 2:
+        raise Exception('ERROR: Waveform does not include a full period.')
+    return (len(edges) - 1) / (edges[-1] - edges[0])
+
+def period(wave, level=0, slope='rise', hysteresis=0, interpolate=False):
+    """
+    Period of each cycle of the waveform, measured in between crossings of level, see crossings.
+
+    :return: array of periods, its mean value is the average period
+    :rtype: numpy.ndarray
+    """
+    return np.diff(crossings(wave, level=level, slope=slope, hysteresis=hysteresis, interpolate=interpolate))
+
+def duty_cycle(wave, level=0, hysteresis=0, interpolate=False):
+    """
+    Average duty cycle, i.e. fraction of time the waveform is above level, measured from the first to the last rising
+    crossing of level.
+
+    :return: duty cycle in between 0 and 1
+    """
+    rise = EdgeDetector(level=level, slope='rise', hysteresis=hysteresis, interpolate=interpolate)
+    fall = EdgeDetector(level=level, slope='fall', hysteresis=hysteresis, interpolate=interpolate)
+    rises, falls = [], []
+    for time, value in _chunks(wave):
+        rises.append(rise.update(time, value))
+        falls.append(fall.update(time, value))
+    rises = np.concatenate(rises) if rises else np.zeros(0)
+    falls = np.concatenate(falls) if falls else np.zeros(0)
+    if len(rises) < 2:
+        raise Exception('ERROR: Waveform does not include a full period.')
+
+    # each cycle is high from its rising edge until the next falling edge
+    idx = np.searchsorted(falls, rises[:-1], side='left')
+    if np.any(idx >= len(falls)):
+        raise Exception('ERROR: Waveform does not include a falling edge in each period.')
+    high = np.minimum(falls[idx], rises[1:]) - rises[:-1]
+    return high.sum() / (rises[-1] - rises[0])
+
+def _step_levels(time, value, initial, final):
+    if len(time) == 0:
+        raise Exception('ERROR: Waveform does not include any samples.')
+    return (value[0] if initial is None else initial), (value[-1] if final is None else final)
+
+def rise_time(wave, low=0.1, high=0.9, initial=None, final=None):
+    """
+    Time the waveform takes to step from low to high fraction of the step from initial to final value, also for
+    falling steps. Crossing times are linearly interpolated.
+
+    :param wave: waveform or iterable of waveform chunks
+    :param low: lower fraction of the step
+    :param high: upper fraction of the step
+    :param initial: value before the step, default is the first value
+    :param final: value after the step, default is the last value
+    """
+    time, value = _concat(wave)
+    initial, final = _step_levels(time, value, initial, final)
+    if final == initial:
+        raise Exception('ERROR: Waveform does not include a step.')
+
+    # normalize step to rise from 0 to 1
+    norm = (value - initial) / (final - initial)
+    t_low = crossings((time, norm), level=low, interpolate=True)
+    if not len(t_low) and norm[0] >= low:
+        t_low = time[:1]
+    t_high = crossings((time, norm), level=high, interpolate=True)
+    if not len(t_low) or not len(t_high):
+        raise Exception('ERROR: Waveform does not cross the low and high level of the step.')
+    return t_high[0] - t_low[0]
+
+def settling_time(wave, tolerance=0.02, final=None, initial=None, t_start=None):
+    """
+    Time after which the waveform stays within a tolerance band around its final value.
+
+    :param wave: waveform or iterable of waveform chunks
+    :param tolerance: half width of the tolerance band relative to the step from initial to final value
+    :param final: final value, default is the last value
+    :param initial: value before the step, default is the first value
+    :param t_start: time the step is applied, default is the time of the first sample
+    """
+    time, value = _concat(wave)
+    initial, final = _step_levels(time, value, initial, final)
+    band = tolerance * abs(final - initial)
+
+    # the waveform is settled from the sample after the last one outside of the tolerance band
+    outside = np.flatnonzero(np.abs(value - final) > band)
+    idx = outside[-1] + 1 if len(outside) else 0
+    if idx >= len(time):
+        raise Exception('ERROR: Waveform did not settle to the specified range.')
+    return time[idx] - (time[0] if t_start is None else t_start)
+
+def find_settled(wave, lo, hi):
+    """
+    Time at which the waveform enters the range from lo to hi for the first time.
+    """
+    for time, value in _chunks(wave):
+        inside = np.flatnonzero((lo <= value) & (value <= hi))
+        if len(inside):
+            return time[inside[0]]
+    raise Exception('Waveform did not settle to the specified range.')
+
+def overshoot(wave, initial=None, final=None):
+    """
+    Overshoot beyond the final value, relative to the step from initial to final value.
+
+    :param wave: waveform or iterable of waveform chunks
+    :param initial: value before the step, default is the first value
+    :param final: value after the step, default is the last value
+    :return: overshoot as fraction of the step, 0 if the waveform does not exceed its final value
+    """
+    time, value = _concat(wave)
+    initial, final = _step_levels(time, value, initial, final)
+    if final == initial:
+        raise Exception('ERROR: Waveform does not include a step.')
+    peak = value.max() if final > initial else value.min()
+    return max((peak - final) / (final - initial), 0.0)
+
+def mean(wave):
+    """
+    Mean value of the waveform, weighted by the time each value is held.
+    """
+    return _statistics(wave).mean
+
+def rms(wave):
+    """
+    RMS value of the waveform, weighted by the time each value is held.
+    """
+    return _statistics(wave).rms
+
+def peak_to_peak(wave):
+    """
+    Difference of maximum and minimum value of the waveform.
+    """
+    return _statistics(wave).peak_to_peak
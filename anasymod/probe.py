@@ -1,12 +1,21 @@
 # general imports
 import numpy as np
 import os
-import csv
+from fnmatch import fnmatchcase
 from typing import Union
 
 # anasymod imports
 from anasymod.targets import CPUTarget, FPGATarget
-from anasymod.utils.VCD_parser import ParseVCD
+from anasymod.enums import ResultFileTypes
+from anasymod.utils.VCD_parser import ParseVCD, unpack_wide, pack_wide
+from anasymod.utils.CSV_parser import ParseCSV
+from anasymod.utils.probe_waveform import ProbeWaveform
+from anasymod.utils.fixed_point import to_signed
+from anasymod.utils.resample import sample_and_hold, window, map_time
+from anasymod.utils.column_store import ColumnStore
+from anasymod.utils.probe_cache import ProbeCache
+from anasymod.utils.compression import open_result, find_result_file
+from anasymod.wave import ConversionSidecar, ConvertWaveform
 
 
 class Probe():
@@ -41,16 +50,22 @@ class Probe():
     def __del__(self):
         self.discardloadedsimdatafiles()
 
-    def _probe(self, name, emu_time, cache=True):
+    def _probe(self, name, emu_time, cache=True, interpolate=False, t_start=None, t_stop=None, step=None, grid=None):
         """
         Access probed waveform trace(s)
 
         :param name: name of probe whose waveform is require.
             (None = timebase reference trace)
         :type name: string
+        :param interpolate: linearly interpolate emu_time in between samples of the time probe
+        :type interpolate: bool
         :param cache: Cache probe data so subsequent calls for same data don't create
             more copies or trigger a SIMetrix data group load
         :type cache: bool
+        :param t_start: start of time window in the selected time basis, None to start at the first sample
+        :param t_stop: end of time window in the selected time basis, None to stop at the last sample
+        :param step: resample onto a uniform grid with this step size
+        :param grid: resample onto this sorted array of timestamps, overrides step
 
         :return: probed data for specified probe.
         :rtype: numpy.array
@@ -58,6 +73,20 @@ class Probe():
 
         raise NotImplementedError()
 
+    def _probe_many(self, names, emu_time, cache=True, interpolate=False, align=False, patterns=True, t_start=None,
+                    t_stop=None, step=None, grid=None):
+        """
+        Access several probed waveform traces at once, see _probe.
+
+        :param names: list of names or glob patterns of probes whose waveforms are required
+        :param align: resample all waveforms onto a common time basis
+        :param patterns: resolve glob patterns in names
+        :return: probed data with full probe names as keys
+        :rtype: dict
+        """
+
+        raise NotImplementedError()
+
     def _probes(self):
         """
         Get list of names probe waveforms for data group/ run
@@ -66,6 +95,19 @@ class Probe():
 
         raise NotImplementedError()
 
+    def iter_chunks(self, names, t_start=None, t_stop=None, chunk_size=65536):
+        """
+        Iterate over probed waveforms in chunks of fixed size, aligned on a common time basis.
+
+        :param names: list of probe names
+        :param t_start: start of time window
+        :param t_stop: end of time window
+        :param chunk_size: number of samples per chunk
+        :return: generator of tuples of time array and dict of value arrays (keys are probe names)
+        """
+
+        raise NotImplementedError()
+
     def init_rundata(self):
         raise NotImplementedError()
 
@@ -107,150 +149,31 @@ class Probe():
         """Compresses redundant data from 2d numpy array"""
         raise NotImplementedError()
 
-    def parse_emu_time(self, data, emu_time):
+    def parse_emu_time(self, data, emu_time, interpolate=False):
         """
 
         :param data:
         :param emu_time:
+        :param interpolate:
         :return:
         """
         raise NotImplementedError()
 
-class ProbeCSV(Probe):
+class ProbeArrays(Probe):
     """
-    API for CSV remote data access
+    Base class for APIs, that load probed waveforms as typed time and value arrays. Derived classes provide access to
+    the result file (setup_data_access), the names of all probes in it (_probes) and the waveforms of selected probes
+    (fetch_simdata); caching, selection of time windows, mapping onto emu_time and resampling are shared.
     """
-
     def __init__(self, target: Union[CPUTarget, FPGATarget]):
         """
         Constructor
         """
-        super().__init__(self, target=target)
-
-        # List of dictionaries containing probename-probevalue pairs for each simulation run (one dict per sweep point)
-        self.probe_caches = []
-        """:type : list[dict[str, list[]]]"""
-
-    def __del__(self):
-        """
-        Destructor
-
-        Remote Data interface is automatically closed when Api is destructed
-        """
-
-    def init_rundata(self):
-        self.probe_caches = [None] * 1 # As of now no sweeps are planned, later the value shall be set to the number of runs
-        self._data_valid = True
-
-    def path_for_sim_result_file(self):
-        return os.path.join(self.target.cfg['result_path_raw'])
-
-    def _probe(self, name, emu_time, cache=True):
-        """
-        Access csv logfile data for specified run number simulation parameter
-
-        :param name: Column name in csv log, omit/None for all
-        :type name: str
-
-        :return: dict for `run_num`only or specified,
-            list  for `name`  only specified,
-            numpy.array for specified `run_num` and `name`,
-            list of dict for run_num='all' specified
-        :rtype: numpy.array | list[numpy.array] | dict[ string : numpy.array]
-        """
-
-        if not self._data_valid:
-            raise LookupError("No data available (no succesful simulation run / dataset reload)")
-
-        run_num = 0
-
-        if run_num == 'all':
-            for r in range(len(self.probe_caches)):
-                if self.probe_caches[r] is None:
-                    self.probe_caches[r] = self.fetch_simdata(self.path_for_sim_result_file())
-        else:
-            if self.probe_caches[run_num] is None:
-                self.probe_caches[run_num] = self.fetch_simdata(self.path_for_sim_result_file())
-
-        if run_num == 'all' and name is None:
-            return self.probe_caches
-
-        if run_num != 'all' and run_num >= len(self.probe_caches):
-            raise ValueError("Run number must be in range [0 .. %d]" % len(self.probe_caches))
-
-        if name is not None and run_num != 'all' and name not in self.probe_caches[run_num]:
-            print("No such  name in simulation log: ", name)
-            print("Available names: ", self.probe_caches[run_num].keys())
-            raise LookupError("Bad probe name " + name)
-
-        if name is None:
-            return self.probe_caches[run_num]
-
-        if run_num == 'all':
-            if name not in self.probe_caches[0]:
-                print("No such  name in simulation log: ", name)
-                print("Available names: ", self.probe_caches[0].keys())
-                raise ValueError("Bad probe name " + name)
-            res = [log[name] for log in self.probe_caches]
-            return res
-
-        if name not in self.probe_caches[run_num]:
-            print("No such  name in simulation log: ", name)
-            print("Available names: ", self.probe_caches[run_num].keys())
-            raise ValueError("Bad probe name " + name)
-
-        return self.probe_caches[run_num][name]
-
-    def fetch_simdata(self, csv_logfile):
-        """
-        Load simdata file as dictionary
-
-        :return: Dict of numpy arrays (keys are column titles, values are column values)
-        :rtype: dict[numpy.array]
-        """
-
-        with open(csv_logfile, "r") as csvfile:
-            csvstrm = csv.DictReader(csvfile, delimiter=';', quotechar='\"')
-
-            rowdict = next(csvstrm)
-            csvdict = {name: [float(value)] for name, value in rowdict.items()}
-
-            for rowdict in csvstrm:
-                for name, value in rowdict.items():
-                    csvdict[name].append(float(value))
-        return {name: np.array(value) for name, value in csvdict.items()}
-
-    def _probes(self):
-        """
-        Get list of names probe waveforms for specified run
-
-        :rtype:list[str]
-        """
-
-        if not self._data_valid:
-            raise LookupError("No data available (no succesful simulation run / dataset open)")
-
-        run_num = 0
-
-        if self.probe_caches[run_num] is None:
-            self.probe_caches[run_num] = self.fetch_simdata(self.path_for_sim_result_file())
-
-        return self.probe_caches[run_num].keys()
-
-class ProbeVCD(Probe):
-    def __init__(self, target: Union[CPUTarget, FPGATarget]):
-        """
-        Constructor for VCD reader.
-        """
         super().__init__(target=target)
 
-        # List of dictionaries containing probename-probevalue pairs for each simulation run (one dict per sweep point)
+        # List of caches containing probename-probevalue pairs for each simulation run (one cache per sweep point)
         self.probe_caches = []
-        """:type : list[dict[str, list[]]]"""
-
-        # VCD file handle
-        self.vcd_handle = dict()
-        """:type: dict[str,vcd.VCDparser]"""
+        """:type : list[ProbeCache]"""
 
         self.init_rundata()
 
@@ -264,104 +187,255 @@ class ProbeVCD(Probe):
         pass
 
     def init_rundata(self):
-        self.probe_caches = [{} for _ in range(10)] # this needs a fix later, shall be depenent on number of signals that were stored during simulation
+        # results of further runs are probed through probe objects of their own, see RunRepository
+        self.probe_caches = [ProbeCache(limit=self.target.prj_cfg.cfg.probe_cache_limit)]
         self._data_valid = True
 
-    def parse_emu_time(self, data, emu_time):
-        """
-        Parse Emu_time end returns new vector with emu_time instead of cycle count
-        :param data:
-        :return:
+    def parse_emu_time(self, data, emu_time, interpolate=False):
         """
-        emutime_data = data.copy()
-        emutime_data.setflags(write=True)
-
-        # emu_time vector index
-        t = 0
-        for i in range(int(len(emutime_data[0]))):
-            while emutime_data[0][i] > emu_time[0][t]:
-                t += 1
-                # break while loop, if it reaches the end of the array of emu_time
-                if t >= len(emu_time[0]):
-                    break
-            # break for loop because whole emu_time vector was parsed
-            if t >= len(emu_time[0]):
-                break
-            # if there is a data point with no coresponding emu_time cyclecount, take the last common cycle count value
-            if emutime_data[0][i] < emu_time[0][t]:
-                emutime_data[0][i] = emu_time[1][t]
-            # if cycle count of data and emu_time vector is the same, take the time value
-            else:
-                emutime_data[0][i] = emu_time[1][t]
+        Parse Emu_time end returns new vector with emu_time instead of cycle count. A data point with no corresponding
+        emu_time cycle count takes the time value of the next emu_time sample, or a linearly interpolated time value if
+        interpolate is set.
 
-        emutime_data.setflags(write=False)
-        return emutime_data
+        :param data: probed waveform over cycle counts
+        :param emu_time: tuple of cycle counts and time values of the time probe
+        :param interpolate: linearly interpolate time values in between emu_time samples
+        :return: probed waveform over time values
+        :rtype: ProbeWaveform
+        """
+        time = map_time(cycles=data[0], ref_cycles=emu_time[0], ref_time=emu_time[1], interpolate=interpolate)
+        return data.replace(time=time).set_readonly()
 
-    def _probe(self, name, emu_time, cache=True):
+    def _probe(self, name, emu_time, cache=True, interpolate=False, t_start=None, t_stop=None, step=None, grid=None):
         """
-        Access VCD data for specified run number simulation parameter
+        Access probed waveform for specified run number simulation parameter
         :param name: Column name in csv log, omit/None for all
         :type name: str
         :param emu_time: Use emu_time as time basis or cycle_count
         :type emu_time: bool
+        :param interpolate: linearly interpolate emu_time in between samples of the time probe, instead of holding the
+                            last sample of the time probe
+        :type interpolate: bool
         :param cache:
-        :return: dict for `run_num`only or specified,
-                    list  for `name`  only specified,
-                    numpy.array for specified `run_num` and `name`,
-                    list of dict for run_num='all' specified
-        :rtype: numpy.array | list[numpy.array] | dict[ string : numpy.array]
+        :param t_start: start of time window, see _probe_many
+        :param t_stop: end of time window, see _probe_many
+        :param step: resample onto a uniform grid with this step size, see _probe_many
+        :param grid: resample onto this array of timestamps, see _probe_many
+        :return: probed waveform, holding typed time and value arrays
+        :rtype: ProbeWaveform
+        """
+
+        return self._probe_many([name], emu_time=emu_time, cache=cache, interpolate=interpolate, patterns=False,
+                                t_start=t_start, t_stop=t_stop, step=step, grid=grid)[name]
+
+    def _probe_many(self, names, emu_time, cache=True, interpolate=False, align=False, patterns=True, t_start=None,
+                    t_stop=None, step=None, grid=None):
+        """
+        Access several signals at once. All signals, that are not cached yet, are fetched at once, which parses a VCD
+        file in a single pass, and emu_time is mapped onto the cycle counts of all signals at once.
+
+        If a time window is selected, the first sample of each signal is placed at t_start, holding the value the signal
+        had at t_start, and the last value is held until t_stop. Signals that are not cached yet are only fetched within
+        the time window (a VCD file is only parsed in between the index markers around it) and are not added to the
+        cache.
+
+        :param names: list of full signal names or glob patterns (see fnmatch) matching full signal names
+        :param emu_time: Use emu_time as time basis or cycle_count, the time probe itself keeps cycle counts
+        :param interpolate: linearly interpolate emu_time in between samples of the time probe
+        :param align: resample all signals onto a common time basis, that includes each timestamp of any signal
+        :param patterns: resolve glob patterns, otherwise names are taken as they are
+        :param t_start: start of time window in the selected time basis (emu_time or cycle count)
+        :param t_stop: end of time window in the selected time basis (emu_time or cycle count)
+        :param step: resample all signals onto a uniform grid from t_start (or the first sample) to t_stop (or the last
+                     sample) with this step size
+        :param grid: resample all signals onto this sorted array of timestamps, overrides step
+        :return: dict of probed waveforms with full signal names as keys
+        :rtype: dict[str, ProbeWaveform]
         """
-
         run_num = 0
-        vcd_handle = self.setup_data_access()
+        file_handle = self.setup_data_access()
         try:
             run_cache = self.probe_caches[run_num]
         except IndexError:  # If PyVerify single run: run_num may be bigger than len(self.probe_caches)
-            run_cache = []
+            run_cache = ProbeCache()
             cache = False
 
-        # check if empty run_cache and parse all signals and store in run_cache
-        if len(run_cache) == 0 and cache:
-            run_cache = self.fetch_simdata(vcd_handle, update_data=False)
-            self.probe_caches[run_num] = run_cache
+        probes = self._probes()
+        if patterns:
+            selected = []
+            for name in names:
+                matches = [name] if name in probes else [p for p in probes if fnmatchcase(p, name)]
+                if not matches:
+                    raise Exception(f'ERROR: No signal matching {name} was found in result file.')
+                selected.extend(matches)
+            selected = list(dict.fromkeys(selected))
+        else:
+            selected = list(dict.fromkeys(names))
 
         #check complete name of emu_time_probe
-        matching = [s for s in self._probes() if self.target.str_cfg.time_probe.name in s]
+        matching = [s for s in probes if self.target.str_cfg.time_probe.name in s]
         if len(matching) == 1:
             emu_time_probe = matching[0]
         else:
-            raise Exception(f'No Time probe was found in vcd file')
-
-        if emu_time_probe not in run_cache:
-            data = self.fetch_simdata(vcd_handle, name=emu_time_probe, update_data=True)
-            print("Emu_time not in cache: " + name)
-            if cache:
-                # Cached - make it read-only to prevent nasty overwriting bugs
-                data.setflags(write=False)
-                run_cache[emu_time_probe] = data
-
-        if name not in run_cache:
-            data = self.fetch_simdata(vcd_handle, name=name)
-            print("Data not in cache: " + name)
-            if cache:
-                # Cached - make it read-only to prevent nasty overwriting bugs
-                data.setflags(write=False)
-                run_cache[name] = data
-        else:
-            data = run_cache[name]
-            print("Data already in cache: " + name)
+            raise Exception(f'No Time probe was found in result file')
+
+        # parse all signals that are not in cache yet in a single pass
+        # keep references to cached signals, as adding new signals to the cache may evict them
+        windowed = t_start is not None or t_stop is not None
+        wanted = list(dict.fromkeys(selected + ([emu_time_probe] if emu_time else [])))
+        signals = {n: run_cache[n] for n in wanted if n in run_cache}
+        cycle_start, cycle_stop = t_start, t_stop
+        if emu_time and windowed:
+            # the whole time probe is needed to translate the time window into cycle counts
+            if emu_time_probe not in signals:
+                signals[emu_time_probe] = self.fetch_simdata(file_handle, name=emu_time_probe)
+                if cache:
+                    run_cache[emu_time_probe] = signals[emu_time_probe]
+            cycle_start, cycle_stop = self._cycle_window(signals[emu_time_probe], t_start=t_start, t_stop=t_stop)
+        missing = [n for n in wanted if n not in signals]
+        if missing:
+            fetch = missing
+            if cache and not windowed and len(run_cache) == 0 and self._fetch_all_on_first_access():
+                # load all signals on first access, so probing one signal after the other parses the result file only
+                # once
+                fetch = list(dict.fromkeys([p for p in probes if p not in missing] + missing))
+            fetched = self.fetch_simdata(file_handle, name=fetch, t_start=cycle_start, t_stop=cycle_stop)
+            signals.update((n, fetched[n]) for n in missing)
+            if cache and not windowed:
+                # Cached - data is read-only to prevent nasty overwriting bugs
+                # requested signals are added last, so they are the last ones evicted
+                for n in fetch:
+                    run_cache[n] = fetched[n]
+
+        data = {n: signals[n] for n in selected}
+        if windowed:
+            data = {n: d.replace(*window(d.time, d.value, t_start=cycle_start, t_stop=cycle_stop)).set_readonly()
+                    for n, d in data.items()}
+
+        if align and data:
+            union = np.unique(np.concatenate([d.time for d in data.values()]))
+            data = {n: d.replace(time=union, value=sample_and_hold(d.time, d.value, union)).set_readonly()
+                    for n, d in data.items()}
+
+        mapped = [n for n in selected if n != emu_time_probe]
+        if emu_time and mapped:
+            # map the union of all cycle counts onto emu_time once, then look up the cycle counts of each signal
+            emu_time_data = signals[emu_time_probe]
+            union = np.unique(np.concatenate([data[n].time for n in mapped]))
+            union_time = map_time(cycles=union, ref_cycles=emu_time_data.time, ref_time=emu_time_data.value,
+                                  interpolate=interpolate)
+            for n in mapped:
+                data[n] = data[n].replace(time=union_time[np.searchsorted(union, data[n].time)]).set_readonly()
+                if windowed:
+                    data[n] = data[n].replace(*window(data[n].time, data[n].value, t_start=t_start,
+                                                      t_stop=t_stop)).set_readonly()
+
+        # the time probe keeps its cycle counts in case of emu_time, so it is not resampled
+        resampled = mapped if emu_time else selected
+        if (grid is not None or step is not None) and resampled:
+            if grid is None:
+                start = t_start if t_start is not None else min(data[n].time[0] for n in resampled if len(data[n].time))
+                stop = t_stop if t_stop is not None else max(data[n].time[-1] for n in resampled if len(data[n].time))
+                grid = start + step * np.arange(int(np.floor((stop - start) / step)) + 1)
+            grid = np.asarray(grid)
+            for n in resampled:
+                d = data[n]
+                # grid points before the first sample take the first value
+                value = sample_and_hold(d.time, d.value, grid, initial=d.value[0] if len(d.value) else 0)
+                data[n] = d.replace(time=grid, value=value).set_readonly()
+
+        return data
+
+    @staticmethod
+    def _cycle_window(emu_time_data, t_start=None, t_stop=None):
+        """
+        Translate a time window in emu_time into a window of cycle counts, that includes all cycle counts mapped into
+        the time window, whether emu_time is interpolated or not.
+
+        :param emu_time_data: waveform of the time probe
+        :param t_start: start of time window in emu_time, None to start at the beginning
+        :param t_stop: end of time window in emu_time, None to stop at the end
+        :return: tuple of first and last cycle count, None if the window is not limited on that side
+        """
+        ref_cycles, ref_time = emu_time_data.time, emu_time_data.value
+        cycle_start, cycle_stop = None, None
+        if t_start is not None:
+            # cycle counts up to the last time probe sample before t_start are mapped to times before t_start
+            k = np.searchsorted(ref_time, t_start, side='left')
+            if k > 0:
+                cycle_start = int(ref_cycles[k-1])
+        if t_stop is not None:
+            # cycle counts after the first time probe sample after t_stop are mapped to times after t_stop
+            k = np.searchsorted(ref_time, t_stop, side='right')
+            if k < len(ref_cycles):
+                cycle_stop = int(ref_cycles[k])
+        return cycle_start, cycle_stop
+
+    def _fetch_all_on_first_access(self):
+        """
+        Whether all probes shall be fetched on the first access, because fetching any probe requires reading the
+        whole result file.
+
+        :rtype: bool
+        """
+        return False
+
+    def _probe_data(self, net, cycle_cnt, signal):
+        """
+        Convert time and value array of a signal into the read-only waveform returned by probe.
+
+        :param net: net dict of the signal, including at least hier, name and size, optionally the fixed-point
+                    exponent the values were scaled with and whether the signal is signed
+        :param cycle_cnt: array of timestamps
+        :param signal: array of values, vectors wider than 64 bits as packed bits
+        :rtype: ProbeWaveform
+        """
+        signal_name = net['hier'] + '.' + net['name']
+        exponent, signed = net.get('exponent'), bool(net.get('signed', False))
+
+        if len(cycle_cnt) == 0:
+            raise ValueError("No data found for signal:{0}".format(signal_name))
+
+        width = int(net['size'])
+        if net['name'] == self.target.str_cfg.time_probe.name:
+            # scale integer representation of time signal according to precision set in prj
+            dt_scale = self.target.prj_cfg.cfg.dt_scale
+            signal = signal.astype(np.float64) * dt_scale
+            width, exponent, signed = None, None, False
+        elif net['type'] in ('real', 'realtime'):
+            signal = signal.astype(np.float64)
+            width = None
+        elif signed and signal.ndim == 1 and signal.dtype.kind == 'u':
+            # signed digital signals are represented as two's complement numbers
+            signal = to_signed(signal, width)
+
+        return ProbeWaveform(time=np.asarray(cycle_cnt, dtype=np.int64), value=signal, name=signal_name,
+                             width=width, exponent=exponent, signed=signed).set_readonly()
+
+
+class ProbeVCD(ProbeArrays):
+    def __init__(self, target: Union[CPUTarget, FPGATarget]):
+        """
+        Constructor for VCD reader.
+        """
+        # VCD file handle
+        self.vcd_handle = dict()
+        """:type: dict[str,vcd.VCDparser]"""
 
-        if emu_time and name != emu_time_probe:
-            print("Using emulation time")
-            emutime_data = self.parse_emu_time(data=data, emu_time=run_cache[emu_time_probe])
-            return emutime_data
-        else:
-            print("Using cycle counts as time basis")
-            return data
+        # Names of probe waveforms found in the result file, for each file handle
+        self.probe_names = dict()
+        """:type: dict[str,list[str]]"""
+
+        # Conversion sidecar, in case the raw result file was not converted
+        self.sidecar = None
+        """:type: ConversionSidecar"""
+
+        super().__init__(target=target)
 
     def _probes(self):
         """
-        Get list of names probe waveforms for specified run
+        Get list of names probe waveforms for specified run, the signal table is taken from the VCD index file, if it
+        was already created.
 
         :param run_num: Run number in sweep, omit/None for last run, 'all' for all runs
         :type run_num: int
@@ -369,7 +443,17 @@ class ProbeVCD(Probe):
         :rtype:list[str]
         """
         vcd_handle = self.setup_data_access()
-        return vcd_handle.list_sigs()
+        handle_name = "_".join([self.target._name])
+        if handle_name not in self.probe_names:
+            if self.sidecar is not None:
+                # only signals, that would be kept in the converted result file
+                vcd_handle.load_index(build=False)
+                nets = {net['hier'] + '.' + net['name']: net for entry in vcd_handle.read_header()[0].values()
+                        for net in entry['nets']}
+                self.probe_names[handle_name] = self.sidecar.select(nets)
+            else:
+                self.probe_names[handle_name] = vcd_handle.list_sigs()
+        return self.probe_names[handle_name]
 
     def discardloadedsimdatafiles(self):
         """
@@ -383,6 +467,7 @@ class ProbeVCD(Probe):
             except:
                 pass
         self.vcd_handle = dict()
+        self.probe_names = dict()
 
     def setup_data_access(self):
         """
@@ -400,69 +485,434 @@ class ProbeVCD(Probe):
         #            enums.SimulatorType, simulator))
 
         vcd_handle = "_".join([self.target._name])
-        vcd_file_name = self.path_for_sim_result_file()
         if vcd_handle not in self.vcd_handle.keys():
-            self.vcd_handle[vcd_handle] = ParseVCD(vcd_file_name)
+            # raw results of CPU targets may have been left unconverted, see lazy_convert option
+            sidecar = ConversionSidecar(self.target.result_path_raw)
+            self.sidecar = sidecar if sidecar.load() else None
+            vcd_file_name = self.path_for_sim_result_file()
+            self.vcd_handle[vcd_handle] = ParseVCD(vcd_file_name, workers=self.target.prj_cfg.cfg.vcd_parse_workers)
         vcd_handle = self.vcd_handle[vcd_handle]
 
         return vcd_handle
 
     def path_for_sim_result_file(self):
-        # Setup Simulation Result file names
-        if os.path.isfile(self.target.cfg.vcd_path):
-            return self.target.cfg.vcd_path
+        # Setup Simulation Result file names, result file may also be gzip-compressed
+        if self.sidecar is not None:
+            return self.sidecar.result_path_raw
+        vcd_path = find_result_file(self.target.cfg.vcd_path)
+        if vcd_path is not None:
+            return vcd_path
         else:
             raise Exception(f'ERROR: Result file: self.target.cfg.vcd_path does not exist; cannot read results!')
 
-    def fetch_simdata(self, file_handle, name="", update_data=False):
+    def fetch_simdata(self, file_handle, name="", update_data=False, t_start=None, t_stop=None):
+        """
+        Load VCD signals and store values as dictionary. Only the requested signal is decoded, value changes of all
+        other signals in the VCD file are skipped. If the probe_disk_cache option is set, signals are taken from the
+        column store next to the VCD file and signals not found there are parsed in a single pass and added to it;
+        if a time window is selected, signals not found there are only parsed within the time window and are not added
+        to the column store. If the raw result file was not converted (lazy_convert), signals are converted on the fly.
+
+        :param name: full name or list of full names of signals that shall be loaded, if omitted all signals are loaded
+        :param update_data: if set, the signal's value is repeated at each timestamp in the VCD file
+        :param t_start: start of time window in VCD timestamps, omit to start at the beginning of the file
+        :param t_stop: end of time window in VCD timestamps, omit to stop at the end of the file
+        :return: waveform in case a single name was provided, else dict of waveforms (keys are signal names)
+        :rtype: ProbeWaveform | dict[ProbeWaveform]
+        """
+        if isinstance(name, str):
+            sigs = [name] if name != "" else None
+        else:
+            sigs = list(name)
+
+        if self.sidecar is None:
+            signals = self._fetch_arrays(file_handle, sigs=sigs, update_data=update_data, t_start=t_start,
+                                         t_stop=t_stop)
+            # VCD files can't hold the probes' metadata, so it is taken from the structure config the same way the
+            # result file was converted: analog probes of ILA results are always scaled fixed-point numbers, the ones of
+            # simulation results unless float_type is set
+            scaled = self.target.cfg.result_type_raw == ResultFileTypes.CSV or not self.target.float_type
+            meta = ConvertWaveform.probe_meta(self.target.str_cfg, prefix='', scaled=scaled)
+            signals = [(dict(net, **meta[net['name']]) if net['hier'].split('.')[-1] == 'trace_port_gen_i' and
+                        net['name'] in meta else net, cycle_cnt, signal) for net, cycle_cnt, signal in signals]
+        elif update_data:
+            raise Exception('ERROR: update_data is not supported for raw result files, that were not converted.')
+        else:
+            # time window refers to converted timestamps, so the whole raw signals are needed for conversion
+            if sigs is None:
+                sigs = self._probes()
+            time_path = self.sidecar.time_probe_path
+            raw = {net['hier'] + '.' + net['name']: (net, cycle_cnt, signal) for net, cycle_cnt, signal in
+                   self._fetch_arrays(file_handle, sigs=list(dict.fromkeys(sigs + [time_path])))}
+            signals = []
+            for n in sigs:
+                net, cycle_cnt, signal = self.sidecar.apply(*raw[n], time_probe=raw[time_path][1:])
+                signals.append((net,) + window(cycle_cnt, signal, t_start=t_start, t_stop=t_stop))
+
+        data = {net['hier'] + '.' + net['name']: self._probe_data(net, cycle_cnt, signal)
+                for net, cycle_cnt, signal in signals}
+
+        if isinstance(name, str) and name != "":
+            return data[name]
+        else:
+            return data
+
+    def _fetch_arrays(self, file_handle, sigs=None, update_data=False, t_start=None, t_stop=None):
         """
-        Load VCD signals and store values as dictionary
+        Load time and value arrays of VCD signals, see fetch_simdata.
 
-        :return: Dict of numpy arrays (keys are column titles, values are column values)
-        :rtype: dict[numpy.array]
+        :return: list of tuples including net, cycle counts and values for each signal
         """
-        signal = ''
-        cycle_cnt = ''
-        if name is not "":
-            # parse only single signal name
-            signal_dict = file_handle.parse_vcd(update_data=update_data)
+        signals = []
+        if update_data or not self.target.prj_cfg.cfg.probe_disk_cache:
+            signal_dict = file_handle.parse_vcd_arrays(sigs=sigs, t_start=t_start, t_stop=t_stop, timestamps=update_data)
             """ :type : dict()"""
+            for entry in signal_dict.values():
+                if update_data:
+                    # resample all signals onto the timestamps found in the VCD file
+                    entry['value'] = sample_and_hold(entry['time'], entry['value'], file_handle.timestamps)
+                    entry['time'] = file_handle.timestamps
+                signals.append((entry['nets'][0], entry['time'], entry['value']))
+        else:
+            # the column store next to the VCD file is a cache, so it is cleared, if it is outdated
+            store = ColumnStore(file_handle.vcd_root)
+            store.load_manifest(clear_invalid=True)
+            names = sigs if sigs is not None else file_handle.list_sigs()
+
+            parsed = {}
+            if t_start is not None or t_stop is not None:
+                # only whole signals are stored, so signals not stored yet are parsed in the time window only, skipping
+                # the result file up to the index marker before t_start
+                missing = [n for n in names if n not in store]
+                if missing:
+                    for entry in file_handle.parse_vcd_arrays(sigs=missing, t_start=t_start, t_stop=t_stop).values():
+                        for net in entry['nets']:
+                            parsed[net['hier'] + '.' + net['name']] = (net, entry['time'], entry['value'])
+            elif any(n not in store for n in names):
+                # parse all signals that are not stored yet in one pass, including the ones not requested yet, so
+                # probing one signal after the other parses the result file only once
+                missing = [n for n in file_handle.list_sigs() if n not in store]
+                for entry in file_handle.parse_vcd_arrays(sigs=missing).values():
+                    for net in entry['nets']:
+                        parsed[net['hier'] + '.' + net['name']] = (net, entry['time'], entry['value'])
+                store.store_many((n, time, value, net) for n, (net, time, value) in parsed.items())
+
+            for n in names:
+                if n in parsed:
+                    net, cycle_cnt, signal = parsed[n]
+                else:
+                    cycle_cnt, signal, net = store.load(n)
+                cycle_cnt, signal = window(cycle_cnt, signal, t_start=t_start, t_stop=t_stop)
+                signals.append((net, cycle_cnt, signal))
 
-            for key in signal_dict.keys():
-                signal = [i[1] for i in signal_dict[key]['cv']]
-                cycle_cnt = [i[0] for i in signal_dict[key]['cv']]
+        return signals
 
-            if signal in [""]:
-                raise ValueError("No data found for signal:{0}".format(name))
+    def _fetch_all_on_first_access(self):
+        # with the disk cache, signals are memory-mapped from the column store instead of parsing the VCD file
+        return not self.target.prj_cfg.cfg.probe_disk_cache
 
-            if signal == self.target.str_cfg.time_probe.name:
-                return np.array([cycle_cnt, signal], dtype='O')
-            else:
-                return np.array([cycle_cnt, signal], dtype='O')
+    def iter_chunks(self, names, t_start=None, t_stop=None, chunk_size=65536):
+        """
+        Iterate over VCD signals in chunks of chunk_size samples. All signals are aligned on a common time basis in
+        cycle counts, which includes each timestamp at which any of the signals changes. The VCD file is parsed while
+        iterating and only the current chunks are kept in memory, so consumers can start before the whole file was
+        parsed and memory stays bounded for arbitrarily large VCD files.
 
-        else:
-            # parse all signals into run_cache
-            signal_dict = file_handle.parse_vcd(sigs=name, update_data=update_data)
-            """ :type : dict()"""
-            data = {}
-            for key in signal_dict.keys():
-                signal = [i[1] for i in signal_dict[key]['cv']]
-                cycle_cnt = [i[0] for i in signal_dict[key]['cv']]
-                net = signal_dict[key]['nets'][0]
-                name = net['hier'] + '.' + net['name']
-
-                if signal_dict[key]['nets'][0]['name'] == self.target.str_cfg.time_probe.name:
-                    # convert binary representation on time signal to integer and scale according to precision set in prj
-                    dt_scale = self.target.prj_cfg.cfg.dt_scale
-                    signal_scaled = [int(x, 2) * dt_scale for x in signal]
-                    data[name] = np.array([cycle_cnt, signal_scaled], dtype='O')
-                else:
-                    data[name] = np.array([cycle_cnt, signal], dtype='O')
+        :param names: list of full signal names
+        :param t_start: start of time window in VCD timestamps, omit to start at the beginning of the file
+        :param t_stop: end of time window in VCD timestamps, omit to stop at the end of the file
+        :param chunk_size: number of samples per chunk, the last chunk may be shorter
+        :return: generator of tuples of cycle count array (int64) and dict of value arrays (keys are signal names)
+        """
+        vcd_handle = self.setup_data_access()
+        if self.sidecar is not None:
+            # timestamps of raw result files, that were not converted, are only known after converting whole signals
+            data = self.fetch_simdata(vcd_handle, name=list(names), t_start=t_start, t_stop=t_stop)
+            time = {n: np.asarray(d[0], dtype=np.int64) for n, d in data.items()}
+            grid = np.unique(np.concatenate(list(time.values())))
+            for start in range(0, len(grid), chunk_size):
+                chunk = grid[start:start + chunk_size]
+                columns = {n: sample_and_hold(time[n], d[1], chunk) for n, d in data.items()}
+                for n, column in columns.items():
+                    if column.ndim == 2:
+                        # vectors wider than 64 bits are returned as packed bits, represent them as python integers
+                        columns[n] = unpack_wide(column, data[n].width)
+                yield chunk, columns
+            return
+
+        vcd_handle.load_index(build=False)
+        nets = {net['hier'] + '.' + net['name']: net for entry in vcd_handle.read_header(sigs=names)[0].values()
+                for net in entry['nets']}
+
+        for cycle_cnt, columns in vcd_handle.iter_arrays(names, t_start=t_start, t_stop=t_stop, chunk_size=chunk_size):
+            for signal_name, signal in columns.items():
+                if nets[signal_name]['name'] == self.target.str_cfg.time_probe.name:
+                    # scale integer representation of time signal according to precision set in prj
+                    columns[signal_name] = signal.astype(np.float64) * self.target.prj_cfg.cfg.dt_scale
+                elif signal.ndim == 2:
+                    # vectors wider than 64 bits are returned as packed bits, represent them as python integers
+                    columns[signal_name] = unpack_wide(signal, int(nets[signal_name]['size']))
+            yield cycle_cnt, columns
+
+class ProbeColumnar(ProbeArrays):
+    """
+    Base class for APIs, that read result files holding a column for each probe, so single probes are loaded by name
+    without parsing the whole result file. Derived classes open the result file (_open_columns), list its columns
+    (_column_names) and load single columns from it (_load_column).
+    """
+    def __init__(self, target: Union[CPUTarget, FPGATarget]):
+        """
+        Constructor for columnar result readers.
+        """
+        # Columns of the result file, for each file handle
+        self.column_handle = dict()
+        """:type: dict[str,ColumnStore|dict[str,ProbeWaveform]]"""
+
+        super().__init__(target=target)
+
+    def discardloadedsimdatafiles(self):
+        """
+
+        """
+        self.column_handle = dict()
+        self.probe_caches = []
+
+    def setup_data_access(self):
+        """
+        :return: columns of the result file, as returned by _open_columns
+        """
+        if not self._data_valid:
+            raise ValueError("No data available (no succesful simulation run / dataset reload)")
+
+        column_handle = "_".join([self.target._name])
+        if column_handle not in self.column_handle.keys():
+            self.column_handle[column_handle] = self._open_columns(self.path_for_sim_result_file())
+        return self.column_handle[column_handle]
+
+    def path_for_sim_result_file(self):
+        raise NotImplementedError()
+
+    def _open_columns(self, path):
+        """
+        Open result file.
+
+        :param path: path to result file, see path_for_sim_result_file
+        :return: columns of the result file
+        """
+        raise NotImplementedError()
+
+    def _column_names(self, file_handle):
+        """
+        :param file_handle: columns of the result file, as returned by _open_columns
+        :return: full names of all signals in the result file
+        :rtype: list[str]
+        """
+        raise NotImplementedError()
+
+    def _load_column(self, file_handle, name, t_start=None, t_stop=None):
+        """
+        Load a single signal from the columns of the result file, only the selected time window is copied.
+
+        :param file_handle: columns of the result file, as returned by _open_columns
+        :param name: full name of signal
+        :param t_start: start of time window, omit to start at the beginning of the result
+        :param t_stop: end of time window, omit to stop at the end of the result
+        :rtype: ProbeWaveform
+        """
+        raise NotImplementedError()
+
+    def fetch_simdata(self, file_handle, name="", update_data=False, t_start=None, t_stop=None):
+        """
+        Load signals from the columns of the result file, only the selected time window is copied.
+
+        :param name: full name or list of full names of signals that shall be loaded, if omitted all signals are loaded
+        :param update_data: not supported for columnar result files
+        :param t_start: start of time window, omit to start at the beginning of the result
+        :param t_stop: end of time window, omit to stop at the end of the result
+        :return: waveform in case a single name was provided, else dict of waveforms (keys are signal names)
+        :rtype: ProbeWaveform | dict[ProbeWaveform]
+        """
+        if update_data:
+            raise Exception(f'ERROR: update_data is not supported when probing {type(self).__name__}.')
 
-                data[name].setflags(write=False)
+        if isinstance(name, str):
+            names = [name] if name != "" else self._column_names(file_handle)
+        else:
+            names = list(name)
 
-            if signal in [""]:
-                raise ValueError("No data found for signal:{0}".format(name))
+        data = {n: self._load_column(file_handle, n, t_start=t_start, t_stop=t_stop) for n in names}
 
+        if isinstance(name, str) and name != "":
+            return data[name]
+        else:
             return data
 
+    def iter_chunks(self, names, t_start=None, t_stop=None, chunk_size=65536):
+        """
+        Iterate over signals of the result file in chunks of chunk_size samples. All signals are aligned on a common
+        time basis, which includes each timestamp at which any of the signals changes.
+
+        :param names: list of full signal names
+        :param t_start: start of time window, omit to start at the beginning of the result
+        :param t_stop: end of time window, omit to stop at the end of the result
+        :param chunk_size: number of samples per chunk, the last chunk may be shorter
+        :return: generator of tuples of time array (int64) and dict of value arrays (keys are signal names)
+        """
+        data = self.fetch_simdata(self.setup_data_access(), name=list(names), t_start=t_start, t_stop=t_stop)
+        grid = np.unique(np.concatenate([d.time for d in data.values()]))
+
+        for start in range(0, len(grid), chunk_size):
+            chunk = grid[start:start + chunk_size]
+            columns = {}
+            for n, d in data.items():
+                columns[n] = sample_and_hold(d.time, d.value, chunk)
+                if d.is_wide:
+                    # vectors wider than 64 bits are returned as packed bits, represent them as python integers
+                    columns[n] = unpack_wide(columns[n], d.width)
+            yield chunk, columns
+
+    def _probes(self):
+        """
+        Get list of names probe waveforms found in the result file.
+
+        :rtype:list[str]
+        """
+        return self._column_names(self.setup_data_access())
+
+class ProbeColumns(ProbeColumnar):
+    """
+    API for columnar result stores as written by ConvertWaveform with result_type 'cols'. Signals are memory-mapped
+    from the store, so probing requires no parsing at all and returns the same data as probing a converted VCD file.
+    """
+
+    def path_for_sim_result_file(self):
+        # Setup Simulation Result file name, the column store is a directory
+        if os.path.isdir(self.target.result_path):
+            return self.target.result_path
+        else:
+            raise Exception(f'ERROR: Result file: {self.target.result_path} does not exist; cannot read results!')
+
+    def _open_columns(self, path):
+        """
+        :rtype: ColumnStore
+        """
+        store = ColumnStore(source_path=None, store_path=path)
+        if not store.load_manifest():
+            raise Exception(f'ERROR: Result file: {store.store_path} is not a valid column store, manifest is '
+                            f'missing, corrupt or outdated; cannot read results!')
+        return store
+
+    def _column_names(self, file_handle):
+        return file_handle.names()
+
+    def _load_column(self, file_handle, name, t_start=None, t_stop=None):
+        # time and value arrays are memory-mapped
+        cycle_cnt, signal, net = file_handle.load(name)
+        cycle_cnt, signal = window(cycle_cnt, signal, t_start=t_start, t_stop=t_stop)
+        if signal.dtype.kind == 'U':
+            # vectors wider than 64 bits are stored as decimal strings, represent them as packed bits
+            signal = pack_wide(signal.tolist(), int(net['size']))
+        return self._probe_data(net, cycle_cnt, signal)
+
+    def iter_chunks(self, names, t_start=None, t_stop=None, chunk_size=65536):
+        """
+        Iterate over signals of the column store in chunks of chunk_size samples, see ProbeColumnar.iter_chunks. Only
+        the part of the memory-mapped signals, that is needed for the current chunk, is read.
+        """
+        store = self.setup_data_access()
+        signals = {n: store.load(n)[:2] for n in names}
+        grid = np.unique(np.concatenate([window(time, value, t_start=t_start, t_stop=t_stop)[0]
+                                         for time, value in signals.values()]))
+
+        for start in range(0, len(grid), chunk_size):
+            chunk = grid[start:start + chunk_size]
+            columns = {}
+            for n, (time, value) in signals.items():
+                columns[n] = self._resample_column(n, time, value, chunk)
+            yield chunk, columns
+
+    def _resample_column(self, name, time, value, grid):
+        """
+        Resample memory-mapped signal onto grid and convert it like probe does.
+        """
+        lo, hi = np.searchsorted(time, [grid[0], grid[-1]], side='right')
+        lo = max(lo - 1, 0)
+        column = sample_and_hold(time[lo:hi], value[lo:hi], grid)
+        if name.split('.')[-1] == self.target.str_cfg.time_probe.name:
+            column = column.astype(np.float64) * self.target.prj_cfg.cfg.dt_scale
+        elif column.dtype.kind == 'U':
+            column = np.array([int(v) for v in column.tolist()], dtype='O')
+        return column
+
+class ProbeCSV(ProbeColumnar):
+    """
+    API for CSV result files as written by the ILA of FPGA targets, which are probed without converting them. All probe
+    columns are parsed in a single pass into typed arrays, analog probes are scaled according to their fixed-point
+    exponent and timestamps are taken from the time probe, so probing returns the same data as probing the converted
+    result file.
+    """
+
+    def path_for_sim_result_file(self):
+        # Setup Simulation Result file name, result file may also be gzip-compressed
+        csv_path = find_result_file(self.target.result_path_raw)
+        if csv_path is not None:
+            return csv_path
+        else:
+            raise Exception(f'ERROR: Result file: {self.target.result_path_raw} does not exist; cannot read results!')
+
+    def _open_columns(self, path):
+        """
+        Parse all probe columns of the CSV file and convert them into waveforms, the same way ConvertWaveform does.
+
+        :param path: path to CSV file
+        :return: probed waveforms of all probes found in the CSV file with full signal names as keys
+        :rtype: dict[str, ProbeWaveform]
+        """
+        scfg = self.target.str_cfg
+        csv_handle = ParseCSV(path)
+        columns, _ = csv_handle.read_header()
+        radix = {column['name']: column['radix'] for column in columns}
+
+        # select probes, each with its net and fixed-point exponent, signedness is taken from the radix of the column
+        probes = {}
+        for analog_signal in scfg.analog_probes:
+            name = 'trace_port_gen_i/' + analog_signal.name
+            if name in radix:
+                probes[name] = (dict(hier='trace_port_gen_i', name=analog_signal.name, type='real', size=1,
+                                     exponent=int(analog_signal.exponent), signed=True), int(analog_signal.exponent))
+        for digital_signal in scfg.digital_probes + [scfg.dec_cmp] + [scfg.time_probe]:
+            name = 'trace_port_gen_i/' + digital_signal.name
+            if name in radix:
+                probes[name] = (dict(hier='trace_port_gen_i', name=digital_signal.name, type='reg',
+                                     size=int(digital_signal.width), signed=radix[name] == 'SIGNED'), None)
+        time_name = 'trace_port_gen_i/' + scfg.time_probe.name
+        if time_name not in probes:
+            raise Exception(f'ERROR: No Time probe was found in csv file: {path}')
+
+        arrays = csv_handle.parse_csv_arrays(names=list(probes))
+
+        # stop at the first timestep that is less than the previous one, since that means wrapping has occurred
+        timestamps = arrays[time_name].astype(np.int64)
+        wrapped = np.flatnonzero(timestamps[1:] < timestamps[:-1])
+        if len(wrapped):
+            timestamps = timestamps[:wrapped[0] + 1]
+
+        data = {}
+        for name, (net, exponent) in probes.items():
+            values = arrays[name][:len(timestamps)]
+            if exponent is not None:
+                # apply scaling factor to unscaled data
+                values = np.ldexp(values.astype(np.float64), exponent)
+            elif values.dtype == object:
+                # vectors wider than 64 bits are parsed as python integers, represent them as packed bits
+                values = pack_wide(values.tolist(), net['size'])
+            data[net['hier'] + '.' + net['name']] = self._probe_data(net, timestamps, values)
+        return data
+
+    def _column_names(self, file_handle):
+        return list(file_handle)
+
+    def _load_column(self, file_handle, name, t_start=None, t_stop=None):
+        # all signals share the timestamps of the CSV rows
+        wave = file_handle[name]
+        return wave.replace(*window(wave.time, wave.value, t_start=t_start, t_stop=t_stop)).set_readonly()
@@ -145,6 +145,17 @@ class Target():
     def result_path_raw(self):
         return os.path.join(self.prj_cfg.build_root, r"raw_results", self.result_name_raw)
 
+    @property
+    def result_path(self):
+        """
+        Path used to store converted simulation result file, the extension depends on the selected result_type.
+
+        :return: str
+        """
+        if self.cfg.result_type == ResultFileTypes.VCD:
+            return self.cfg.vcd_path
+        return os.path.splitext(self.cfg.vcd_path)[0] + '.' + self.cfg.result_type
+
     @property
     def expanded_simctrl_path(self):
         """
@@ -260,6 +271,12 @@ class Config(BaseConfig):
         self.result_type_raw = None
         """ type(float) : simulation result format used for the selected target. """
 
+        self.result_type = ResultFileTypes.VCD
+        """ type(str) : format of the converted simulation result file: 'vcd', 'cols' for a columnar store of
+        memory-mappable numpy arrays, which is read by probe without any parsing, or 'fst' for GTKWave's compressed
+        format. FPGA targets may also select 'csv' to skip the conversion and probe the raw CSV result file directly,
+        in this case no result file for waveform viewers is written. """
+
         self.fpga_sim_ctrl = FPGASimCtrl.VIVADO_VIO
         """ type(float) : FPGA simulation control interface used for this target. """
 
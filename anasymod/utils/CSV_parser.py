@@ -0,0 +1,140 @@
+import re
+from itertools import islice
+
+import numpy as np
+
+from anasymod.utils.compression import open_result
+
+__all__ = ["ParseCSV"]
+
+# number base of integer radices used in ILA result files, other radices are decimal
+_RADIX_BASES = {'BINARY': 2, 'OCTAL': 8, 'HEX': 16}
+
+def _int_converter(base):
+    """
+    Create converter for integers of given number base, unknown bits (x, z) are converted to 0.
+    """
+    def convert(token):
+        token = token.strip().translate(str.maketrans('xXzZ', '0000'))
+        return int(token, base) if token else 0
+    return convert
+
+class ParseCSV:
+    """
+    Parser for CSV result files as written by the ILA, including a header line with the column names and an optional
+    'Radix' line with the number format of each column.
+    """
+    def __init__(self, csv_root):
+        """
+
+        :param csv_root: path to CSV file, may be gzip-compressed (*.csv.gz)
+        """
+        self.csv_root = csv_root
+
+    def read_header(self):
+        """
+        Read header line and radix line of the CSV file.
+
+        :return: list of column dicts including 'name' (without bit range), 'width' (None if no bit range is given)
+                 and 'radix' (None if there is no radix line), and number of header lines
+        """
+        with open_result(self.csv_root, 'r') as f:
+            first_line = f.readline()
+            second_line = f.readline()
+
+        columns = []
+        for signal in first_line.split(','):
+            signal = signal.strip()
+            width = None
+            match = re.match(r'(.*)\[(\d+):(\d+)\]$', signal)
+            if match:
+                signal = match.group(1)
+                width = abs(int(match.group(2)) - int(match.group(3))) + 1
+            elif '[' in signal:
+                signal = signal[:signal.index('[')]
+            columns.append({'name': signal, 'width': width, 'radix': None})
+
+        skip_header = 1
+        if second_line.startswith('Radix'):
+            skip_header = 2
+            radices = second_line[second_line.index('-')+1:].split(',') if '-' in second_line else []
+            for column, radix in zip(columns, radices):
+                column['radix'] = radix.strip().upper()
+
+        return columns, skip_header
+
+    def parse_csv_arrays(self, names=None):
+        """
+        Parse all columns of the CSV file in a single pass into typed numpy arrays:
+            - SIGNED columns and columns without radix: int64
+            - UNSIGNED, BINARY, OCTAL and HEX columns: uint64
+            - integer columns wider than 64 bits: object array of python integers
+            - columns with any other radix: float64
+
+        :param names: list of column names that shall be returned, None returns all columns
+        :return: dict of numpy arrays with column names as keys
+        """
+        columns, skip_header = self.read_header()
+        dtype, converters = self._table_type(columns)
+
+        with open_result(self.csv_root, 'r') as f:
+            table = np.loadtxt(f, delimiter=',', skiprows=skip_header, dtype=dtype, converters=converters, ndmin=1)
+        return self._columns(table, columns, names)
+
+    def iter_csv_arrays(self, names=None, chunk_size=65536):
+        """
+        Parse the CSV file in chunks of rows, so CSV files larger than the available memory can be processed. Columns
+        are typed the same way as by parse_csv_arrays.
+
+        :param names: list of column names that shall be returned, None returns all columns
+        :param chunk_size: number of rows per chunk, the last chunk may be shorter
+        :return: generator of dicts of numpy arrays with column names as keys
+        """
+        columns, skip_header = self.read_header()
+        dtype, converters = self._table_type(columns)
+
+        with open_result(self.csv_root, 'r') as f:
+            for _ in range(skip_header):
+                f.readline()
+            while True:
+                lines = [line for line in islice(f, chunk_size) if line.strip()]
+                if not lines:
+                    break
+                table = np.loadtxt(lines, delimiter=',', dtype=dtype, converters=converters, ndmin=1)
+                yield self._columns(table, columns, names)
+
+    @staticmethod
+    def _table_type(columns):
+        """
+        Create structured dtype and converters for parsing all columns of the CSV file according to their radix.
+        """
+        fields = []
+        converters = {}
+        for k, column in enumerate(columns):
+            radix = column['radix']
+            wide = column['width'] is not None and column['width'] > 64
+            if radix in _RADIX_BASES:
+                dtype = object if wide else np.uint64
+                converters[k] = _int_converter(_RADIX_BASES[radix])
+            elif radix == 'UNSIGNED':
+                dtype = np.uint64
+            elif radix in ('SIGNED', None):
+                dtype = np.int64
+            else:
+                dtype = np.float64
+            if wide and dtype is not np.float64:
+                dtype = object
+                converters.setdefault(k, _int_converter(10))
+            fields.append((f'f{k}', dtype))
+        return np.dtype(fields), converters
+
+    @staticmethod
+    def _columns(table, columns, names=None):
+        """
+        Split parsed table into contiguous column arrays with column names as keys.
+        """
+        data = {}
+        for k, column in enumerate(columns):
+            if names is None or column['name'] in names:
+                data[column['name']] = np.ascontiguousarray(table[f'f{k}'])
+        return data
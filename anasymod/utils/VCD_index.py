@@ -0,0 +1,189 @@
+import os
+import json
+from bisect import bisect_right
+
+__all__ = ["VCDIndex"]
+
+class VCDIndex:
+    """
+    Sidecar index for a VCD file, stored next to the VCD file as <vcd_file>.vcdidx. The index includes the signal table
+    of the VCD header and a sparse list of markers, each marker holding a timestamp, the byte offset of this timestamp
+    in the VCD file and the values of all signals right before this timestamp. This allows to answer signal listings
+    without reading the VCD header and to start parsing at any time window without scanning the file from the start.
+
+    The index is invalidated whenever size or modification time of the VCD file change.
+    """
+    version = 1
+
+    def __init__(self, vcd_root, marker_step=64*1024*1024):
+        """
+
+        :param vcd_root: path to VCD file
+        :param marker_step: approximate number of bytes in between two markers
+        """
+        self.vcd_root = vcd_root
+        self.index_path = vcd_root + '.vcdidx'
+        self.marker_step = marker_step
+
+        self.stat = None
+        """ type(list) : size and modification time of the VCD file the index was created for """
+
+        self.header_end = None
+        """ type(int) : byte offset at which the value change section starts """
+
+        self.signals = []
+        """ type(list(dict)) : signal table, each entry including scope, name, id, width and type """
+
+        self.markers = []
+        """ type(list) : list of [timestamp, byte offset, dict of value tokens per id code] """
+
+    @property
+    def _stat(self):
+        stat = os.stat(self.vcd_root)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def is_current(self):
+        """
+        :return: True if the index belongs to the current version of the VCD file
+        """
+        return self.stat == self._stat
+
+    def load(self):
+        """
+        Load index from sidecar file.
+
+        :return: True if a valid index for the current VCD file was found
+        """
+        try:
+            with open(self.index_path, 'r') as f:
+                content = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if content.get('version') != self.version or [content.get('size'), content.get('mtime')] != self._stat:
+            return False
+
+        self.stat = self._stat
+        self.header_end = content['header_end']
+        self.signals = content['signals']
+        self.markers = content['markers']
+        return True
+
+    def store(self):
+        """
+        Store index as sidecar file, a failure to write the file, e.g. for read-only result directories, is ignored.
+        """
+        size, mtime = self.stat
+        content = {
+            'version': self.version,
+            'size': size,
+            'mtime': mtime,
+            'header_end': self.header_end,
+            'signals': self.signals,
+            'markers': self.markers,
+        }
+        try:
+            with open(self.index_path, 'w') as f:
+                json.dump(content, f)
+        except OSError:
+            print(f'Warning: could not write VCD index file {self.index_path}')
+
+    def build(self, parser):
+        """
+        Build index by scanning the whole VCD file once.
+
+        :param parser: ParseVCD object for the VCD file
+        :type parser: anasymod.utils.VCD_parser.ParseVCD
+        """
+        self.stat = self._stat
+        data, self.header_end = parser.read_header(use_index=False)
+        self.signals = []
+        for code, entry in data.items():
+            for net in entry['nets']:
+                self.signals.append({'scope': net['hier'], 'name': net['name'], 'id': code,
+                                     'width': int(net['size']), 'type': net['type']})
+
+        # scan state, including the last value token of each id code
+        scan = {'values': {}, 'pending': None, 'in_comment': False}
+        self.markers = []
+        next_marker = self.header_end
+        # blocks are cut at whitespace, a '#' at the start of a block is only a timestamp, if it starts a line; after
+        # a space it is an id code, e.g. in 'b1010 #'
+        prev_ended_newline = True
+        with parser._open() as file:
+            file.seek(self.header_end)
+            offset = self.header_end
+            for block in parser._read_blocks(file):
+                parts = [block]
+                if offset >= next_marker:
+                    # split up block at the first timestamp in it, to place a marker there
+                    at_start = prev_ended_newline and block[:1] == b'#'
+                    pos = 0 if at_start else block.find(b'\n#') + 1
+                    if at_start or pos > 0:
+                        parts = [block[:pos], block[pos:]]
+
+                for k, part in enumerate(parts):
+                    if k == 1:
+                        # values stored for a marker are the ones right before the marker's timestamp
+                        self.markers.append([int(part.split(None, 1)[0][1:]), offset + pos, dict(scan['values'])])
+                        next_marker = offset + pos + self.marker_step
+                    self._scan(part, scan)
+                offset += len(block)
+                prev_ended_newline = block[-1:] == b'\n'
+
+    @staticmethod
+    def _scan(part, scan):
+        """
+        Update last value token of each id code with all value changes in part.
+        """
+        values = scan['values']
+        for token in part.split():
+            if scan['pending'] is not None:
+                values[token.decode()] = scan['pending']
+                scan['pending'] = None
+                continue
+
+            first = token[0]
+            if scan['in_comment']:
+                if token == b'$end':
+                    scan['in_comment'] = False
+            elif first in (98, 66, 114, 82): # 'b', 'B', 'r', 'R'
+                scan['pending'] = token.decode()
+            elif first == 36: # '$'
+                if token == b'$comment':
+                    scan['in_comment'] = True
+            elif first != 35: # '#'
+                values[token[1:].decode()] = token[:1].decode()
+
+    def signal_table(self, sigs=None):
+        """
+        Create dict of selected signals in same format as ParseVCD.read_header.
+
+        :param sigs: list of full signal names (<hier>.<name>) that shall be selected, None selects all signals
+        """
+        if sigs is not None:
+            usigs = set(sigs)
+
+        data = {}
+        for signal in self.signals:
+            if (sigs is None) or (signal['scope'] + '.' + signal['name'] in usigs):
+                if signal['id'] not in data:
+                    data[signal['id']] = {'nets': []}
+                data[signal['id']]['nets'].append({
+                    'type': signal['type'],
+                    'name': signal['name'],
+                    'size': str(signal['width']),
+                    'hier': signal['scope'],
+                })
+        return data
+
+    def find_marker(self, t_start):
+        """
+        Find last marker at or before t_start.
+
+        :return: marker [timestamp, byte offset, dict of value tokens] or None, if t_start lies before the first marker
+        """
+        k = bisect_right([marker[0] for marker in self.markers], t_start)
+        if k == 0:
+            return None
+        return self.markers[k-1]
@@ -1,10 +1,132 @@
+import os
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatchcase
+from itertools import chain
 
-__all__ = ["ParseVCD"]
+import numpy as np
+
+from anasymod.utils.VCD_index import VCDIndex
+from anasymod.utils.resample import sample_and_hold, window
+from anasymod.utils.compression import open_result, is_compressed
+
+__all__ = ["ParseVCD", "ScopeFilter", "unpack_wide", "pack_wide"]
+
+# translation table used to convert x and z bits to 0, same as the line based parser does
+_XZ_TO_ZERO = bytes.maketrans(b'xXzZ', b'0000')
+
+def unpack_wide(value, size):
+    """
+    Convert packed bits of vectors wider than 64 bits, as returned by ParseVCD.parse_vcd_arrays, to python integers.
+
+    :param value: uint8 array of shape (changes, ceil(size/8))
+    :param size: width of the vector
+    :return: object array of python integers
+    :rtype: numpy.ndarray
+    """
+    return np.array([int.from_bytes(row.tobytes(), 'big') >> (8 * row.size - size) for row in value], dtype='O')
+
+def pack_wide(value, size):
+    """
+    Convert integers to packed bits of vectors wider than 64 bits, same as returned by ParseVCD.parse_vcd_arrays.
+
+    :param value: iterable of python integers, negative numbers are represented as two's complement of width size
+    :param size: width of the vector
+    :return: uint8 array of shape (changes, ceil(size/8))
+    :rtype: numpy.ndarray
+    """
+    num_bytes = -(-size // 8)
+    shift = 8 * num_bytes - size
+    mask = (1 << size) - 1
+    packed = b''.join(((int(v) & mask) << shift).to_bytes(num_bytes, 'big') for v in value)
+    return np.frombuffer(packed, dtype=np.uint8).reshape(-1, num_bytes).copy()
+
+class ScopeFilter:
+    """
+    Selection of signals by glob patterns, see fnmatch. A pattern matches a signal, if it matches the signal's full
+    name (<hier>.<name>) or any of its enclosing scopes, e.g. 'top.tb_i.dut' matches all signals below top.tb_i.dut.
+    Exclude patterns take precedence over include patterns.
+    """
+    def __init__(self, include=None, exclude=None):
+        """
+
+        :param include: list of patterns, only matching signals are selected; None selects all signals
+        :param exclude: list of patterns, matching signals are not selected
+        """
+        self.include = list(include) if include is not None else None
+        self.exclude = list(exclude) if exclude is not None else []
+
+        # matches of include and exclude patterns for each scope that was checked before
+        self._scopes = {}
+
+    @staticmethod
+    def _match(names, patterns):
+        return any(fnmatchcase(name, pattern) for pattern in patterns for name in names)
+
+    def __call__(self, hier, name):
+        """
+        :param hier: dot-separated scope of the signal
+        :param name: name of the signal
+        :return: True if the signal is selected
+        """
+        scope = self._scopes.get(hier)
+        if scope is None:
+            parts = hier.split('.') if hier else []
+            prefixes = ['.'.join(parts[:k+1]) for k in range(len(parts))]
+            scope = (self.include is None or self._match(prefixes, self.include), self._match(prefixes, self.exclude))
+            self._scopes[hier] = scope
+
+        full_name = [hier + '.' + name if hier else name]
+        included = scope[0] or self._match(full_name, self.include)
+        excluded = scope[1] or self._match(full_name, self.exclude)
+        return included and not excluded
+
+def _parse_chunk(vcd_root, block_size, start, stop, states, cycle_cnt, timestamps):
+    """
+    Parse the value changes in between byte offsets start and stop of a VCD file, used by worker processes.
+
+    :return: tuple of parser states, last timestamp and array of timestamps found (None if timestamps is False)
+    """
+    parser = ParseVCD(vcd_root, block_size=block_size)
+    found_timestamps = array('q') if timestamps else None
+    with parser._open() as file:
+        file.seek(start)
+        cycle_cnt = parser._parse_blocks(parser._read_blocks(file, stop=stop), states, cycle_cnt=cycle_cnt,
+                                         timestamps=found_timestamps)
+    return states, cycle_cnt, found_timestamps
 
 class ParseVCD:
-    def __init__(self, vcd_root):
+    def __init__(self, vcd_root, block_size=16*1024*1024, workers=1, parallel_min_size=256*1024*1024, include=None,
+                 exclude=None):
+        """
+
+        :param vcd_root: path to VCD file, may be gzip-compressed (*.vcd.gz)
+        :param block_size: number of bytes read from the VCD file at once when using the block based parser
+        :param workers: number of processes used by the block based parser, None uses all available cores
+        :param parallel_min_size: minimum size in bytes of the value change section to use multiple processes
+        :param include: scope patterns, only signals within matching scopes are read, see ScopeFilter
+        :param exclude: scope patterns, signals within matching scopes are skipped, see ScopeFilter
+        """
         self.vcd_root = vcd_root
         self.cycle_value = 'cv'
+        self.block_size = block_size
+        self.workers = workers if workers is not None else os.cpu_count()
+        self.parallel_min_size = parallel_min_size
+        self.scope_filter = ScopeFilter(include=include, exclude=exclude) if include is not None or exclude else None
+
+        self.index = None
+        """ type(VCDIndex) : sidecar index of VCD file, only available after load_index was called """
+
+        self.timestamps = None
+        """ type(numpy.ndarray) : all timestamps that were found, only available after parse_vcd_arrays was called
+            with timestamps=True """
+
+    def _open(self, mode='rb'):
+        """
+        Open VCD file, gzip-compressed VCD files (*.vcd.gz) are decompressed in a background thread while parsing.
+        """
+        return open_result(self.vcd_root, mode, background=True, block_size=self.block_size)
 
     def parse_vcd(self, sig_names=0, stdout=0, sigs=[], update_data=False):
         #Initialization
@@ -21,7 +143,7 @@ class ParseVCD:
         else:
             all_sigs = 1
 
-        with open(self.vcd_root, 'r') as file:
+        with self._open('r') as file:
             while True:
                 line = file.readline()
                 if line == '':  # End-of-File
@@ -121,7 +243,9 @@ class ParseVCD:
 
     def list_sigs(self):
 
-        vcd = self.parse_vcd(sig_names=1)
+        # signal table is taken from the index if there is one, but no index is built just for listing signals
+        self.load_index(build=False)
+        vcd, _ = self.read_header()
 
         sigs = []
         for k in vcd.keys():
@@ -130,3 +254,561 @@ class ParseVCD:
             sigs.extend(n['hier'] + '.' + n['name'] for n in nets)
 
         return sigs
+
+    def load_index(self, build=True):
+        """
+        Load sidecar index of the VCD file. In case there is no valid index yet, it is built and stored next to the
+        VCD file.
+
+        :param build: build index, if no valid index is available
+        :return: index object, None if no index is available
+        :rtype: VCDIndex
+        """
+        if self.index is None or not self.index.is_current():
+            index = VCDIndex(self.vcd_root)
+            if index.load():
+                self.index = index
+            elif build:
+                index.build(parser=self)
+                index.store()
+                self.index = index
+            else:
+                self.index = None
+
+        return self.index
+
+    def read_header(self, sigs=None, use_index=True):
+        """
+        Read the definition section of the VCD file. If an index was loaded, the signal table is taken from the index
+        instead. Signals rejected by the scope filter are never selected, so their value changes are skipped while
+        parsing.
+
+        :param sigs: list of full signal names (<hier>.<name>) that shall be selected, None selects all signals
+        :param use_index: take signal table from index, if an index was loaded
+        :return: tuple of dict including all selected signals with id code as key and the byte offset at which the
+                 value change section starts
+        """
+        if use_index and self.index is not None:
+            data, offset = self.index.signal_table(sigs=sigs), self.index.header_end
+            if self.scope_filter is not None:
+                for code, entry in list(data.items()):
+                    entry['nets'] = [net for net in entry['nets'] if self.scope_filter(net['hier'], net['name'])]
+                    if not entry['nets']:
+                        del data[code]
+            if len(data) == 0:
+                raise Exception(f"No matching signals were found reading VCD file: {self.vcd_root}")
+            return data, offset
+
+        if sigs is not None:
+            usigs = set(sigs)
+
+        header = []
+        with open_result(self.vcd_root, 'rb') as file:
+            while True:
+                line = file.readline()
+                if line == b'':
+                    raise Exception(f"No $enddefinitions section was found reading VCD file {self.vcd_root}")
+                header.append(line)
+                if b'$enddefinitions' in line:
+                    # make sure the closing $end of $enddefinitions is consumed as well
+                    while b'$end' not in line.split(b'$enddefinitions', 1)[1]:
+                        line = file.readline()
+                        if line == b'':
+                            break
+                    offset = file.tell()
+                    break
+
+        data = {}
+        hierarchy = []
+        tokens = b''.join(header).decode('utf-8', errors='replace').split()
+        k = 0
+        while k < len(tokens):
+            token = tokens[k]
+            if token == '$scope':
+                hierarchy.append(tokens[k + 2])
+                k += 3
+            elif token == '$upscope':
+                hierarchy.pop()
+                k += 1
+            elif token == '$var':
+                type, size, code, name = tokens[k + 1:k + 5]
+                path = '.'.join(hierarchy)
+                k += 5
+                if ((sigs is None) or (path + '.' + name in usigs)) and \
+                        (self.scope_filter is None or self.scope_filter(path, name)):
+                    if code not in data:
+                        data[code] = {'nets': []}
+                    var_struct = {
+                        'type': type,
+                        'name': name,
+                        'size': size,
+                        'hier': path,
+                    }
+                    if var_struct not in data[code]['nets']:
+                        data[code]['nets'].append(var_struct)
+            else:
+                k += 1
+
+        if len(data) == 0:
+            if sigs is None:
+                raise Exception(f"No signals were found reading VCD file {self.vcd_root}")
+            else:
+                raise Exception(f"No matching signals were found reading VCD file: {self.vcd_root}")
+
+        return data, offset
+
+    def parse_vcd_arrays(self, sigs=None, t_start=None, t_stop=None, timestamps=False):
+        """
+        Parse value changes of selected signals into typed numpy arrays. Other than parse_vcd, the file is read in
+        large blocks and value changes of signals that were not requested are skipped without being decoded.
+
+        The value array of each signal is typed according to the signal's declaration:
+            - real variables: float64
+            - vectors up to 64 bits: uint64
+            - wider vectors: uint8 array of shape (changes, ceil(width/8)) including the MSB-first packed bits
+        As in parse_vcd, x and z bits are converted to 0.
+
+        If a time window is selected, the first sample of each signal is placed at t_start, holding the value the signal
+        had at t_start, and the last value is held until t_stop. Parsing starts at the last index marker before t_start
+        and stops right after t_stop; the index is built on the first call with t_start set.
+
+        Value change sections larger than self.parallel_min_size are split up at timestamps and parsed by self.workers
+        processes, unless t_stop is set; the result is the same as for the serial parser.
+
+        :param sigs: list of full signal names (<hier>.<name>) that shall be parsed, None selects all signals
+        :param t_start: start of time window in VCD timestamps, None to start at the beginning of the file
+        :param t_stop: end of time window in VCD timestamps, None to stop at the end of the file
+        :param timestamps: store all timestamps of the parsed section of the VCD file in self.timestamps
+        :return: dict with id code as key, each entry including 'nets', 'time' (int64) and 'value' arrays
+        """
+        if t_start is not None:
+            self.load_index()
+        data, offset = self.read_header(sigs=sigs)
+        states = self._init_states(data)
+
+        cycle_cnt = 0
+        if t_start is not None and self.index is not None:
+            marker = self.index.find_marker(t_start)
+            if marker is not None:
+                cycle_cnt, offset, values = marker
+                # initialize each signal with the value it had right before the marker's timestamp
+                for code, state in states.items():
+                    if code.decode() in values:
+                        self._append_value(state, cycle_cnt, values[code.decode()].encode())
+
+        found_timestamps = array('q') if timestamps else None
+        # compressed files can only be read sequentially, so they are always parsed by a single process
+        if (self.workers > 1 and t_stop is None and not is_compressed(self.vcd_root) and
+                os.path.getsize(self.vcd_root) - offset >= self.parallel_min_size):
+            cycle_cnt = self._parse_parallel(offset, states, cycle_cnt=cycle_cnt, timestamps=found_timestamps)
+        else:
+            with self._open() as file:
+                file.seek(offset)
+                cycle_cnt = self._parse_blocks(self._read_blocks(file), states, cycle_cnt=cycle_cnt, t_stop=t_stop,
+                                               timestamps=found_timestamps)
+
+        if timestamps:
+            self.timestamps = np.array(found_timestamps, dtype=np.int64)
+            if t_start is not None:
+                self.timestamps = np.unique(np.append(self.timestamps[self.timestamps > t_start], t_start))
+
+        for code, state in states.items():
+            entry = data[code.decode()]
+            entry.update(self._finalize_state(state, end_cycle=cycle_cnt))
+            if t_start is not None:
+                entry['time'], entry['value'] = window(entry['time'], entry['value'], t_start=t_start)
+
+        return data
+
+    def resample(self, names, grid=None, t_start=None, t_stop=None):
+        """
+        Parse selected signals and resample them onto a common time grid. Each signal is sample-and-hold resampled, so
+        each grid point takes the value the signal had at this point in time.
+
+        :param names: list of full signal names (<hier>.<name>)
+        :param grid: sorted array of VCD timestamps, if omitted all timestamps found in the VCD file are used
+        :param t_start: start of time window in VCD timestamps, only used if no grid is provided
+        :param t_stop: end of time window in VCD timestamps, only used if no grid is provided
+        :return: tuple of grid and dict of resampled value arrays with signal names as keys
+        """
+        if grid is None:
+            data = self.parse_vcd_arrays(sigs=names, t_start=t_start, t_stop=t_stop, timestamps=True)
+            grid = self.timestamps
+        else:
+            grid = np.asarray(grid, dtype=np.int64)
+            if len(grid):
+                data = self.parse_vcd_arrays(sigs=names, t_start=grid[0], t_stop=grid[-1])
+            else:
+                data = self.parse_vcd_arrays(sigs=names)
+
+        columns = {}
+        for entry in data.values():
+            column = sample_and_hold(entry['time'], entry['value'], grid)
+            for net in entry['nets']:
+                columns[net['hier'] + '.' + net['name']] = column
+
+        return grid, columns
+
+    def iter_arrays(self, names, t_start=None, t_stop=None, chunk_size=65536):
+        """
+        Parse selected signals and yield them in chunks of chunk_size samples aligned on a common time basis, which
+        includes each timestamp at which any of the selected signals changes. Each chunk is yielded as soon as it was
+        parsed and only value changes not yet yielded are kept in memory, so arbitrarily large VCD files can be
+        processed. The result is the same as parsing the signals with parse_vcd_arrays and resampling them onto this
+        time basis.
+
+        :param names: list of full signal names (<hier>.<name>)
+        :param t_start: start of time window in VCD timestamps, None to start at the beginning of the file
+        :param t_stop: end of time window in VCD timestamps, None to stop at the end of the file
+        :param chunk_size: number of samples per chunk, the last chunk may be shorter
+        :return: generator of tuples of time array (int64) and dict of value arrays with signal names as keys
+        """
+        if t_start is not None:
+            self.load_index()
+        data, offset = self.read_header(sigs=names)
+        states = self._init_states(data)
+
+        cycle_cnt = 0
+        if t_start is not None and self.index is not None:
+            marker = self.index.find_marker(t_start)
+            if marker is not None:
+                cycle_cnt, offset, values = marker
+                # initialize each signal with the value it had right before the marker's timestamp
+                for code, state in states.items():
+                    if code.decode() in values:
+                        self._append_value(state, cycle_cnt, values[code.decode()].encode())
+
+        # value of each signal at the end of the samples yielded so far
+        last = {code: 0 for code in states}
+        # t_start is included in the time basis, if any signal changes at or before t_start
+        hold_start = False
+        last_time = None
+        buffer = []
+
+        with self._open() as file:
+            file.seek(offset)
+            parser = self._iter_parse(self._read_blocks(file), states, cycle_cnt=cycle_cnt, t_stop=t_stop)
+            # None marks the end of the parsed section, at which all remaining value changes are complete
+            for complete in chain(parser, [None]):
+                if complete is not None:
+                    cycle_cnt = complete
+                    if t_start is not None and last_time is None and complete <= t_start:
+                        # value changes at t_start may still follow
+                        continue
+
+                changes = {code: self._take_state(state, before=complete) for code, state in states.items()}
+
+                if t_start is not None and last_time is None:
+                    # value changes before t_start only set the value at t_start
+                    for code, change in changes.items():
+                        k = np.searchsorted(change['time'], t_start, side='left')
+                        if k > 0:
+                            last[code] = change['value'][k-1]
+                            hold_start = True
+                            changes[code] = {'time': change['time'][k:], 'value': change['value'][k:]}
+
+                grid = [change['time'] for change in changes.values()]
+                if last_time is None and hold_start:
+                    grid.append(np.array([t_start], dtype=np.int64))
+                grid = np.unique(np.concatenate(grid))
+
+                if complete is None:
+                    end = grid[-1] if len(grid) else last_time
+                    if end is not None and end < cycle_cnt:
+                        # hold last values until the end of the parsed section, same as parse_vcd_arrays
+                        grid = np.append(grid, np.array([cycle_cnt], dtype=np.int64))
+                if len(grid) == 0:
+                    continue
+
+                columns = {}
+                for code, change in changes.items():
+                    columns[code] = sample_and_hold(change['time'], change['value'], grid, initial=last[code])
+                    last[code] = columns[code][-1]
+                last_time = grid[-1]
+
+                buffer.append((grid, columns))
+                yield from self._rechunk(buffer, data, chunk_size, flush=complete is None)
+
+    def iter_changes(self, sigs=None, chunk_size=1024*1024):
+        """
+        Parse selected signals and yield their value changes in chunks, so VCD files larger than the available memory
+        can be processed. Other than iter_arrays, signals are not resampled onto a common time basis: each chunk holds
+        the value changes of all selected signals up to a timestamp, that were not yielded before. Concatenating the
+        chunks of a signal gives the same arrays as parse_vcd_arrays, including the last value held until the end.
+
+        :param sigs: list of full signal names (<hier>.<name>) that shall be parsed, None selects all signals
+        :param chunk_size: minimum number of value changes per chunk, the last chunk may be smaller
+        :return: generator of dicts with the same structure as returned by parse_vcd_arrays
+        """
+        data, offset = self.read_header(sigs=sigs)
+        states = self._init_states(data)
+
+        # last value change yielded for each signal
+        last = {}
+        with self._open() as file:
+            file.seek(offset)
+            parser = self._iter_parse(self._read_blocks(file), states)
+            cycle_cnt = 0
+            # None marks the end of the file, at which all remaining value changes are complete
+            for complete in chain(parser, [None]):
+                if complete is not None:
+                    cycle_cnt = complete
+                    if sum(len(state['time']) for state in states.values()) < chunk_size:
+                        continue
+
+                chunk = {}
+                for code, state in states.items():
+                    n = len(state['time']) if complete is None else bisect_left(state['time'], complete)
+                    if n:
+                        last[code] = (state['time'][n-1], state['value'][n-1])
+                    if complete is None and code in last and last[code][0] != cycle_cnt:
+                        # hold last value until the end of the file, same as parse_vcd_arrays
+                        state['time'].append(cycle_cnt)
+                        state['value'].append(last[code][1])
+                    chunk[code.decode()] = dict(data[code.decode()], **self._take_state(state, before=complete))
+                yield chunk
+
+    def _take_state(self, state, before=None):
+        """
+        Remove all value changes before a timestamp from parser state and return them as typed numpy arrays.
+
+        :param before: timestamp, None to take all value changes
+        """
+        n = len(state['time']) if before is None else bisect_left(state['time'], before)
+        part = {'kind': state['kind'], 'size': state['size'], 'time': state['time'][:n], 'value': state['value'][:n]}
+        del state['time'][:n]
+        del state['value'][:n]
+        return self._finalize_state(part)
+
+    @staticmethod
+    def _rechunk(buffer, data, chunk_size, flush=False):
+        """
+        Concatenate aligned samples in buffer and yield them in chunks of chunk_size samples with signal names as keys,
+        remaining samples are kept in buffer unless flush is set.
+        """
+        total = sum(len(grid) for grid, _ in buffer)
+        if total == 0 or (total < chunk_size and not flush):
+            return
+
+        grid = np.concatenate([grid for grid, _ in buffer])
+        columns = {code: np.concatenate([columns[code] for _, columns in buffer]) for code in buffer[0][1]}
+        buffer.clear()
+
+        num = total if flush else total - total % chunk_size
+        for k in range(0, num, chunk_size):
+            chunk = {}
+            for code, column in columns.items():
+                for net in data[code.decode()]['nets']:
+                    chunk[net['hier'] + '.' + net['name']] = column[k:k+chunk_size]
+            yield grid[k:k+chunk_size], chunk
+        if num < total:
+            buffer.append((grid[num:], {code: column[num:] for code, column in columns.items()}))
+
+    def _parse_parallel(self, offset, states, cycle_cnt=0, timestamps=None):
+        """
+        Split value change section starting at offset into chunks starting with a timestamp, parse each chunk in a
+        separate process and append the results of all chunks in order to the parser states.
+
+        :return: last timestamp that was reached
+        """
+        chunks = self._split_chunks(offset, self.workers)
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(_parse_chunk, self.vcd_root, self.block_size, start, stop,
+                                       {code: self._empty_state(state) for code, state in states.items()},
+                                       cycle_cnt, timestamps is not None)
+                       for start, stop in chunks]
+
+            # merge chunks in order, since only value changes are stored, appending the arrays of consecutive chunks
+            # carries each signal's last value over chunk edges
+            for future in futures:
+                chunk_states, cycle_cnt, chunk_timestamps = future.result()
+                for code, chunk_state in chunk_states.items():
+                    states[code]['time'].extend(chunk_state['time'])
+                    states[code]['value'].extend(chunk_state['value'])
+                if timestamps is not None:
+                    timestamps.extend(chunk_timestamps)
+
+        return cycle_cnt
+
+    def _split_chunks(self, offset, num):
+        """
+        Split file from offset to end into num chunks of about the same size, each chunk except for the first one
+        starts with a timestamp.
+
+        :return: list of tuples with start and stop byte offset
+        """
+        end = os.path.getsize(self.vcd_root)
+        bounds = [offset]
+        with open(self.vcd_root, 'rb') as file:
+            for k in range(1, num):
+                pos = max(offset + (end - offset) * k // num, bounds[-1])
+                file.seek(pos)
+                while True:
+                    block = file.read(1024*1024)
+                    if block == b'':
+                        pos = end
+                        break
+                    idx = block.find(b'\n#')
+                    if idx >= 0:
+                        pos += idx + 1
+                        break
+                    # keep last character, in case the newline is the last character in block
+                    pos += len(block) - 1
+                    file.seek(pos)
+                if bounds[-1] < pos < end:
+                    bounds.append(pos)
+        bounds.append(end)
+
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def _read_blocks(self, file, stop=None):
+        """
+        Read file in blocks of self.block_size bytes, each block ends on a whitespace, so no token gets split up.
+
+        :param stop: byte offset at which reading stops, None reads until the end of the file
+        """
+        rest = b''
+        while True:
+            if stop is None:
+                block = file.read(self.block_size)
+            else:
+                block = file.read(max(min(self.block_size, stop - file.tell()), 0))
+            if block == b'':
+                if rest:
+                    yield rest
+                break
+            block = rest + block
+            cut = max(block.rfind(b'\n'), block.rfind(b' '))
+            if cut < 0:
+                rest = block
+            else:
+                rest = block[cut+1:]
+                yield block[:cut+1]
+
+    @staticmethod
+    def _empty_state(state):
+        """
+        Create empty parser state of same kind as state.
+        """
+        values = array(state['value'].typecode) if isinstance(state['value'], array) else []
+        return {'kind': state['kind'], 'size': state['size'], 'time': array('q'), 'value': values}
+
+    def _init_states(self, data):
+        """
+        Create parser state for each selected id code.
+        """
+        states = {}
+        for code, entry in data.items():
+            net = entry['nets'][0]
+            size = int(net['size'])
+            if net['type'] in ('real', 'realtime'):
+                kind = 'real'
+                values = array('d')
+            elif size <= 64:
+                kind = 'uint'
+                values = array('Q')
+            else:
+                kind = 'wide'
+                values = []
+            states[code.encode()] = {'kind': kind, 'size': size, 'time': array('q'), 'value': values}
+        return states
+
+    def _parse_blocks(self, blocks, states, cycle_cnt=0, t_stop=None, timestamps=None):
+        """
+        Tokenize blocks of the value change section and append value changes of the id codes in states.
+
+        :param t_stop: stop parsing at the first timestamp after t_stop
+        :param timestamps: if an array is provided, all timestamps that were found are appended
+        :return: last timestamp that was reached, this is t_stop in case parsing was stopped
+        """
+        for cycle_cnt in self._iter_parse(blocks, states, cycle_cnt=cycle_cnt, t_stop=t_stop, timestamps=timestamps):
+            pass
+        return cycle_cnt
+
+    def _iter_parse(self, blocks, states, cycle_cnt=0, t_stop=None, timestamps=None):
+        """
+        Same as _parse_blocks, but yields the last timestamp that was reached after each block, so value changes can be
+        consumed while parsing. All value changes before this timestamp are complete; in case parsing was stopped, the
+        last value yielded is t_stop.
+        """
+        pending = None
+        in_comment = False
+        for block in blocks:
+            for token in block.split():
+                if pending is not None:
+                    # token is the id code belonging to a vector or real value
+                    state = states.get(token)
+                    if state is not None:
+                        self._append_value(state, cycle_cnt, pending)
+                    pending = None
+                    continue
+
+                first = token[0]
+                if in_comment:
+                    if token == b'$end':
+                        in_comment = False
+                elif first == 35: # '#'
+                    cycle_cnt = int(token[1:])
+                    if t_stop is not None and cycle_cnt > t_stop:
+                        yield t_stop
+                        return
+                    if timestamps is not None:
+                        timestamps.append(cycle_cnt)
+                elif first in (98, 66, 114, 82): # 'b', 'B', 'r', 'R'
+                    pending = token
+                elif first == 36: # '$'
+                    if token == b'$comment':
+                        in_comment = True
+                else:
+                    state = states.get(token[1:])
+                    if state is not None:
+                        self._append_value(state, cycle_cnt, token[:1])
+
+            yield cycle_cnt
+
+        yield cycle_cnt
+
+    @staticmethod
+    def _append_value(state, cycle_cnt, token):
+        """
+        Append single value change to parser state; token includes the value type prefix for vectors and reals.
+        """
+        kind = state['kind']
+        if token[0] in (98, 66, 114, 82):
+            token = token[1:]
+        state['time'].append(cycle_cnt)
+        if kind == 'real':
+            try:
+                state['value'].append(float(token))
+            except ValueError:
+                # This is a quick fix that sets X,Z, ... to 0
+                state['value'].append(0.0)
+        elif kind == 'uint':
+            try:
+                state['value'].append(int(token.translate(_XZ_TO_ZERO), 2))
+            except ValueError:
+                state['value'].append(0)
+        else:
+            state['value'].append(token.translate(_XZ_TO_ZERO))
+
+    @staticmethod
+    def _finalize_state(state, end_cycle=None):
+        """
+        Convert parser state of a single signal into typed numpy arrays. If end_cycle is provided, the last value is
+        repeated at end_cycle, same as parse_vcd does at the end of the file.
+        """
+        if end_cycle is not None and len(state['time']) and state['time'][-1] != end_cycle:
+            state['time'].append(end_cycle)
+            state['value'].append(state['value'][-1])
+        time = np.frombuffer(state['time'], dtype=np.int64) if len(state['time']) else np.zeros(0, dtype=np.int64)
+        if state['kind'] == 'real':
+            value = np.frombuffer(state['value'], dtype=np.float64) if len(state['value']) else np.zeros(0, dtype=np.float64)
+        elif state['kind'] == 'uint':
+            value = np.frombuffer(state['value'], dtype=np.uint64) if len(state['value']) else np.zeros(0, dtype=np.uint64)
+        else:
+            # extend binary to full width, simulators may remove leading zeros, then pack MSB first
+            size = state['size']
+            bits = np.frombuffer(b''.join(v.rjust(size, b'0')[-size:] for v in state['value']), dtype=np.uint8)
+            value = np.packbits(bits.reshape(-1, size) - 48, axis=1)
+        return {'time': time, 'value': value}
+
@@ -0,0 +1,207 @@
+import os
+import shutil
+
+import numpy as np
+
+from anasymod.util import call
+from anasymod.utils.compression import open_result
+from anasymod.utils.result_writer import ResultWriter, changes_only
+
+__all__ = ["WriteVCD", "WriteFST", "changes_only"]
+
+class WriteVCD(ResultWriter):
+    """
+    Bulk VCD writer, that takes whole waveforms as typed arrays instead of single value changes. Only actual value
+    changes are written; values are formatted signal by signal and value changes of all signals are merged by time and
+    written in large blocks. The file is written gzip-compressed, if its name ends with .gz.
+    """
+    def __init__(self, vcd_root, timescale='1 fs', date=None, block_size=1024*1024):
+        """
+
+        :param vcd_root: path to VCD file
+        :param timescale: timescale of the VCD file, e.g. '1 fs'
+        :param date: date written to VCD header
+        :param block_size: number of value changes formatted and written at once
+        """
+        super().__init__(result_path=vcd_root)
+        self.vcd_root = vcd_root
+        self.timescale = timescale
+        self.date = date
+        self.block_size = block_size
+
+    def _format(self, var, value):
+        """
+        Format value changes of a single variable as lines of the VCD file. Each distinct value is only formatted once,
+        which pays off for digital signals with few distinct values.
+        """
+        ident = var['id']
+        if var['type'] in ('real', 'realtime'):
+            value = value.astype(np.float64)
+        elif value.dtype != object:
+            if value.dtype.kind == 'f':
+                value = value.astype(np.int64)
+            # represent negative numbers as two's complement of the variable's width
+            value = value.astype(np.uint64)
+            if var['size'] < 64:
+                value &= np.uint64((1 << var['size']) - 1)
+
+        if value.dtype != object:
+            value, inverse = np.unique(value, return_inverse=True)
+        else:
+            inverse = None
+
+        values = value.tolist()
+        if var['type'] in ('real', 'realtime'):
+            lines = [f'r{v:.16g} {ident}\n' for v in values]
+        elif var['size'] == 1:
+            lines = [f'{v}{ident}\n' for v in values]
+        else:
+            mask = (1 << var['size']) - 1
+            lines = [f'b{v & mask:b} {ident}\n' for v in values]
+
+        if inverse is not None:
+            lines = np.array(lines, dtype=object)[inverse.reshape(-1)]
+        return lines
+
+    def _header(self):
+        """
+        Create VCD header including the scopes and variable definitions.
+        """
+        lines = []
+        if self.date is not None:
+            lines.append(f'$date {self.date} $end\n')
+        lines.append(f'$timescale {self.timescale} $end\n')
+
+        scope = []
+        for var in sorted(self.vars, key=lambda v: v['scope'].split('.') if v['scope'] else []):
+            var_scope = var['scope'].split('.') if var['scope'] else []
+            common = 0
+            while common < min(len(scope), len(var_scope)) and scope[common] == var_scope[common]:
+                common += 1
+            lines.extend('$upscope $end\n' for _ in scope[common:])
+            lines.extend(f'$scope module {s} $end\n' for s in var_scope[common:])
+            scope = var_scope
+            lines.append(f'$var {var["type"]} {var["size"]} {var["id"]} {var["name"]} $end\n')
+        lines.extend('$upscope $end\n' for _ in scope)
+        lines.append('$enddefinitions $end\n')
+        return ''.join(lines)
+
+    def write(self):
+        """
+        Write VCD file including the waveforms of all registered variables.
+        """
+        self.open()
+        self.flush()
+        self.close()
+
+    def open(self):
+        """
+        Open VCD file and write its header, waveforms are written by the following calls of flush.
+        """
+        self._file = open_result(self.vcd_root, 'w')
+        self._file.write(self._header())
+        self._prev_time = None
+        self._last_value = [None] * len(self.vars)
+
+    def flush(self):
+        """
+        Write value changes of the waveforms set since the last flush and reset the waveforms. A first sample that
+        repeats the last value written for a variable is dropped.
+        """
+        variables = []
+        for k, var in enumerate(self.vars):
+            time, value = var['time'], var['value']
+            var['time'], var['value'] = None, None
+            if time is None or not len(time):
+                continue
+            last = self._last_value[k]
+            if last is not None and np.array_equal(value[:1], last):
+                time, value = time[1:], value[1:]
+                if not len(time):
+                    continue
+            self._last_value[k] = value[-1:]
+            variables.append(dict(var, time=time, value=value))
+
+        # order all value changes by time, keeping the order of the variables for changes at the same time
+        times = np.concatenate([var['time'] for var in variables]) if variables else np.zeros(0, dtype=np.int64)
+        var_idx = np.concatenate([np.full(len(var['time']), k) for k, var in enumerate(variables)]) if variables \
+            else np.zeros(0, dtype=np.int64)
+        sample_idx = np.concatenate([np.arange(len(var['time'])) for var in variables]) if variables \
+            else np.zeros(0, dtype=np.int64)
+        order = np.argsort(times, kind='stable')
+        times, var_idx, sample_idx = times[order], var_idx[order], sample_idx[order]
+
+        for start in range(0, len(times), self.block_size):
+            stop = min(start + self.block_size, len(times))
+            block_times = times[start:stop]
+
+            # format value changes of block variable by variable, as the order of value changes of each variable
+            # is kept, the value changes of a variable in the block are a contiguous range of its samples
+            block_vars = var_idx[start:stop]
+            block_samples = sample_idx[start:stop]
+            counts = np.bincount(block_vars, minlength=len(variables))
+            first = np.zeros(len(variables), dtype=np.int64)
+            block_var_ids, first_idx = np.unique(block_vars, return_index=True)
+            first[block_var_ids] = block_samples[first_idx]
+            formatted = [self._format(variables[k], variables[k]['value'][first[k]:first[k] + counts[k]])
+                         for k in np.flatnonzero(counts)]
+
+            # reorder formatted lines by time
+            offsets = np.cumsum(counts) - counts
+            lines = np.concatenate([np.array(f, dtype=object) for f in formatted])
+            lines = lines[offsets[block_vars] + block_samples - first[block_vars]]
+
+            # insert a timestamp line in front of each change of time
+            new_time = np.concatenate(([block_times[0] != self._prev_time], block_times[1:] != block_times[:-1]))
+            out = np.empty(len(lines) + np.count_nonzero(new_time), dtype=object)
+            pos = np.arange(len(lines)) + np.cumsum(new_time)
+            out[pos] = lines
+            out[pos[new_time] - 1] = np.array([f'#{t}\n' for t in block_times[new_time].tolist()], dtype=object)
+
+            if self._prev_time is None:
+                # values at the first timestamp are the initial values
+                num_initial = np.count_nonzero(block_times == block_times[0]) + 1
+                out = np.concatenate((out[:1], np.array(['$dumpvars\n'], dtype=object), out[1:num_initial],
+                                      np.array(['$end\n'], dtype=object), out[num_initial:]))
+            self._prev_time = block_times[-1]
+
+            self._file.write(''.join(out.tolist()))
+
+    def close(self):
+        """
+        Close VCD file.
+        """
+        self._file.close()
+        self._file = None
+
+class WriteFST(WriteVCD):
+    """
+    Writer for FST files, GTKWave's compressed waveform format. Waveforms are written to a temporary VCD file first,
+    which is then converted by the vcd2fst tool shipped with GTKWave.
+    """
+    def __init__(self, fst_root, timescale='1 fs', date=None, block_size=1024*1024, vcd2fst=None):
+        """
+
+        :param fst_root: path to FST file
+        :param timescale: timescale of the FST file, e.g. '1 fs'
+        :param date: date written to FST header
+        :param block_size: number of value changes formatted and written at once
+        :param vcd2fst: path to vcd2fst binary, by default it is searched for in the system path
+        """
+        super().__init__(vcd_root=os.path.splitext(fst_root)[0] + '_fst.vcd', timescale=timescale, date=date,
+                         block_size=block_size)
+        self.fst_root = fst_root
+        self.vcd2fst = vcd2fst if vcd2fst is not None else shutil.which('vcd2fst')
+
+    def open(self):
+        if self.vcd2fst is None:
+            raise Exception('ERROR: vcd2fst could not be found, which is needed to write FST files; please install '
+                            'GTKWave or select a different result_type.')
+        super().open()
+
+    def close(self):
+        super().close()
+        try:
+            call([self.vcd2fst, self.vcd_root, self.fst_root])
+        finally:
+            os.remove(self.vcd_root)
@@ -0,0 +1,269 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+from contextlib import contextmanager
+
+import numpy as np
+
+__all__ = ["ColumnStore"]
+
+class ColumnStore:
+    """
+    Columnar on-disk storage of waveforms, stored next to a result file in the directory <result_file>.cols. For each
+    signal, time and value arrays are stored as separate .npy files, so they can be memory-mapped without any parsing.
+    A manifest file keeps track of the stored signals and of size, modification time and hash of the result file the
+    signals were extracted from; the store is discarded as soon as the result file changes. A store without source
+    file is a result file of its own, as written by WriteColumns.
+
+    Several processes may fill the same store concurrently: the files of a signal are named after a hash of the signal
+    name and written to a temporary file first, and the manifest is merged with the one found on disk under a lock.
+    """
+    version = 1
+
+    def __init__(self, source_path, store_path=None):
+        """
+
+        :param source_path: path of the result file the stored signals are extracted from, None if the store is not
+                            extracted from another result file
+        :param store_path: directory used to store the signals, default is <source_path>.cols
+        """
+        self.source_path = source_path
+        self.store_path = store_path if store_path is not None else source_path + '.cols'
+        self.manifest_path = os.path.join(self.store_path, 'manifest.json')
+
+        self.manifest = None
+        """ type(dict) : content of the manifest file, only available after load_manifest was called """
+
+        self._locked = False
+
+    def _source_key(self, with_hash=True):
+        """
+        Key identifying the current version of the source file. As result files can get very large, the hash only
+        covers size, first and last MB of the file.
+        """
+        if self.source_path is None:
+            return None
+        stat = os.stat(self.source_path)
+        key = {'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+        if with_hash:
+            sha = hashlib.sha1(str(stat.st_size).encode())
+            with open(self.source_path, 'rb') as f:
+                sha.update(f.read(1024*1024))
+                if stat.st_size > 2*1024*1024:
+                    f.seek(-1024*1024, os.SEEK_END)
+                    sha.update(f.read())
+            key['hash'] = sha.hexdigest()
+        return key
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load_manifest(self, clear_invalid=False):
+        """
+        Load manifest of store and check, if stored signals belong to the current version of the source file. If the
+        source file was only touched or copied, which changes the modification time, the content hash is used to
+        validate the store.
+
+        :param clear_invalid: remove an invalid store and start with an empty one, only to be used for stores that
+                              serve as cache of the source file, never for result files
+        :return: True if store is valid
+        """
+        manifest = self._read_manifest()
+        if self._validate(manifest):
+            return True
+
+        self.manifest = None
+        if clear_invalid:
+            self._clear_outdated()
+        return False
+
+    def _validate(self, manifest):
+        """
+        Take over manifest, if it belongs to the current version of the source file.
+
+        :return: True if manifest is valid
+        """
+        if not isinstance(manifest, dict) or manifest.get('version') != self.version:
+            return False
+        if self.source_path is None:
+            self.manifest = manifest
+            return True
+        key = self._source_key(with_hash=False)
+        source = manifest['source']
+        if source['size'] == key['size'] and source['mtime'] == key['mtime']:
+            self.manifest = manifest
+            return True
+        elif source['size'] == key['size'] and source['hash'] == self._source_key()['hash']:
+            source['mtime'] = key['mtime']
+            self.manifest = manifest
+            self._write_manifest()
+            return True
+        return False
+
+    def _clear_outdated(self):
+        """
+        Remove stored signals of an outdated manifest and start with an empty manifest. The manifest is checked again
+        under the lock, as another process may have cleared or filled the store in the meantime. Without any manifest
+        nothing is removed, since other processes may be storing their first signals.
+        """
+        self.manifest = {'version': self.version, 'source': self._source_key(), 'signals': {}}
+        try:
+            os.makedirs(self.store_path, exist_ok=True)
+            with self._lock():
+                manifest = self._read_manifest()
+                if manifest is None or self._validate(manifest):
+                    return
+                os.remove(self.manifest_path)
+                for file in os.listdir(self.store_path):
+                    if file.endswith('.npy'):
+                        os.remove(os.path.join(self.store_path, file))
+        except OSError:
+            print(f'Warning: could not clear column store {self.store_path}')
+
+    def _check_manifest(self):
+        if self.manifest is None and not self.load_manifest():
+            raise Exception(f'ERROR: {self.store_path} is not a valid column store, manifest is missing, corrupt or '
+                            f'outdated.')
+
+    def clear(self):
+        """
+        Remove all stored signals and start with an empty manifest for the current version of the source file.
+        """
+        shutil.rmtree(self.store_path, ignore_errors=True)
+        self.manifest = {'version': self.version, 'source': self._source_key(), 'signals': {}}
+
+    def names(self):
+        """
+        :return: list of stored signal names
+        """
+        self._check_manifest()
+        return list(self.manifest['signals'].keys())
+
+    def __contains__(self, name):
+        self._check_manifest()
+        return name in self.manifest['signals']
+
+    def load(self, name, mmap=True):
+        """
+        Load stored signal.
+
+        :param name: signal name
+        :param mmap: memory-map the arrays instead of reading them into memory
+        :return: tuple of time array, value array and dict of metadata stored for this signal
+        """
+        if name not in self:
+            raise KeyError(f'Signal {name} is not available in column store {self.store_path}')
+
+        entry = self.manifest['signals'][name]
+        mmap_mode = 'r' if mmap else None
+        time = np.load(os.path.join(self.store_path, entry['file'] + '.time.npy'), mmap_mode=mmap_mode)
+        value = np.load(os.path.join(self.store_path, entry['file'] + '.value.npy'), mmap_mode=mmap_mode)
+        return time, value, entry['meta']
+
+    def store(self, name, time, value, meta=None):
+        """
+        Store time and value array of a signal, see store_many.
+
+        :param name: signal name
+        :param time: array of timestamps
+        :param value: array of values
+        :param meta: dict of metadata stored along with the arrays, must be JSON serializable
+        """
+        self.store_many([(name, time, value, meta)])
+
+    def store_many(self, signals):
+        """
+        Store time and value arrays of several signals, the manifest is only written once at the end. A failure to
+        write the store, e.g. for read-only result directories, is ignored. An invalid store is cleared first.
+
+        :param signals: iterable of tuples of signal name, array of timestamps, array of values and dict of metadata
+                        stored along with the arrays, which must be JSON serializable
+        """
+        if self.manifest is None:
+            self.load_manifest(clear_invalid=True)
+
+        stored = False
+        for name, time, value, meta in signals:
+            file = hashlib.sha1(name.encode()).hexdigest()
+            try:
+                os.makedirs(self.store_path, exist_ok=True)
+                self._save(file + '.time.npy', time)
+                self._save(file + '.value.npy', value)
+            except OSError:
+                print(f'Warning: could not write to column store {self.store_path}')
+                break
+            self.manifest['signals'][name] = {'file': file, 'meta': meta if meta is not None else {}}
+            stored = True
+
+        if stored:
+            self._write_manifest()
+
+    def _save(self, file, array):
+        """
+        Save array to a temporary file of this process first, so readers never see a partially written array.
+        """
+        path = os.path.join(self.store_path, file)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, np.ascontiguousarray(array))
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _write_manifest(self):
+        """
+        Write manifest to a temporary file of this process first, so readers never see a partially written manifest.
+        Signals, that other processes stored for the same version of the source file in the meantime, are kept.
+        """
+        tmp_path = f'{self.manifest_path}.{os.getpid()}.tmp'
+        try:
+            with self._lock():
+                current = self._read_manifest()
+                if (current is not None and current.get('version') == self.version and
+                        current.get('source') == self.manifest['source']):
+                    signals = current.get('signals', {})
+                    signals.update(self.manifest['signals'])
+                    self.manifest['signals'] = signals
+                with open(tmp_path, 'w') as f:
+                    json.dump(self.manifest, f)
+                os.replace(tmp_path, self.manifest_path)
+        except OSError:
+            print(f'Warning: could not write manifest of column store {self.store_path}')
+
+    @contextmanager
+    def _lock(self, timeout=10):
+        """
+        Lock the manifest against concurrent updates by creating a lock file, the lock may be entered again while it is
+        held. A lock file older than timeout seconds is considered to be left over by a process that was killed and is
+        taken over.
+        """
+        if self._locked:
+            yield
+            return
+        lock_path = self.manifest_path + '.lock'
+        while True:
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) > timeout:
+                        os.remove(lock_path)
+                except OSError:
+                    pass
+                time.sleep(0.01)
+        self._locked = True
+        try:
+            yield
+        finally:
+            self._locked = False
+            os.remove(lock_path)
@@ -0,0 +1,140 @@
+import os
+import gzip
+import queue
+import threading
+
+__all__ = ["is_compressed", "find_result_file", "open_result", "BackgroundReader"]
+
+def is_compressed(path):
+    """
+    :return: True if path points to a gzip-compressed file
+    """
+    return path.endswith('.gz')
+
+def find_result_file(path):
+    """
+    Find result file, either as given or gzip-compressed with an additional .gz extension.
+
+    :param path: path to uncompressed result file
+    :return: path of existing result file, None if no result file was found
+    """
+    for candidate in (path, path + '.gz'):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+def open_result(path, mode='r', background=False, block_size=4*1024*1024):
+    """
+    Open result file, gzip-compressed files are decompressed on the fly, when reading, and compressed on the fly, when
+    writing.
+
+    :param path: path to result file
+    :param mode: file mode, same as for the builtin open
+    :param background: decompress in a background thread, only used for binary read mode
+    :param block_size: size of decompressed blocks read in background
+    :return: file object
+    """
+    if not is_compressed(path):
+        return open(path, mode)
+    if 't' not in mode and 'b' not in mode:
+        mode += 't'
+    if background and mode == 'rb':
+        return BackgroundReader(gzip.open(path, 'rb'), block_size=block_size)
+    return gzip.open(path, mode)
+
+class BackgroundReader:
+    """
+    Binary file object reading blocks of a file in a background thread, so e.g. decompression of gzip-compressed files
+    overlaps with processing of the blocks read before. Only sequential reading is supported, seeking stops the
+    background thread and restarts it at the next read.
+    """
+    def __init__(self, file, block_size=4*1024*1024, depth=4):
+        """
+
+        :param file: binary file object to read from
+        :param block_size: number of bytes read at once
+        :param depth: maximum number of blocks read ahead
+        """
+        self.file = file
+        self.block_size = block_size
+        self.depth = depth
+
+        self._pos = file.tell()
+        self._buffer = b''
+        self._eof = False
+        self._queue = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                block = self.file.read(self.block_size)
+                self._put(block)
+                if block == b'':
+                    break
+        except Exception as e:
+            self._put(e)
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _start(self):
+        self._stop.clear()
+        self._queue = queue.Queue(maxsize=self.depth)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _halt(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self._buffer = b''
+        self._eof = False
+
+    def read(self, size=-1):
+        if self._thread is None and not self._eof:
+            self._start()
+
+        blocks = [self._buffer]
+        length = len(self._buffer)
+        while (size < 0 or length < size) and not self._eof:
+            block = self._queue.get()
+            if isinstance(block, Exception):
+                raise block
+            if block == b'':
+                self._eof = True
+            blocks.append(block)
+            length += len(block)
+
+        data = b''.join(blocks)
+        if size >= 0:
+            data, self._buffer = data[:size], data[size:]
+        else:
+            self._buffer = b''
+        self._pos += len(data)
+        return data
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        self._halt()
+        self._pos = self.file.seek(offset, whence)
+        return self._pos
+
+    def close(self):
+        self._halt()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
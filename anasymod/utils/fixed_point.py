@@ -0,0 +1,95 @@
+import numpy as np
+
+__all__ = ["to_signed", "wide_to_limbs", "decode_fixed"]
+
+def to_signed(value, width):
+    """
+    Interpret unsigned integers as two's complement numbers of given width.
+
+    :param value: array of unsigned integers, e.g. uint64 values returned by ParseVCD.parse_vcd_arrays
+    :param width: bit width of the two's complement numbers, at most 64
+    :return: array of signed integers
+    :rtype: numpy.ndarray
+    """
+    width = int(width)
+    if not 0 < width <= 64:
+        raise Exception(f'Width of two\'s complement numbers has to be in between 1 and 64, got {width}')
+
+    # drop bits above width and move the sign bit to the top, an arithmetic shift then extends the sign
+    value = np.asarray(value).astype(np.uint64)
+    shift = np.uint64(64 - width)
+    return (value << shift).view(np.int64) >> np.int64(64 - width)
+
+def wide_to_limbs(value, size):
+    """
+    Convert packed bits of vectors wider than 64 bits, as returned by ParseVCD.parse_vcd_arrays, into uint64 limbs.
+
+    :param value: uint8 array of shape (changes, ceil(size/8)) holding the bits left-aligned, most significant first
+    :param size: width of the vector
+    :return: uint64 array of shape (changes, ceil(size/64)), most significant limb first
+    :rtype: numpy.ndarray
+    """
+    size = int(size)
+    num_limbs = -(-size // 64)
+    bits = np.unpackbits(np.asarray(value, dtype=np.uint8), axis=1)[:, :size]
+
+    # pad bits on the left to a multiple of 64, so each limb holds 64 bits
+    bits = np.concatenate((np.zeros((len(bits), 64*num_limbs - size), dtype=np.uint8), bits), axis=1)
+    return np.packbits(bits, axis=1).view('>u8').astype(np.uint64)
+
+def decode_fixed(value, width, exponent=0, signed=True, size=None):
+    """
+    Decode a whole column of fixed-point numbers at once. The raw integers are interpreted as two's complement numbers
+    of given width, then scaled by 2**exponent.
+
+    :param value: raw values, either an array of unsigned integers or, for vectors wider than 64 bits, a uint8 array
+                  of packed bits as returned by ParseVCD.parse_vcd_arrays; real values are only scaled
+    :param width: bit width of the fixed-point numbers
+    :param exponent: exponent of the fixed-point numbers
+    :param signed: interpret raw values as two's complement numbers
+    :param size: width of the vector, only needed for packed bits
+    :return: float64 array of decoded values
+    :rtype: numpy.ndarray
+    """
+    value = np.asarray(value)
+    width = int(width)
+
+    if value.dtype.kind == 'f':
+        decoded = value.astype(np.float64)
+    elif value.ndim == 2:
+        if size is None:
+            raise Exception('Size of vector has to be provided to decode packed bits')
+        limbs = wide_to_limbs(value, size)[:, ::-1]
+
+        # only keep limbs and bits up to width, starting at the least significant limb
+        limbs = np.ascontiguousarray(limbs[:, :-(-width // 64)])
+        if width < 64*limbs.shape[1]:
+            limbs[:, -1] &= np.uint64((1 << (width % 64)) - 1)
+
+        negative = np.zeros(len(limbs), dtype=bool)
+        if signed and width <= 64*limbs.shape[1]:
+            negative = ((limbs[:, -1] >> np.uint64((width-1) % 64)) & np.uint64(1)).astype(bool)
+
+            # negate two's complement numbers by inverting all bits and adding one, carry is propagated across limbs
+            neg = ~limbs[negative]
+            if width % 64:
+                neg[:, -1] &= np.uint64((1 << (width % 64)) - 1)
+            carry = np.ones(len(neg), dtype=bool)
+            for k in range(neg.shape[1]):
+                neg[:, k] += carry.astype(np.uint64)
+                carry &= neg[:, k] == 0
+            limbs[negative] = neg
+
+        decoded = np.zeros(len(limbs), dtype=np.float64)
+        for k in range(limbs.shape[1]):
+            decoded += np.ldexp(limbs[:, k].astype(np.float64), 64*k)
+        decoded[negative] = -decoded[negative]
+    elif width > 64:
+        # narrow vectors stored as uint64 can not carry a sign bit beyond bit 63
+        decoded = value.astype(np.float64)
+    elif signed:
+        decoded = to_signed(value, width).astype(np.float64)
+    else:
+        decoded = (value.astype(np.uint64) & np.uint64((1 << width) - 1 if width < 64 else 2**64 - 1)).astype(np.float64)
+
+    return np.ldexp(decoded, int(exponent))
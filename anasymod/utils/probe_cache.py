@@ -0,0 +1,71 @@
+from collections import OrderedDict
+
+import numpy as np
+
+__all__ = ["ProbeCache", "data_size"]
+
+# estimated number of bytes per element of object arrays, including the python object the element points to
+_OBJECT_ITEM_SIZE = 40
+
+def data_size(data):
+    """
+    Estimate memory consumed by probed data.
+
+    :param data: numpy array or object providing a nbytes attribute
+    :return: size in bytes
+    """
+    if isinstance(data, np.ndarray) and data.dtype == object:
+        return data.size * _OBJECT_ITEM_SIZE
+    return getattr(data, 'nbytes', 0)
+
+class ProbeCache:
+    """
+    Cache for probed signals with a memory budget. Once the budget is exceeded, least recently used signals are dropped
+    from the cache. When the column store is used for probing, dropped signals can be memory-mapped again from there
+    without parsing the result file.
+    """
+    def __init__(self, limit=None):
+        """
+
+        :param limit: memory budget in bytes, None for no limit
+        """
+        self.limit = limit
+        self.size = 0
+        """ type(int) : estimated number of bytes consumed by cached signals """
+
+        self._entries = OrderedDict()
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getitem__(self, name):
+        self._entries.move_to_end(name)
+        return self._entries[name][0]
+
+    def __setitem__(self, name, data):
+        if name in self._entries:
+            self.size -= self._entries.pop(name)[1]
+        size = data_size(data)
+        self._entries[name] = (data, size)
+        self.size += size
+        self.evict()
+
+    def keys(self):
+        return self._entries.keys()
+
+    def evict(self):
+        """
+        Drop least recently used signals until the cache fits into the memory budget; the most recently used signal
+        is always kept.
+        """
+        if self.limit is None:
+            return
+        while self.size > self.limit and len(self._entries) > 1:
+            self.size -= self._entries.popitem(last=False)[1][1]
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
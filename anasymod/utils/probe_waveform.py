@@ -0,0 +1,101 @@
+import numpy as np
+
+from anasymod.utils.VCD_parser import unpack_wide
+
+__all__ = ["ProbeWaveform"]
+
+class ProbeWaveform:
+    """
+    Probed waveform, holding a typed time array and a typed value array:
+        - analog signals and the time probe: float64
+        - digital signals up to 64 bits: uint64, or int64 if the signal is signed
+        - digital signals wider than 64 bits: uint8 array of shape (samples, ceil(width/8)) including the MSB-first
+          packed bits, see ints to get python integers
+    The time array is either int64 (cycle counts) or float64 (emu_time in seconds).
+
+    For compatibility with the 2d arrays of times and values returned by probe before, wave[0] is the time array and
+    wave[1] the value array, a waveform can be unpacked into time and value array and numpy.asarray(wave) creates a
+    2d array.
+    """
+    __slots__ = ('time', 'value', 'name', 'width', 'exponent', 'signed')
+
+    def __init__(self, time, value, name=None, width=None, exponent=None, signed=False):
+        """
+
+        :param time: array of timestamps
+        :param value: array of values, first dimension must match length of time
+        :param name: full name of the probed signal
+        :param width: bit width of the signal, None for analog signals
+        :param exponent: fixed-point exponent the raw values were scaled with, None if not scaled
+        :param signed: values are two's complement numbers
+        """
+        self.time = np.asarray(time)
+        self.value = np.asarray(value)
+        if len(self.time) != len(self.value):
+            raise Exception(f'Length of time and value array of waveform {name} do not match')
+        self.name = name
+        self.width = width
+        self.exponent = exponent
+        self.signed = signed
+
+    def replace(self, time=None, value=None):
+        """
+        Create waveform with the same metadata, but different time and/or value array.
+        """
+        return ProbeWaveform(time=self.time if time is None else time, value=self.value if value is None else value,
+                             name=self.name, width=self.width, exponent=self.exponent, signed=self.signed)
+
+    def set_readonly(self):
+        """
+        Protect time and value array against modification, e.g. for cached waveforms.
+        """
+        self.time.setflags(write=False)
+        self.value.setflags(write=False)
+        return self
+
+    @property
+    def is_wide(self):
+        """
+        True if values are packed bits of vectors wider than 64 bits.
+        """
+        return self.value.ndim == 2
+
+    def ints(self):
+        """
+        :return: values as python integers for vectors wider than 64 bits, value array otherwise
+        :rtype: numpy.ndarray
+        """
+        if self.is_wide:
+            value = unpack_wide(self.value, self.width)
+            if self.signed:
+                sign = 1 << (self.width - 1)
+                value = np.array([(v ^ sign) - sign for v in value.tolist()], dtype='O')
+            return value
+        return self.value
+
+    @property
+    def nbytes(self):
+        return self.time.nbytes + self.value.nbytes
+
+    @property
+    def shape(self):
+        return (2, len(self.time))
+
+    def __len__(self):
+        return 2
+
+    def __getitem__(self, key):
+        return (self.time, self.value)[key]
+
+    def __iter__(self):
+        return iter((self.time, self.value))
+
+    def __array__(self, dtype=None, copy=None):
+        value = self.ints() if self.is_wide else self.value
+        if dtype is None:
+            dtype = 'O' if value.dtype == object else np.result_type(self.time, value)
+        return np.array([self.time, value], dtype=dtype)
+
+    def __repr__(self):
+        return (f'ProbeWaveform(name={self.name!r}, samples={len(self.time)}, time={self.time.dtype}, '
+                f'value={self.value.dtype}, width={self.width})')
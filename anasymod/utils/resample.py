@@ -0,0 +1,101 @@
+import numpy as np
+
+__all__ = ["sample_and_hold", "window", "map_time"]
+
+def sample_and_hold(time, value, grid, initial=0):
+    """
+    Resample a waveform, that is given by its value changes, onto a time grid. Each grid point takes the last value
+    that was set at or before this grid point, grid points before the first value change take the initial value.
+
+    :param time: sorted array of timestamps of the value changes
+    :param value: array of values, first dimension must match length of time
+    :param grid: array of timestamps to resample onto
+    :param initial: value of the waveform before the first value change
+    :return: array of values, one entry for each grid point
+    :rtype: numpy.ndarray
+    """
+    time = np.asarray(time)
+    value = np.asarray(value)
+    grid = np.asarray(grid)
+
+    if len(time) == 0:
+        resampled = np.zeros((len(grid),) + value.shape[1:], dtype=value.dtype)
+        resampled[:] = initial
+        return resampled
+
+    # index of last value change at or before each grid point
+    idx = np.searchsorted(time, grid, side='right') - 1
+    resampled = value[np.maximum(idx, 0)]
+    resampled[idx < 0] = initial
+
+    return resampled
+
+def window(time, value, t_start=None, t_stop=None):
+    """
+    Cut a time window out of a waveform, that is given by its value changes. The first sample is placed at t_start,
+    holding the value the waveform had at t_start, and the value at t_stop is held until t_stop.
+
+    :param time: sorted array of timestamps of the value changes
+    :param value: array of values, first dimension must match length of time
+    :param t_start: start of time window, None to start at the first sample
+    :param t_stop: end of time window, None to stop at the last sample
+    :return: tuple of time and value array of the time window
+    """
+    if time.dtype.kind in 'iu':
+        # integer timestamps can't hold fractional bounds, the window is narrowed to the timestamps inside of it
+        t_start = int(np.ceil(t_start)) if t_start is not None else None
+        t_stop = int(np.floor(t_stop)) if t_stop is not None else None
+        if t_start is not None and t_stop is not None and t_start > t_stop:
+            return time[:0], value[:0]
+
+    if t_stop is not None and len(time) and t_stop < time[-1]:
+        last = np.searchsorted(time, t_stop, side='right')
+        if last == 0:
+            time, value = time[:0], value[:0]
+        elif time[last-1] == t_stop:
+            time, value = time[:last], value[:last]
+        else:
+            time = np.append(time[:last], np.array([t_stop], dtype=time.dtype))
+            value = np.concatenate((value[:last], value[last-1:last]))
+
+    if t_start is not None:
+        # drop all samples before t_start, except for the one holding the value at t_start
+        first = max(np.searchsorted(time, t_start, side='right') - 1, 0)
+        time = np.maximum(time[first:], np.array(t_start, dtype=time.dtype))
+        value = value[first:]
+
+    return time, value
+
+def map_time(cycles, ref_cycles, ref_time, interpolate=False):
+    """
+    Map cycle counts onto a time basis, that is given by a reference waveform assigning a timestamp to some cycle
+    counts, e.g. the emu_time probe.
+
+    Without interpolation, each cycle count takes the timestamp of the first reference sample at or after this cycle
+    count; cycle counts after the last reference sample are left unchanged. With interpolation, timestamps are
+    linearly interpolated in between reference samples and held constant outside of the reference waveform.
+
+    :param cycles: array of cycle counts to be mapped
+    :param ref_cycles: sorted array of cycle counts of the reference waveform
+    :param ref_time: array of timestamps of the reference waveform
+    :param interpolate: linearly interpolate in between reference samples
+    :return: array of timestamps, one entry for each cycle count
+    :rtype: numpy.ndarray
+    """
+    cycles = np.asarray(cycles, dtype=np.int64)
+    ref_cycles = np.asarray(ref_cycles, dtype=np.int64)
+    ref_time = np.asarray(ref_time, dtype=np.float64)
+
+    if len(ref_cycles) == 0:
+        return cycles.astype(np.float64)
+
+    if interpolate:
+        return np.interp(cycles, ref_cycles, ref_time)
+
+    # index of first reference sample at or after each cycle count
+    idx = np.searchsorted(ref_cycles, cycles, side='left')
+    valid = idx < len(ref_cycles)
+    time = cycles.astype(np.float64)
+    time[valid] = ref_time[idx[valid]]
+
+    return time
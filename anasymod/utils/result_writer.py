@@ -0,0 +1,265 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from anasymod.utils.column_store import ColumnStore
+
+__all__ = ["ResultWriter", "WriteColumns", "changes_only"]
+
+def changes_only(time, value):
+    """
+    Drop samples that do not change the value of a waveform, the first sample is always kept.
+
+    :param time: array of timestamps
+    :param value: array of values, first dimension must match length of time
+    :return: tuple of time and value array including value changes only
+    """
+    time = np.asarray(time)
+    value = np.asarray(value)
+    if len(value) < 2:
+        return time, value
+
+    changed = value[1:] != value[:-1]
+    if changed.ndim > 1:
+        changed = changed.reshape(len(changed), -1).any(axis=1)
+    keep = np.concatenate(([True], changed))
+    return time[keep], value[keep]
+
+class ResultWriter:
+    """
+    Base class for writers of converted result files. Writers take whole waveforms as typed arrays: variables are
+    registered first, then the waveform of each variable is set and finally all waveforms are written at once.
+
+    Result files can also be written in chunks: after open, the waveforms of each chunk are set and written by flush,
+    close finishes the result file. Chunks have to be in order, i.e. all samples of a chunk have to be later than the
+    samples of the previous chunk. Writers that can't write incrementally keep all chunks until close.
+    """
+    def __init__(self, result_path):
+        """
+
+        :param result_path: path to converted result file
+        """
+        self.result_path = result_path
+
+        self.vars = []
+        """ type(list(dict)) : registered variables, each including scope, name, type, size, id code and waveform """
+
+    @staticmethod
+    def _ident(num):
+        """
+        Create VCD id code from a variable number, using the printable ASCII characters.
+        """
+        ident = ''
+        while True:
+            ident += chr(33 + num % 94)
+            num = num // 94 - 1
+            if num < 0:
+                return ident
+
+    def register_var(self, scope, name, var_type, size=None, meta=None):
+        """
+        Register a variable.
+
+        :param scope: dot-separated scope of the variable
+        :param name: name of the variable
+        :param var_type: VCD variable type, e.g. 'real', 'reg' or 'wire'
+        :param size: bit width of the variable, 64 for real variables if omitted
+        :param meta: dict of metadata like fixed-point exponent and signedness, only kept by result files that can
+                     store it
+        :return: index of the variable, used to set its waveform
+        """
+        if size is None:
+            size = 64 if var_type in ('real', 'realtime') else 1
+        self.vars.append({'scope': scope, 'name': name, 'type': var_type, 'size': int(size),
+                          'id': self._ident(len(self.vars)), 'time': None, 'value': None, 'meta': meta or {}})
+        return len(self.vars) - 1
+
+    def set_waveform(self, var, time, value):
+        """
+        Set waveform of a registered variable, samples that do not change the variable's value are dropped.
+
+        :param var: index of the variable as returned by register_var
+        :param time: sorted array of integer timestamps
+        :param value: array of values, floats for real variables, unsigned integers or python integers for vectors
+        """
+        time = np.asarray(time, dtype=np.int64)
+        value = np.asarray(value)
+        if len(time) != len(value):
+            raise Exception(f'Length of time and value array of variable {self.vars[var]["name"]} do not match')
+        self.vars[var]['time'], self.vars[var]['value'] = changes_only(time, value)
+
+    def write(self):
+        """
+        Write result file including the waveforms of all registered variables.
+        """
+        raise NotImplementedError()
+
+    def open(self):
+        """
+        Start writing the result file in chunks.
+        """
+        self._chunks = [[] for _ in self.vars]
+
+    def flush(self):
+        """
+        Write waveforms set since the last flush, afterwards waveforms of the next chunk can be set.
+        """
+        for chunks, var in zip(self._chunks, self.vars):
+            if var['time'] is not None:
+                chunks.append((var['time'], var['value']))
+                var['time'], var['value'] = None, None
+
+    def close(self):
+        """
+        Finish writing the result file in chunks.
+        """
+        for var, chunks in enumerate(self._chunks):
+            if chunks:
+                self.set_waveform(var, np.concatenate([time for time, _ in chunks]),
+                                  np.concatenate([value for _, value in chunks]))
+        self._chunks = None
+        self.write()
+
+class WriteColumns(ResultWriter):
+    """
+    Writer for columnar result stores. Each waveform is stored as a pair of .npy files in the directory given as result
+    path, see ColumnStore. Stored waveforms can be memory-mapped by ProbeColumns without any parsing, the stored arrays
+    match the arrays probing the same waveform from a converted VCD file would return.
+
+    When writing in chunks, the arrays of each chunk are appended to temporary .npy files of each waveform by flush, so
+    only a single chunk is kept in memory; close merges them into the column store and writes the manifest.
+    """
+    def __init__(self, result_path, timescale='1 fs', date=None):
+        """
+
+        :param result_path: path to directory of the column store
+        :param timescale: timescale of the timestamps, e.g. '1 fs', stored in the manifest
+        :param date: date stored in the manifest
+        """
+        super().__init__(result_path=result_path)
+        self.timescale = timescale
+        self.date = date
+
+    def _create_store(self):
+        store = ColumnStore(source_path=None, store_path=self.result_path)
+        store.clear()
+        store.manifest['timescale'] = self.timescale
+        store.manifest['date'] = self.date
+        return store
+
+    def write(self):
+        store = self._create_store()
+
+        # same as parsing a VCD file, the last value of each waveform is held until the end of the result
+        variables = [var for var in self.vars if var['time'] is not None and len(var['time'])]
+        end = max(int(var['time'][-1]) for var in variables) if variables else 0
+
+        store.store_many(self._columns(variables, end=end))
+
+    def open(self):
+        parent = os.path.dirname(os.path.abspath(self.result_path))
+        os.makedirs(parent, exist_ok=True)
+        self._part_dir = tempfile.mkdtemp(prefix=os.path.basename(self.result_path) + '.', suffix='.parts',
+                                          dir=parent)
+        self._parts = [[] for _ in self.vars]
+        """ type(list(list(tuple))) : paths of the temporary time and value files of each chunk of each waveform """
+        self._last = [None for _ in self.vars]
+        """ type(list(tuple)) : last timestamp and value written for each waveform """
+
+    def flush(self):
+        for k, var in enumerate(self.vars):
+            time, value = var['time'], var['value']
+            var['time'], var['value'] = None, None
+            if time is None or not len(time):
+                continue
+            value = self._value_column(var, value)
+
+            # the first sample of a chunk may repeat the last value of the previous chunk
+            if self._last[k] is not None and value[0] == self._last[k][1]:
+                time, value = time[1:], value[1:]
+                if not len(time):
+                    continue
+            self._last[k] = (int(time[-1]), value[-1])
+
+            paths = tuple(os.path.join(self._part_dir, f'{k}.{len(self._parts[k])}.{kind}.npy')
+                          for kind in ('time', 'value'))
+            np.save(paths[0], time)
+            np.save(paths[1], value)
+            self._parts[k].append(paths)
+
+    def close(self):
+        try:
+            store = self._create_store()
+            ends = [last[0] for last in self._last if last is not None]
+            store.store_many(self._merged_columns(end=max(ends) if ends else 0))
+        finally:
+            shutil.rmtree(self._part_dir, ignore_errors=True)
+            self._parts, self._last = None, None
+
+    def _merged_columns(self, end):
+        """
+        Merge the chunks of each waveform into a single memory-mapped array, one waveform at a time.
+        """
+        for k, var in enumerate(self.vars):
+            if not self._parts[k]:
+                continue
+            times = [np.load(time, mmap_mode='r') for time, _ in self._parts[k]]
+            values = [np.load(value, mmap_mode='r') for _, value in self._parts[k]]
+            # last value is held until the end of the result
+            length = sum(len(time) for time in times) + (self._last[k][0] != end)
+
+            merged = []
+            for name, chunks in (('time', times), ('value', values)):
+                dtype = np.result_type(*[chunk.dtype for chunk in chunks])
+                array = np.lib.format.open_memmap(os.path.join(self._part_dir, f'{k}.{name}.npy'), mode='w+',
+                                                  dtype=dtype, shape=(length,))
+                offset = 0
+                for chunk in chunks:
+                    array[offset:offset+len(chunk)] = chunk
+                    offset += len(chunk)
+                if offset < length:
+                    array[offset:] = end if name == 'time' else chunks[-1][-1]
+                merged.append(array)
+            del times, values
+
+            yield self._column_name(var), merged[0], merged[1], self._net(var)
+
+    @staticmethod
+    def _value_column(var, value):
+        """
+        Convert values of a waveform into the array stored in the column store.
+        """
+        if var['type'] in ('real', 'realtime'):
+            return value.astype(np.float64)
+        elif value.dtype == object:
+            # vectors wider than 64 bits can't be memory-mapped as python integers, store them as decimal strings
+            mask = (1 << var['size']) - 1
+            return np.array([str(int(v) & mask) for v in value.tolist()], dtype=np.str_)
+        else:
+            # represent negative numbers as two's complement of the variable's width
+            value = value.astype(np.int64).astype(np.uint64) if value.dtype.kind == 'f' else value.astype(np.uint64)
+            if var['size'] < 64:
+                value &= np.uint64((1 << var['size']) - 1)
+            return value
+
+    @staticmethod
+    def _column_name(var):
+        return '.'.join(filter(None, [var['scope'], var['name']]))
+
+    @staticmethod
+    def _net(var):
+        return dict(var['meta'], hier=var['scope'], name=var['name'], type=var['type'], size=str(var['size']))
+
+    @classmethod
+    def _columns(cls, variables, end):
+        """
+        Convert waveforms into the arrays stored in the column store, one waveform at a time.
+        """
+        for var in variables:
+            time, value = var['time'], cls._value_column(var, var['value'])
+            if time[-1] != end:
+                time = np.append(time, end)
+                value = np.append(value, value[-1:])
+            yield cls._column_name(var), time, value, cls._net(var)
@@ -0,0 +1,207 @@
+import os
+import copy
+import json
+import shutil
+
+from anasymod.utils.compression import find_result_file
+
+__all__ = ["RunRepository", "RunTarget"]
+
+def _link_or_copy(src, dst):
+    """
+    Hard link result file into a run, so large result files are stored without copying them. Hard links keep the
+    modification time the conversion sidecar validates the raw result file with, if the file has to be copied, e.g.
+    because the run repository is located on another file system, copy2 keeps it as well.
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+    return dst
+
+class RunTarget:
+    """
+    View of a target, whose result files are taken from a run stored in a RunRepository. All other attributes are
+    taken from the target itself, so probe objects can be created for stored runs just like for the target.
+    """
+    def __init__(self, target, run_id, run_dir):
+        """
+
+        :param target: target the run was executed on
+        :param run_id: id of the stored run
+        :param run_dir: directory the result files of the run are stored in
+        """
+        self._target = target
+        self._name = f'{target._name}_{run_id}'
+        self.cfg = copy.copy(target.cfg)
+        self.cfg.vcd_path = os.path.join(run_dir, os.path.basename(target.cfg.vcd_path))
+        self.result_path = os.path.join(run_dir, os.path.basename(target.result_path))
+        self.result_path_raw = os.path.join(run_dir, os.path.basename(target.result_path_raw))
+        self.probes = {}
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+class RunRepository:
+    """
+    Repository of simulation/emulation results, that keeps the result files of each run in a directory of its own,
+    together with the parameters the run was executed with. A manifest file keeps track of all stored runs, so results
+    of parameter sweeps remain available after the target's result files were overwritten by the next run.
+    """
+    version = 1
+
+    def __init__(self, root):
+        """
+
+        :param root: directory the runs are stored in
+        """
+        self.root = root
+        self.manifest_path = os.path.join(root, 'runs.json')
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = None
+        if manifest is None or manifest.get('version') != self.version:
+            manifest = {'version': self.version, 'next_id': 0, 'runs': {}}
+        return manifest
+
+    def _write_manifest(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    def run_dir(self, run_id):
+        return os.path.join(self.root, str(run_id))
+
+    def add(self, target, run_id=None, params=None, converted=True, raw=False):
+        """
+        Store the current result files of a target as a run, a run with the same id is replaced. Indices and column
+        stores created while probing are not stored, they are created again when probing the stored run.
+
+        :param target: target whose result files shall be stored
+        :param run_id: id of the run, consecutive numbers are used if omitted
+        :param params: dict of parameters the run was executed with, must be JSON serializable
+        :param converted: store the converted result file
+        :param raw: store the raw result file and its conversion sidecar, which are needed if the raw result file is
+                    probed directly
+        :return: id of the stored run
+        :rtype: str
+        """
+        if run_id is None:
+            run_id = self.manifest['next_id']
+            while str(run_id) in self.manifest['runs']:
+                run_id += 1
+            self.manifest['next_id'] = run_id + 1
+        run_id = str(run_id)
+
+        run_dir = self.run_dir(run_id)
+        shutil.rmtree(run_dir, ignore_errors=True)
+        os.makedirs(run_dir)
+
+        files = []
+        for path in self._result_paths(target, converted=converted, raw=raw):
+            dest = os.path.join(run_dir, os.path.basename(path))
+            if os.path.isdir(path):
+                shutil.copytree(path, dest, copy_function=_link_or_copy)
+            else:
+                _link_or_copy(path, dest)
+            files.append(os.path.basename(path))
+        if not files:
+            raise Exception(f'ERROR: No result files of target {target._name} were found, that could be stored as run '
+                            f'{run_id}.')
+
+        self.manifest['runs'].pop(run_id, None)
+        self.manifest['runs'][run_id] = {'target': target._name, 'params': dict(params or {}), 'files': files}
+        self._write_manifest()
+        return run_id
+
+    @staticmethod
+    def _result_paths(target, converted=True, raw=True):
+        """
+        Existing result files of a target, column stores are directories.
+        """
+        paths = []
+        if converted:
+            paths.append(target.result_path if os.path.isdir(target.result_path) else
+                         find_result_file(target.result_path))
+        raw_path = find_result_file(target.result_path_raw) if raw else None
+        if raw_path is not None:
+            paths += [raw_path, (raw_path[:-len('.gz')] if raw_path.endswith('.gz') else raw_path) + '.conv']
+        # raw and converted result file are the same, if results are probed directly
+        return [path for path in dict.fromkeys(paths) if path is not None and os.path.exists(path)]
+
+    @classmethod
+    def unshare(cls, target):
+        """
+        Remove result files of a target, that are hard linked into stored runs. Simulators and the waveform conversion
+        overwrite result files in place, so this has to be done before the next run, to keep the stored results.
+        """
+        for path in cls._result_paths(target):
+            if os.path.isdir(path):
+                files = [os.path.join(root, file) for root, _, names in os.walk(path) for file in names]
+            else:
+                files = [path]
+            if not any(os.stat(file).st_nlink > 1 for file in files):
+                continue
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+
+    def runs(self, target_name=None, **params):
+        """
+        Get ids of stored runs in the order they were stored.
+
+        :param target_name: only return runs of this target
+        :param params: only return runs, that were executed with these parameter values
+        :rtype: list[str]
+        """
+        return [run_id for run_id, run in self.manifest['runs'].items()
+                if (target_name is None or run['target'] == target_name) and
+                all(k in run['params'] and run['params'][k] == v for k, v in params.items())]
+
+    def params(self, run_id):
+        """
+        :return: dict of parameters the run was executed with
+        """
+        return self._run(run_id)['params']
+
+    def target(self, target, run_id):
+        """
+        Create view of target, that points to the result files of the stored run.
+
+        :rtype: RunTarget
+        """
+        if self._run(run_id)['target'] != target._name:
+            raise Exception(f'ERROR: Run {run_id} was not executed on target {target._name}.')
+        return RunTarget(target, run_id=str(run_id), run_dir=self.run_dir(run_id))
+
+    def remove(self, run_id):
+        """
+        Remove stored run including its result files.
+        """
+        self._run(run_id)
+        shutil.rmtree(self.run_dir(run_id), ignore_errors=True)
+        del self.manifest['runs'][str(run_id)]
+        self._write_manifest()
+
+    def clear(self):
+        """
+        Remove all stored runs.
+        """
+        for run_id in list(self.manifest['runs']):
+            shutil.rmtree(self.run_dir(run_id), ignore_errors=True)
+        self.manifest = {'version': self.version, 'next_id': 0, 'runs': {}}
+        self._write_manifest()
+
+    def _run(self, run_id):
+        try:
+            return self.manifest['runs'][str(run_id)]
+        except KeyError:
+            raise Exception(f'ERROR: Run {run_id} was not found in run repository {self.root}.')
@@ -0,0 +1,74 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+__all__ = ["SharedArrays"]
+
+class SharedArrays:
+    """
+    Set of numpy arrays placed in a single shared memory block, so worker processes can read and write them without
+    copying them through pipes. When passing a SharedArrays object to another process, only the name of the shared
+    memory block and the layout of the arrays are pickled.
+
+    Views into the arrays must not be held when closing, copy arrays that shall outlive the shared memory block.
+    """
+    def __init__(self, layout, name=None):
+        """
+
+        :param layout: dict of (dtype, shape) tuples with array names as keys
+        :param name: name of an existing shared memory block to attach to, a new block is created if omitted
+        """
+        self.layout = {key: (np.dtype(dtype), tuple(shape)) for key, (dtype, shape) in layout.items()}
+
+        # place arrays one after another, aligned to 8 bytes
+        self.offsets = {}
+        size = 0
+        for key, (dtype, shape) in self.layout.items():
+            size = -(-size // 8) * 8
+            self.offsets[key] = size
+            size += dtype.itemsize * int(np.prod(shape))
+
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.arrays = {key: np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=self.offsets[key])
+                       for key, (dtype, shape) in self.layout.items()}
+
+    @classmethod
+    def copy_of(cls, arrays):
+        """
+        Create shared memory block holding copies of arrays.
+
+        :param arrays: dict of numpy arrays, object arrays are not supported
+        :rtype: SharedArrays
+        """
+        shared = cls({key: (array.dtype, array.shape) for key, array in arrays.items()})
+        for key, array in arrays.items():
+            shared[key][...] = array
+        return shared
+
+    def __getitem__(self, key):
+        return self.arrays[key]
+
+    def __getstate__(self):
+        return {'layout': self.layout, 'name': self.shm.name}
+
+    def __setstate__(self, state):
+        self.__init__(state['layout'], name=state['name'])
+
+    def close(self):
+        """
+        Detach from shared memory block, the process that created the block also frees it.
+        """
+        self.arrays = {}
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -2,10 +2,17 @@ import os
 
 from anasymod.viewer.viewer import Viewer
 from anasymod.util import call
+from anasymod.enums import ResultFileTypes
+from anasymod.utils.compression import find_result_file
 
 class GtkWaveViewer(Viewer):
     def view(self, result_file=None):
-        vcd_path = result_file if result_file is not None else self.target.cfg.vcd_path
+        # GTKWave reads gzip-compressed VCD files and FST files directly
+        if result_file is None:
+            vcd_path = self.viewable_result(result_types=(ResultFileTypes.VCD, ResultFileTypes.FST),
+                                            compress=self.cfg.cfg.compress_results)
+        else:
+            vcd_path = find_result_file(result_file) or result_file
 
         # build command
         if os.path.isfile(vcd_path):
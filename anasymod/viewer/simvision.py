@@ -2,12 +2,15 @@ import os
 
 from anasymod.viewer.viewer import Viewer
 from anasymod.util import call
+from anasymod.enums import ResultFileTypes
 
 class SimVisionViewer(Viewer):
     def view(self):
+        vcd_path = self.viewable_result(result_types=(ResultFileTypes.VCD,))
+
         # build command
-        if os.path.isfile(self.target.cfg.vcd_path):
-            cmd = [self.cfg.simvision_config.simvision, '-wave', self.target.cfg.vcd_path]
+        if os.path.isfile(vcd_path):
+            cmd = [self.cfg.simvision_config.simvision, '-wave', vcd_path]
             cmd[1:1] = self.cfg.simvision_config.lsf_opts.split()
             # add waveform file if it exists
             if self.cfg.simvision_config.svcf_config is not None:
@@ -17,4 +20,4 @@ class SimVisionViewer(Viewer):
             # run command
             call(cmd)
         else:
-            raise Exception(f'ERROR: Result file: {self.target.cfg.vcd_path} does not exist; cannot open waveforms!')
\ No newline at end of file
+            raise Exception(f'ERROR: Result file: {vcd_path} does not exist; cannot open waveforms!')
\ No newline at end of file
@@ -1,7 +1,12 @@
+import os
 from abc import ABC, abstractmethod
 
 from anasymod.config import EmuConfig
 from anasymod.targets import Target
+from anasymod.enums import ResultFileTypes
+from anasymod.wave import ConvertWaveform, ConversionSidecar
+from anasymod.utils.column_store import ColumnStore
+from anasymod.utils.compression import find_result_file
 
 class Viewer(ABC):
     def __init__(self, target: Target):
@@ -10,4 +15,81 @@ class Viewer(ABC):
 
     @abstractmethod
     def view(self, result_file=None):
-        pass
\ No newline at end of file
+        pass
+
+    def viewable_result(self, result_types=(ResultFileTypes.VCD, ResultFileTypes.FST), compress=False):
+        """
+        Get result file, that can be opened by the viewer, converting results on demand. Waveform viewers can't open
+        column stores and CSV files, for those a VCD file is written to the target's vcd_path and kept up to date with
+        the results.
+
+        :param result_types: result file formats the viewer can open
+        :param compress: write converted vcd result file gzip-compressed
+        :return: path to result file
+        """
+        result_type = self.target.cfg.result_type
+        if result_type in result_types:
+            self.convert_on_demand(self.target.result_path, compress=compress)
+            return find_result_file(self.target.result_path) or self.target.result_path
+
+        vcd_path = self.target.cfg.vcd_path
+        sidecar = ConversionSidecar(self.target.result_path_raw)
+        if result_type == ResultFileTypes.COLUMNS and os.path.isdir(self.target.result_path):
+            source_path = ColumnStore(source_path=None, store_path=self.target.result_path).manifest_path
+        elif sidecar.load() or (self.target.cfg.result_type_raw == ResultFileTypes.CSV and
+                                os.path.isfile(sidecar.result_path_raw)):
+            source_path = sidecar.result_path_raw
+        else:
+            raise Exception(f'ERROR: Results of result_type:{result_type} can\'t be viewed, as no result file was found '
+                            f'they can be converted from.')
+
+        existing = find_result_file(vcd_path)
+        if existing is not None and os.path.getmtime(existing) >= os.path.getmtime(source_path):
+            return existing
+
+        print(f'Converting results to VCD file:{vcd_path} for viewing.')
+        if source_path != sidecar.result_path_raw:
+            ConvertWaveform.from_columns(store_path=self.target.result_path, result_path=vcd_path)
+        elif self.target.cfg.result_type_raw == ResultFileTypes.CSV:
+            ConvertWaveform(str_cfg=self.target.str_cfg, result_type_raw=ResultFileTypes.CSV,
+                            result_path_raw=source_path, result_path=vcd_path, dt_scale=self.cfg.cfg.dt_scale,
+                            memory_limit=self.cfg.cfg.convert_memory_limit)
+        else:
+            self._convert_sidecar(sidecar, result_path=vcd_path)
+        return vcd_path
+
+    def convert_on_demand(self, result_path, compress=False):
+        """
+        Convert raw result file, in case conversion was skipped after simulation (lazy_convert option) and there is no
+        converted result file yet.
+
+        :param result_path: path to converted result file, fst files are written for the extension .fst and column
+                            stores for the extension .cols
+        :param compress: write converted vcd result file gzip-compressed
+        """
+        if find_result_file(result_path) is not None or os.path.isdir(result_path):
+            return
+
+        sidecar = ConversionSidecar(self.target.result_path_raw)
+        if sidecar.load():
+            self._convert_sidecar(sidecar, result_path=result_path, compress=compress)
+
+    def _convert_sidecar(self, sidecar, result_path, compress=False):
+        """
+        Convert raw result file using the settings stored in the conversion sidecar, the format of the converted result
+        file is selected by the extension of result_path.
+        """
+        print(f'Converting raw result file:{sidecar.result_path_raw} for viewing.')
+        if result_path.endswith('.' + ResultFileTypes.FST):
+            sidecar.convert(result_path=result_path, result_type=ResultFileTypes.FST,
+                            workers=self.cfg.cfg.vcd_parse_workers, vcd2fst=self.cfg.gtkwave_config.vcd2fst,
+                            memory_limit=self.cfg.cfg.convert_memory_limit,
+                            convert_workers=self.cfg.cfg.convert_workers)
+        elif result_path.endswith('.' + ResultFileTypes.COLUMNS):
+            sidecar.convert(result_path=result_path, result_type=ResultFileTypes.COLUMNS,
+                            workers=self.cfg.cfg.vcd_parse_workers, memory_limit=self.cfg.cfg.convert_memory_limit,
+                            convert_workers=self.cfg.cfg.convert_workers)
+        else:
+            sidecar.convert(result_path=result_path, workers=self.cfg.cfg.vcd_parse_workers, compress=compress,
+                            memory_limit=self.cfg.cfg.convert_memory_limit,
+                            convert_workers=self.cfg.cfg.convert_workers)
@@ -11,19 +11,67 @@ try:
 except:
     print('ERROR: Could not load pyvcd package!')
 
+import os
+import json
 import datetime
-
-from anasymod.utils.VCD_parser import ParseVCD
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from types import SimpleNamespace
+
+from anasymod.utils.VCD_parser import ParseVCD, ScopeFilter, unpack_wide
+from anasymod.utils.CSV_parser import ParseCSV
+from anasymod.utils.fixed_point import decode_fixed
+from anasymod.utils.compression import find_result_file, is_compressed
+from anasymod.utils.VCD_writer import WriteVCD, WriteFST
+from anasymod.utils.result_writer import WriteColumns, changes_only
+from anasymod.utils.column_store import ColumnStore
+from anasymod.utils.shared_arrays import SharedArrays
 from anasymod.enums import ResultFileTypes
 
+def _convert_signals(inputs, outputs, time_arrays, tasks, float_type, emu_time_scaled, offset):
+    """
+    Convert signals held in shared memory, used by worker processes, see ConvertWaveform.convert_signals.
+
+    :return: dict with signal names as keys, holding the number of samples written to outputs or, for vectors wider
+             than 64 bits, a tuple of time and value array
+    """
+    try:
+        return {sig: _convert_shared(inputs, outputs, time_arrays, sig, size, fixed, float_type, emu_time_scaled,
+                                     offset) for sig, size, fixed in tasks}
+    finally:
+        inputs.close()
+        outputs.close()
+        time_arrays.close()
+
+def _convert_shared(inputs, outputs, time_arrays, sig, size, fixed, float_type, emu_time_scaled, offset):
+    timestamps, values = ConvertWaveform.convert_signal(inputs[f'time:{sig}'], inputs[f'value:{sig}'], size,
+                                                        fixed=fixed, float_type=float_type,
+                                                        emu_time_scaled=emu_time_scaled,
+                                                        time_cycles=time_arrays['cycles'],
+                                                        time_stamps=time_arrays['stamps'], offset=offset)
+    if values.dtype == object:
+        return np.array(timestamps), values
+    outputs[f'time:{sig}'][:len(timestamps)] = timestamps
+    outputs[f'value:{sig}'][:len(values)] = values
+    return len(timestamps)
+
 class ConvertWaveform():
     """
     Convert raw result files to vcd and also make sure fixed-point datatypes are properly converted to a floating point
-    representation. Currently supported raw result datatypes are vcd and csv.
+    representation. Currently supported raw result datatypes are vcd and csv, raw result files may be gzip-compressed.
+    Instead of vcd, converted results can also be written to a columnar store or to an fst file.
     """
+
+    parallel_min_changes = 1024*1024
+    """ type(int) : minimum number of value changes to convert signals in parallel, if multiple workers are used """
+
+    bytes_per_change = 256
+    """ type(int) : estimated peak memory per value change converted in chunks, including parser state, decoded
+        values and formatted lines """
     def __init__(self, str_cfg, result_type_raw, result_path_raw, result_path,
                  float_type=True, emu_time_scaled=True, debug=False,
-                 dt_scale=1e-15):
+                 dt_scale=1e-15, workers=1, compress=False, result_type=ResultFileTypes.VCD, vcd2fst=None,
+                 memory_limit=None, convert_workers=1, include=None, exclude=None):
         """
 
         :param str_cfg: structure config object used in current project.
@@ -34,376 +82,636 @@ class ConvertWaveform():
         :param emu_time_scaled: flag to indicate, if signals shall be displayed over cycle count or time
         :param debug: if debug flag is set to true, all signals from result file will be kept, even if they are not a
                         specified probe; keep in mind, that for those signals no fixed to float conversion can be done
+        :param workers: number of processes used to parse large VCD result files
+        :param compress: write converted result file gzip-compressed, the extension .gz is appended to result_path; only
+                         supported for vcd result files
+        :param result_type: format of converted result file, see ResultFileTypes
+        :param vcd2fst: path to vcd2fst binary used to write fst result files
+        :param memory_limit: approximate memory ceiling in bytes; if set, the raw result file is parsed and converted
+                             in chunks, otherwise it is parsed as a whole
+        :param convert_workers: number of processes used to decode signals and map them onto emu_time, when converting
+                                vcd result files; None uses all available cores
+        :param include: scope patterns limiting the signals kept in debug mode, see ScopeFilter; probes are always kept
+        :param exclude: scope patterns of signals dropped in debug mode, see ScopeFilter
         """
 
-        # defaults
-        self.result_path_raw = result_path_raw
+        # defaults, raw result file may also be available gzip-compressed
+        self.result_path_raw = find_result_file(result_path_raw) or result_path_raw
+        if compress and result_type == ResultFileTypes.VCD and not is_compressed(result_path):
+            result_path += '.gz'
+        self.result_path = result_path
+
+        # remove a result file left over from a previous run, that was written with a different compression setting
+        stale_path = result_path[:-len('.gz')] if is_compressed(result_path) else result_path + '.gz'
+        if result_type == ResultFileTypes.VCD and os.path.isfile(stale_path):
+            os.remove(stale_path)
         scfg = str_cfg
         self.signal_lookup = {}
-
-        # store data from FPGA in a dictionary
-        probe_data = {}
-        real_signals = set()
-        reg_widths = {}
+        self.csv_data = None
 
         if result_type_raw == ResultFileTypes.CSV:
-            # read CSV file
-            with open(self.result_path_raw, 'r') as f:
-                first_line = f.readline()
-
-            # split up the first line into comma-delimited names
-            signals = first_line.split(',')
+            csv_handle = ParseCSV(self.result_path_raw)
+            columns, _ = csv_handle.read_header()
 
-            # account for whitespace
-            signals = [signal.strip() for signal in signals]
-
-            # strip off the signal indices and add to a lookup table
-            for k, signal in enumerate(signals):
-                if '[' in signal:
-                    signal = signal[:signal.index('[')]
-                self.signal_lookup[signal] = k
+            # add column names without signal indices to a lookup table
+            for k, column in enumerate(columns):
+                self.signal_lookup[column['name']] = k
 
             # print keys
             print(f'Signals in result file: {[key for key in self.signal_lookup.keys()]}')
 
+            # select signals, each with its VCD variable type, size and fixed-point exponent
+            signals = {}
             for analog_signal in scfg.analog_probes:
                 name = 'trace_port_gen_i/' + analog_signal.name
-                if (name) in self.signal_lookup:
-                    # add to set of probes with "real" data type
-                    real_signals.add(name)
-
-                    # get unscaled data and apply scaling factor
-                    probe_data[name] = (2 ** int(analog_signal.exponent)) * self.get_csv_col(name)
-
-                    # convert data to native Python float type (rather than numpy float)
-                    # this is required for PyVCD
-                    try:
-                        probe_data[name] = [float(x) for x in probe_data[name]]
-                    except:
-                        probe_data[name] = [float(probe_data[name])]
-
+                if name in self.signal_lookup:
+                    signals[name] = ('real', None, int(analog_signal.exponent))
             for digital_signal in scfg.digital_probes + [scfg.dec_cmp] + [scfg.time_probe]:
                 name = 'trace_port_gen_i/' + digital_signal.name
                 if name in self.signal_lookup:
-                    # define width for this probe
-                    reg_widths[name] = int(digital_signal.width)
-
-                    # get unscaled data
-                    probe_data[name] = self.get_csv_col(name)
-
-                    # convert data to native Python int type (rather than numpy int)
-                    # this is required for PyVCD
-                    try:
-                        probe_data[name] = [int(x) for x in probe_data[name]]
-                    except ValueError:
-                        print(f'ValueError encountered when converting probe_data[{name}].')
-                        print(f'Contents of probe_data[{name}]:')
-                        print(f'{probe_data}')
-                        print(f'Contents of CSV file {self.result_path_raw}:')
-                        print(open(self.result_path_raw, 'r').read())
-                        raise
+                    signals[name] = ('reg', int(digital_signal.width), None)
+            meta = self.probe_meta(scfg, prefix='trace_port_gen_i/')
+            time_name = 'trace_port_gen_i/' + scfg.time_probe.name
 
             # Write data to VCD file
-            with open(result_path, 'w') as vcd:
-                timescale = self.get_pyvcd_timescale(dt_scale)
-                with VCDWriter(vcd, timescale=timescale, date=str(datetime.datetime.today())) as writer:
-                    # register all of the signals that will be written to VCD
-                    reg = {}
-                    for sig, scaled_data in probe_data.items():
-                        # determine signal scope and name
-                        signal_split = sig.split('/')
-                        vcd_scope = '.'.join(signal_split[:-1])
-                        vcd_name = signal_split[-1]
-
-                        # determine signal type and size
-                        if sig in real_signals:
-                            vcd_var_type = 'real'
-                            vcd_size = None
-                        elif sig in reg_widths:
-                            vcd_var_type = 'reg'
-                            vcd_size = reg_widths[sig]
-                        else:
-                            raise Exception('Unknown signal type.')
-
-                        # register the signal
-                        reg[sig] = writer.register_var(scope=vcd_scope, name=vcd_name,
-                                                                    var_type=vcd_var_type,
-                                                                    size=vcd_size)
-
-                    # iterate over all timesteps
-                    prev_timestep = float('-inf')
-                    for k, timestamp in enumerate(probe_data['trace_port_gen_i/' + scfg.time_probe.name]):
-                        # break if the current timestep is less than the previous one, since that means
-                        # wrapping has occurred.  (only if emu_time_scaled is True, meaning that
-                        # we're using emu_time on the x axis, not cycle number)
-                        if emu_time_scaled and (timestamp < prev_timestep):
-                            break
-                        prev_timestep = timestamp
-
-                        # Set the x-axis value according to emu_time_scaled: True means use
-                        # emu_time, and False means use the cycle number
-                        if emu_time_scaled:
-                            chg_val = timestamp
-                        else:
-                            chg_val = k
-
-                        # iterate over all signals and log their change at this timestamp
-                        for sig, scaled_data in probe_data.items():
-                            writer.change(reg[sig], chg_val, scaled_data[k])
+            writer = self.create_writer(result_type=result_type, result_path=result_path,
+                                        timescale=self.get_pyvcd_timescale(dt_scale),
+                                        date=str(datetime.datetime.today()), vcd2fst=vcd2fst,
+                                        block_size=self.chunk_size(memory_limit))
+            variables = {}
+            for sig, (var_type, size, _) in signals.items():
+                # determine signal scope and name
+                signal_split = sig.split('/')
+                variables[sig] = writer.register_var(scope='.'.join(signal_split[:-1]), name=signal_split[-1],
+                                                     var_type=var_type, size=size, meta=meta.get(sig))
+
+            if memory_limit is None:
+                chunks = [{name: self.get_csv_col(name) for name in signals}]
+            else:
+                chunks = csv_handle.iter_csv_arrays(names=list(signals), chunk_size=self.chunk_size(memory_limit))
+
+            writer.open()
+            num_rows = 0
+            last_time = None
+            for chunk in chunks:
+                timestamps = np.atleast_1d(chunk[time_name]).astype(np.int64)
+                num = len(timestamps)
+                if emu_time_scaled:
+                    # stop at the first timestep that is less than the previous one, since that means wrapping has
+                    # occurred.  (only if emu_time_scaled is True, meaning that we're using emu_time on the x axis, not
+                    # cycle number)
+                    wrapped = np.flatnonzero(timestamps[1:] < timestamps[:-1])
+                    if last_time is not None and num and timestamps[0] < last_time:
+                        timestamps = timestamps[:0]
+                    elif len(wrapped):
+                        timestamps = timestamps[:wrapped[0] + 1]
+                else:
+                    timestamps = np.arange(num_rows, num_rows + num, dtype=np.int64)
+
+                for sig, (_, _, exponent) in signals.items():
+                    values = np.atleast_1d(chunk[sig])
+                    if exponent is not None:
+                        # apply scaling factor to unscaled data
+                        values = np.ldexp(values.astype(np.float64), exponent)
+
+                    # only value changes are written to the VCD file
+                    writer.set_waveform(variables[sig], timestamps, values[:len(timestamps)])
+                writer.flush()
+
+                if len(timestamps) < num:
+                    break
+                num_rows += num
+                if num:
+                    last_time = timestamps[-1]
+            writer.close()
 
         elif result_type_raw == ResultFileTypes.VCD:
-            vcd_file_name = result_path_raw
-            vcd_handle = ParseVCD(vcd_file_name)
-            signal_dict = vcd_handle.parse_vcd(update_data=False)
-
-            # print signal names
+            # in debug mode, signals outside of the selected scopes are skipped by the parser already
+            scopes = {}
+            if debug:
+                scopes = dict(include=list(include) + ['top.trace_port_gen_i'] if include is not None else None,
+                              exclude=exclude)
+            if memory_limit is None:
+                vcd_handle = ParseVCD(self.result_path_raw, workers=workers, **scopes)
+                signal_dict = vcd_handle.parse_vcd_arrays()
+            else:
+                # only read the signal table upfront, value changes are parsed in chunks below
+                vcd_handle = ParseVCD(self.result_path_raw, block_size=self.read_block_size(memory_limit), **scopes)
+                signal_dict, _ = vcd_handle.read_header()
+
+            # lookup table of id codes
             signal_names = [(signal_dict[key]["nets"][0]["hier"] + '.' + signal_dict[key]["nets"][0]["name"], key) for key in signal_dict.keys()]
             print(f'Signals in result file: {[sig_name[0] for sig_name in signal_names]}')
+            for sig_name, key in signal_names:
+                self.signal_lookup.setdefault(sig_name, key)
 
+            # select signals, each with its VCD variable type, size and fixed-point width and exponent
+            signals = {}
             for analog_signal in scfg.analog_probes:
                 analog_signal_path = 'top.trace_port_gen_i' + '.' + analog_signal.name
-                if analog_signal_path in [sig[0] for sig in signal_names]:
-                    # add to set of probes with "real" data type
-                    real_signals.add(analog_signal_path)
-
-                    probe_data[analog_signal_path] = {}
-                    probe_data[analog_signal_path]['index'] = 0
-
-                    # get the signal identifier from analog_signal used in VCD file
-                    signal_identifier = signal_names[[y[0] for y in signal_names].index(analog_signal_path)][1]
-                    data = []
-                    for c,v in signal_dict[signal_identifier]['cv']:
-                        if not isinstance(v, float):
-                            for k in range(analog_signal.width - len(v)): # extend binary to full width, some simulators don't do that by default and remove leading zeros in VCD file
-                                v = '0' + v
-                            if v[0] == '1': # check if number is negative and if so calculate the two's complement
-                                v = -1 * (int((''.join('1' if x == '0' else '0' for x in v)), 2) + 1)
-                            else:
-                                v = int(v, 2)
-                        if not float_type:
-                            v = 2 ** int(analog_signal.exponent) * v
-                        data.append((c, v))
-                    probe_data[analog_signal_path]['data'] = np.asarray(data)
-
-                    # convert data to native Python float type (rather than numpy float) this is required for PyVCD
-                    probe_data[analog_signal_path]['data'] = [(int(c), float(v)) for c, v in probe_data[analog_signal_path]['data']]
+                if analog_signal_path in self.signal_lookup:
+                    signals[analog_signal_path] = ('real', None, (int(analog_signal.width), int(analog_signal.exponent)))
 
             for digital_signal in scfg.digital_probes + [scfg.dec_cmp] + [scfg.time_probe]:
                 digital_signal_path = 'top.trace_port_gen_i' + '.' + digital_signal.name
-                if digital_signal_path in [sig[0] for sig in signal_names]:
-                    # define width for this probe
-                    reg_widths[digital_signal_path] = int(digital_signal.width)
+                if digital_signal_path in self.signal_lookup:
+                    signals[digital_signal_path] = ('reg', int(digital_signal.width), None)
+            meta = self.probe_meta(scfg, prefix='top.trace_port_gen_i.', scaled=not float_type)
+
+            # Add all other signals in case debug flag is set
+            if debug:
+                for sig_name, key in signal_names:
+                    net = signal_dict[key]['nets'][0]
+                    if sig_name not in signals and net['type'] != 'parameter':
+                        signals[sig_name] = (net['type'], int(net['size']), None)
+
+            # time probe path
+            time_path = 'top.trace_port_gen_i' + '.' + scfg.time_probe.name
+            if memory_limit is None:
+                time_entry = signal_dict[self.signal_lookup[time_path]]
+            else:
+                # the time probe is needed to map all other signals onto emu_time, so it is parsed as a whole first
+                time_entry = vcd_handle.parse_vcd_arrays(sigs=[time_path])[self.signal_lookup[time_path]]
+            time_cycles = time_entry['time']
+            time_stamps = self.vcd_values(time_entry).astype(np.int64)
+
+            # calculate emu_time offset
+            offset = self.emu_time_offset(time_cycles, time_stamps)
+
+            # Write data to VCD file
+            writer = self.create_writer(result_type=result_type, result_path=result_path,
+                                        timescale=self.get_pyvcd_timescale(dt_scale),
+                                        date=str(datetime.datetime.today()), vcd2fst=vcd2fst,
+                                        block_size=self.chunk_size(memory_limit))
+            variables = {}
+            for sig, (var_type, size, _) in signals.items():
+                # determine signal scope and name
+                signal_split = sig.split('.')
+                variables[sig] = writer.register_var(scope='.'.join(signal_split[:-1]), name=signal_split[-1],
+                                                     var_type=var_type, size=size, meta=meta.get(sig))
+
+            if memory_limit is None:
+                chunks = [signal_dict]
+            else:
+                chunks = vcd_handle.iter_changes(sigs=list(signals), chunk_size=self.chunk_size(memory_limit))
+
+            convert_workers = convert_workers if convert_workers is not None else os.cpu_count()
+            with ExitStack() as stack:
+                executor, time_arrays = None, None
+                if convert_workers > 1:
+                    executor = stack.enter_context(ProcessPoolExecutor(max_workers=convert_workers))
+                    time_arrays = stack.enter_context(SharedArrays.copy_of({'cycles': time_cycles,
+                                                                            'stamps': time_stamps}))
+
+                # mapped samples that may still be preceded by samples of later chunks, as interpolated timestamps are
+                # shifted by offset
+                pending = {}
+                writer.open()
+                for chunk in chunks:
+                    last_cycle = max((int(entry['time'][-1]) for entry in chunk.values() if len(entry['time'])),
+                                     default=None)
+                    converted = self.convert_signals(chunk, signals, float_type=float_type,
+                                                     emu_time_scaled=emu_time_scaled, time_cycles=time_cycles,
+                                                     time_stamps=time_stamps, offset=offset, executor=executor,
+                                                     time_arrays=time_arrays, workers=convert_workers)
+                    for sig, (timestamps, values) in converted.items():
+                        if emu_time_scaled and sig in pending:
+                            timestamps = np.concatenate((pending[sig][0], timestamps))
+                            values = np.concatenate((pending[sig][1], values))
+                            order = np.argsort(timestamps, kind='stable')
+                            timestamps, values = timestamps[order], values[order]
+                        if emu_time_scaled and memory_limit is not None and last_cycle is not None:
+                            # later chunks start at last_cycle, so they can't map to earlier timestamps
+                            bound = np.searchsorted(timestamps, np.interp(last_cycle, time_cycles, time_stamps),
+                                                    side='right')
+                            pending[sig] = (timestamps[bound:], values[bound:])
+                            timestamps, values = timestamps[:bound], values[:bound]
+                        writer.set_waveform(variables[sig], timestamps, values)
+                    writer.flush()
+
+            for sig, (timestamps, values) in pending.items():
+                writer.set_waveform(variables[sig], timestamps, values)
+            writer.flush()
+            writer.close()
+
+        else:
+            raise Exception(f'ERROR: No supported Result file format selected:{result_type_raw}')
 
-                    probe_data[digital_signal_path] = {}
-                    probe_data[digital_signal_path]['index'] = 0
+    def convert_signals(self, signal_dict, signals, float_type=True, emu_time_scaled=True, time_cycles=None,
+                        time_stamps=None, offset=0, executor=None, time_arrays=None, workers=1):
+        """
+        Convert value changes of selected signals, see convert_signal. If an executor is provided and there are at
+        least self.parallel_min_changes value changes, signals are converted by the executor's worker processes in
+        groups of similar size; raw and converted waveforms are exchanged through shared memory.
+
+        :param signal_dict: value changes as returned by ParseVCD.parse_vcd_arrays or ParseVCD.iter_changes
+        :param signals: dict of selected signals, each with its VCD variable type, size and fixed-point width and
+                        exponent (None for digital signals)
+        :param executor: process pool executor used to convert signals in parallel
+        :param time_arrays: shared copy of time_cycles and time_stamps with keys 'cycles' and 'stamps', used by the
+                            worker processes
+        :param workers: number of worker processes of the executor
+        :return: dict of tuples of time and value array with signal names as keys, in the order of signals
+        """
+        tasks = []
+        for sig, (_, _, fixed) in signals.items():
+            entry = signal_dict[self.signal_lookup[sig]]
+            tasks.append((sig, entry['time'], entry['value'], int(entry['nets'][0]['size']), fixed))
+
+        if executor is None or sum(len(task[1]) for task in tasks) < self.parallel_min_changes:
+            return {sig: self.convert_signal(cycle_cnt, value, size, fixed=fixed, float_type=float_type,
+                                             emu_time_scaled=emu_time_scaled, time_cycles=time_cycles,
+                                             time_stamps=time_stamps, offset=offset)
+                    for sig, cycle_cnt, value, size, fixed in tasks}
+
+        # distribute signals onto groups with similar numbers of value changes, starting with the largest signals
+        groups = [[] for _ in range(workers)]
+        loads = [0] * workers
+        for sig, cycle_cnt, value, size, fixed in sorted(tasks, key=lambda task: -len(task[1])):
+            k = loads.index(min(loads))
+            groups[k].append((sig, size, fixed))
+            loads[k] += len(cycle_cnt)
+
+        # converted waveforms can't be longer than the raw ones, vectors wider than 64 bits are represented as python
+        # integers and returned by the workers instead
+        raw = {}
+        layout = {}
+        for sig, cycle_cnt, value, size, fixed in tasks:
+            raw[f'time:{sig}'], raw[f'value:{sig}'] = cycle_cnt, value
+            layout[f'time:{sig}'] = (np.int64, (len(cycle_cnt),))
+            if fixed is not None:
+                layout[f'value:{sig}'] = (np.float64, (len(cycle_cnt),))
+            elif value.ndim == 1:
+                layout[f'value:{sig}'] = (value.dtype, value.shape)
+
+        with SharedArrays.copy_of(raw) as inputs, SharedArrays(layout) as outputs:
+            futures = [executor.submit(_convert_signals, inputs, outputs, time_arrays, group, float_type,
+                                       emu_time_scaled, offset) for group in groups if group]
+            results = {}
+            for future in futures:
+                results.update(future.result())
+
+            converted = {}
+            for sig, *_ in tasks:
+                if isinstance(results[sig], tuple):
+                    converted[sig] = results[sig]
+                else:
+                    converted[sig] = (outputs[f'time:{sig}'][:results[sig]].copy(),
+                                      outputs[f'value:{sig}'][:results[sig]].copy())
+            return converted
+
+    @classmethod
+    def convert_signal(cls, cycle_cnt, value, size, fixed=None, float_type=True, emu_time_scaled=True,
+                       time_cycles=None, time_stamps=None, offset=0):
+        """
+        Decode value changes of a single signal parsed from a VCD file and map them onto emu_time.
+
+        :param cycle_cnt: array of cycle counts of the value changes
+        :param value: array of raw values as returned by ParseVCD.parse_vcd_arrays
+        :param size: width of the signal in the VCD file
+        :param fixed: tuple of width and exponent of fixed-point numbers, None for digital signals
+        :param float_type: values are already scaled, only decode two's complement numbers
+        :param emu_time_scaled: map cycle counts onto emu_time, otherwise cycle counts are kept
+        :param time_cycles: sorted array of cycle counts of the time signal
+        :param time_stamps: array of timestamps of the time signal
+        :param offset: offset in between cycle count of signals and time signal, see emu_time_offset
+        :return: tuple of time array and value array, sorted by time
+        """
+        if fixed is not None:
+            # decode two's complement numbers and apply fixed-point scaling for the whole column at once
+            width, exponent = fixed
+            values = decode_fixed(value, width=width, exponent=0 if float_type else exponent, size=size)
+        else:
+            # get unscaled data, x and z values were already converted to 0 by the parser
+            values = cls.vcd_values({'value': value, 'nets': [{'size': size}]})
 
-                    # get unscaled data
-                    probe_data[digital_signal_path]['data'] = np.asarray([(c, v) for c,v in signal_dict[signal_names[[y[0] for y in signal_names].index(digital_signal_path)][1]]['cv']])
+        if not emu_time_scaled:
+            # Represent signals over cycle count
+            return cycle_cnt, values
 
-                    # convert data to native Python int type (rather than numpy int) this is required for PyVCD
-                    data = []
-                    for c, v in probe_data[digital_signal_path]['data']:
-                        try:
-                            data.append((int(c), int(v, 2)))
-                        except: # In case of an x or z value, a 0 will be added; this is necessary for PYVCD
-                            data.append((int(c), int(0)))
+        # Represent signals over time
+        timestamps, valid = cls.map_emu_time(cycle_cnt, time_cycles, time_stamps, offset)
+        timestamps, values = timestamps[valid], values[valid]
 
-                    probe_data[digital_signal_path]['data'] = data
+        # interpolated and matching timestamps are not necessarily in order, if there is an offset
+        order = np.argsort(timestamps, kind='stable')
+        return timestamps[order], values[order]
 
-            # Write data to VCD file
+    @classmethod
+    def chunk_size(cls, memory_limit):
+        """
+        Number of value changes or rows converted at once, so the conversion stays within memory_limit bytes.
 
-            with open(result_path, 'w') as vcd:
-                timescale = self.get_pyvcd_timescale(dt_scale)
-                with VCDWriter(vcd, timescale=timescale, date=str(datetime.datetime.today())) as writer:
-                    # register all of the signals that will be written to VCD
-                    reg = {}
-                    for sig, scaled_data in probe_data.items():
-                        # determine signal scope and name
-                        signal_split = sig.split('.')
-                        vcd_scope = '.'.join(signal_split[:-1])
-                        vcd_name = signal_split[-1]
-
-                        # determine signal type and size
-                        if sig in real_signals:
-                            vcd_var_type = 'real'
-                            vcd_size = None
-                        elif sig in reg_widths:
-                            vcd_var_type = 'reg'
-                            vcd_size = reg_widths[sig]
-                        else:
-                            raise Exception('Unknown signal type.')
-
-                        # register the signal
-                        reg[sig] = writer.register_var(scope=vcd_scope, name=vcd_name,
-                                                                    var_type=vcd_var_type,
-                                                                    size=vcd_size)
-
-                    prev_timestep = float('-inf')
-                    # Add all other signals in case debug flag is set
-                    if debug:
-                        for signal in signal_names:
-                            if not signal[0] in probe_data.keys(): # signal was not listed yet
-                                var_type = signal_dict[signal[1]]['nets'][0]['type']
-                                if var_type != 'parameter':
-                                    name = signal_dict[signal[1]]['nets'][0]['name']
-                                    scope = signal_dict[signal[1]]['nets'][0]['hier']
-                                    path = scope + '.' + name
-                                    size = signal_dict[signal[1]]['nets'][0]['size']
-
-                                    # register the signal
-                                    reg[path] = writer.register_var(scope=scope, name=name, var_type=var_type, size=int(size))
-
-                    # time probe path
-                    time_path = 'top.trace_port_gen_i' + '.' + scfg.time_probe.name
-
-                    # calculate emu_time offset
-                    offset = 0
-                    for idx, (cycle_count, timestamp) in enumerate(probe_data[time_path]['data']):
-                        # break if the current timestep is less than the previous one, since that means
-                        # wrapping has occurred
-                        if timestamp < prev_timestep:
-                            break
-                        prev_timestep = timestamp
-
-                        if timestamp > 0:
-                            break
-
-                        offset = cycle_count
-
-                    #############################
-                    # Represent signals over time
-                    #############################
-
-                    if emu_time_scaled:
-                        # Add an index to all signals in signal dict, in case debug option was selected:
-                        if debug:
-                            for sig in signal_dict.keys():
-                                signal_dict[sig]['index'] = 0
-
-                        for idx, (cycle_count, timestamp) in enumerate(probe_data[time_path]['data']):
-                            # break if timestamp is less than zero since it means that wrapping has occurred
-                            if timestamp < 0:
-                                break
-
-                            # store all available signals in list, any signal, that is no longer in the list will be skipped
-                            # signals, where the cycle_count is nop longer between current and next cycle count of the time
-                            # signal will be removed from the list
-                            sigs_in_interval = []
-                            for sig in probe_data.keys():
-                                sigs_in_interval.append((sig, None))
-
-                            # Add all other signals in case debug flag is set
-                            if debug:
-                                for signal in signal_names:
-                                    if not signal[0] in probe_data.keys() and not signal_dict[signal[1]]['nets'][0]['type'] == 'parameter':  # signal was not listed yet
-                                        sigs_in_interval.append((signal[0], signal[1]))
-
-                            # list of all activities within time interval
-                            timestep_events = []
-
-                            # As soon as all signals are no longer in the interval, timestep will advance
-                            while sigs_in_interval:
-                                for sig in sigs_in_interval:
-                                    if sig[0] in probe_data.keys():
-                                        sig_tuple = probe_data[sig[0]]['data'][probe_data[sig[0]]['index']]
-                                    else: # debug signals
-                                        sig_tuple = signal_dict[sig[1]]['cv'][signal_dict[sig[1]]['index']]
-
-                                    if cycle_count == sig_tuple[0]:
-                                        timestep_events.append([sig, timestamp, sig_tuple[1]])
-
-                                        if sig[0] in probe_data.keys():
-                                            probe_data[sig[0]]['index'] += 1
-                                        else:
-                                            signal_dict[sig[1]]['index'] += 1
-
-                                        # This signal no longer needs to be observed
-                                        sigs_in_interval.remove(sig)
-                                    else:
-                                        try: # Check if time signal is already at the end
-                                            next_timestamp = probe_data[time_path]['data'][idx + 1][0]
-                                        except: # Time signal has finished the end, finish conversion
-                                            sigs_in_interval = []
-                                            break
-                                        if round(next_timestamp - offset) > sig_tuple[0]:
-                                            # Note: There is always an offset between cycle count and timestamp  -> substract offset
-                                            # The cycle count from data signal does not have a match with emu_time signal's cycle count
-                                            # -> we need to apply interpolation in order to assign the timestamp properly
-                                            cycles_in_dt = probe_data[time_path]['data'][idx+1][0] - cycle_count
-                                            dt = probe_data[time_path]['data'][idx+1][1] - timestamp
-                                            interp_timestamp = int(dt/cycles_in_dt * (sig_tuple[0] - cycle_count + offset) + timestamp)
-
-                                            timestep_events.append([sig, interp_timestamp, sig_tuple[1]])
-
-                                            if sig[0] in probe_data.keys():
-                                                probe_data[sig[0]]['index'] += 1
-                                            else:
-                                                signal_dict[sig[1]]['index'] += 1
-                                        else:
-                                            # This signal no longer needs to be observed
-                                            sigs_in_interval.remove(sig)
-
-                            # Register events in time interval in chronological order
-                            timestep_events = sorted(timestep_events, key=self.sort_timestamp)
-                            for [name, timestamp, value] in timestep_events:
-                                writer.change(reg[name[0]], timestamp, value)
-
-                    ####################################
-                    # Represent signals over cycle count
-                    ####################################
-
-                    else:
-                        time_events = []  # store all events from result file
-                        for signal in probe_data.keys():
-                            for sig_tuple in probe_data[signal]['data']:
-                                time_events.append([signal, sig_tuple[0], sig_tuple[1]])
-
-                        # Add all other signals in case debug flag is set
-                        if debug:
-                            for signal in signal_names:
-                                if not signal[0] in probe_data.keys() and not signal_dict[signal[1]]['nets'][0]['type'] == 'parameter':  # signal was not listed yet
-                                    name = signal_dict[signal[1]]['nets'][0]['name']
-                                    hier = signal_dict[signal[1]]['nets'][0]['hier']
-                                    path = hier + '.' + name
-                                    for sig_tuple in signal_dict[signal[1]]['cv']:
-                                        time_events.append([path, sig_tuple[0], sig_tuple[1]])
-
-                        # Register events in chronological order
-                        time_events = sorted(time_events, key=self.sort_timestamp)
-                        for [sig_name, timestamp, value] in time_events:
-                            writer.change(reg[sig_name], timestamp, value)
+        :param memory_limit: memory ceiling in bytes, None if there is no limit
+        """
+        if memory_limit is None:
+            return 1024*1024
+        return max(int(memory_limit) // cls.bytes_per_change, 1024)
 
+    @staticmethod
+    def read_block_size(memory_limit):
+        """
+        Number of bytes read from the raw result file at once, so the conversion stays within memory_limit bytes.
+        """
+        return min(max(int(memory_limit) // 16, 64*1024), 16*1024*1024)
 
+    @staticmethod
+    def create_writer(result_type, result_path, timescale, date, vcd2fst=None, block_size=1024*1024):
+        """
+        Create writer for the converted result file.
 
+        :param result_type: format of converted result file, see ResultFileTypes
+        :param result_path: path to converted result file
+        :param timescale: timescale of the converted result file, e.g. '1 fs'
+        :param date: date written to the converted result file
+        :param vcd2fst: path to vcd2fst binary used to write fst result files
+        :param block_size: number of value changes formatted and written at once by vcd and fst writers
+        :rtype: ResultWriter
+        """
+        if result_type == ResultFileTypes.VCD:
+            return WriteVCD(result_path, timescale=timescale, date=date, block_size=block_size)
+        elif result_type == ResultFileTypes.COLUMNS:
+            return WriteColumns(result_path, timescale=timescale, date=date)
+        elif result_type == ResultFileTypes.FST:
+            return WriteFST(result_path, timescale=timescale, date=date, block_size=block_size, vcd2fst=vcd2fst)
         else:
-            raise Exception(f'ERROR: No supported Result file format selected:{result_type_raw}')
+            raise Exception(f'ERROR: No supported converted result file format selected:{result_type}')
+
+    @classmethod
+    def from_columns(cls, store_path, result_path, result_type=ResultFileTypes.VCD, vcd2fst=None):
+        """
+        Write the waveforms of a column store, that was written as converted result file, to a VCD or FST file, e.g.
+        for viewing them.
+
+        :param store_path: path to directory of the column store
+        :param result_path: path to the written result file
+        :param result_type: format of the written result file, see ResultFileTypes
+        :param vcd2fst: path to vcd2fst binary used to write fst result files
+        """
+        store = ColumnStore(source_path=None, store_path=store_path)
+        names = store.names()
+        writer = cls.create_writer(result_type=result_type, result_path=result_path,
+                                   timescale=store.manifest.get('timescale', '1 fs'), date=store.manifest.get('date'),
+                                   vcd2fst=vcd2fst)
+        for name in names:
+            time, value, net = store.load(name)
+            var = writer.register_var(scope=net['hier'], name=net['name'], var_type=net['type'], size=int(net['size']))
+            if value.dtype.kind == 'U':
+                # vectors wider than 64 bits are stored as decimal strings
+                value = np.array([int(v) for v in value.tolist()], dtype=object)
+            writer.set_waveform(var, time, value)
+        writer.write()
 
     def get_csv_col(self, name):
         """
-        Getting unscaled data from csv file column
+        Getting unscaled data from csv file column, on first access all columns are parsed in a single pass into arrays
+        typed according to the radix of each column.
         :return:
         """
-        # have to preview the first few lines
-        with open(self.result_path_raw, 'r') as f:
-            first_line = f.readline()
-            second_line = f.readline()
+        if self.csv_data is None:
+            self.csv_data = ParseCSV(self.result_path_raw).parse_csv_arrays()
 
-        # determine how many lines to skip
-        if second_line.startswith('Radix'):
-            skip_header=2
-        else:
-            skip_header=1
+        return self.csv_data[name]
 
-        # call a NumPy routine to read from the CSV file
-        return np.genfromtxt(
-            self.result_path_raw,
-            delimiter=',',
-            usecols=self.signal_lookup[name],
-            skip_header=skip_header
-        )
+    @staticmethod
+    def vcd_values(entry):
+        """
+        Get values of a signal parsed by ParseVCD.parse_vcd_arrays, vectors wider than 64 bits are represented as
+        python integers.
+        """
+        if entry['value'].ndim == 2:
+            return unpack_wide(entry['value'], int(entry['nets'][0]['size']))
+        return entry['value']
+
+    @staticmethod
+    def probe_meta(str_cfg, prefix, scaled=True):
+        """
+        Metadata of the probes, that is kept by result files able to store it: fixed-point exponent of analog probes and
+        signedness of digital probes.
+
+        :param str_cfg: structure config including the probes
+        :param prefix: prefix of the probe paths in the result file, e.g. 'top.trace_port_gen_i.'
+        :param scaled: analog probes are scaled according to their exponent, otherwise they are already reals
+        :return: dict of metadata dicts with probe paths as keys
+        """
+        meta = {}
+        if scaled:
+            for p in str_cfg.analog_probes:
+                meta[prefix + p.name] = {'exponent': int(p.exponent), 'signed': True}
+        for p in str_cfg.digital_probes + [str_cfg.dec_cmp]:
+            meta[prefix + p.name] = {'signed': bool(getattr(p, 'signed', False))}
+        return meta
+
+    @staticmethod
+    def emu_time_offset(time_cycles, time_stamps):
+        """
+        Calculate emu_time offset: cycle count of the last timestamp that is not larger than zero, before wrapping
+        has occurred.
 
-    def sort_timestamp(self, element):
-        return element[1]
+        :param time_cycles: array of cycle counts of the time signal
+        :param time_stamps: array of timestamps of the time signal
+        :return: offset in between cycle count of signals and time signal
+        """
+        time_stamps = np.asarray(time_stamps, dtype=np.int64)
+        wrapped = np.flatnonzero(time_stamps[1:] < time_stamps[:-1])
+        started = np.flatnonzero(time_stamps > 0)
+        first = min(wrapped[0] + 1 if len(wrapped) else len(time_stamps), started[0] if len(started) else len(time_stamps))
+        return int(time_cycles[first - 1]) if first > 0 else 0
+
+    @staticmethod
+    def map_emu_time(cycle_cnt, time_cycles, time_stamps, offset=0):
+        """
+        Map cycle counts of a signal onto emu_time. A cycle count, that has a match in the cycle counts of the time
+        signal, takes the corresponding timestamp. Other cycle counts are shifted by offset and their timestamp is
+        linearly interpolated in between the surrounding samples of the time signal.
+
+        Cycle counts after the last sample of the time signal and after wrapping of the time signal has occurred, i.e.
+        after the first negative timestamp, can't be mapped.
+
+        :param cycle_cnt: array of cycle counts of the signal
+        :param time_cycles: sorted array of cycle counts of the time signal
+        :param time_stamps: array of timestamps of the time signal
+        :param offset: offset in between cycle count of signals and time signal
+        :return: tuple of array of timestamps (int64) and boolean array indicating which cycle counts could be mapped
+        """
+        cycle_cnt = np.asarray(cycle_cnt, dtype=np.int64)
+        time_cycles = np.asarray(time_cycles, dtype=np.int64)
+        time_stamps = np.asarray(time_stamps, dtype=np.int64)
+        num = len(time_cycles)
+        negative = np.flatnonzero(time_stamps < 0)
+        stop = negative[0] if len(negative) else num
+
+        # index of matching cycle count of the time signal
+        match = np.minimum(np.searchsorted(time_cycles, cycle_cnt, side='left'), num - 1)
+        exact = time_cycles[match] == cycle_cnt
+
+        # index of the time signal interval, the shifted cycle count lies in
+        interval = np.searchsorted(time_cycles, cycle_cnt + offset, side='right') - 1
+        in_range = interval + 1 < num
+        interval = np.clip(interval, 0, max(num - 2, 0))
+        upper = np.minimum(interval + 1, num - 1)
+        cycles_in_dt = np.maximum(time_cycles[upper] - time_cycles[interval], 1)
+        dt = (time_stamps[upper] - time_stamps[interval]).astype(np.float64)
+        interp = np.trunc(dt / cycles_in_dt * (cycle_cnt - time_cycles[interval] + offset) + time_stamps[interval])
+
+        timestamps = np.where(exact, time_stamps[match], interp.astype(np.int64))
+        valid = np.where(exact, match < stop, in_range & (interval < stop))
+        return timestamps, valid
 
     def get_pyvcd_timescale(self, val):
-        return si_format(val, precision=0) + 's'
\ No newline at end of file
+        return si_format(val, precision=0) + 's'
+
+class ConversionSidecar():
+    """
+    Sidecar file storing everything needed to convert a raw VCD result file, stored next to the raw result file as
+    <result_file_raw>.conv. This allows to leave the raw result file as it is and to apply fixed-point scaling and
+    mapping to emu_time lazily for each probed signal, while a converted result file is only written on demand, e.g.
+    for viewing.
+
+    The sidecar is invalidated whenever size or modification time of the raw result file change.
+    """
+    version = 1
+
+    def __init__(self, result_path_raw):
+        """
+
+        :param result_path_raw: path to raw result file, may also be available gzip-compressed
+        """
+        self.result_path_raw = find_result_file(result_path_raw) or result_path_raw
+        self.sidecar_path = (self.result_path_raw[:-len('.gz')] if is_compressed(self.result_path_raw)
+                             else self.result_path_raw) + '.conv'
+
+        self.meta = None
+        """ type(dict) : conversion settings and probes, only available after write or load was called """
+
+    @property
+    def _stat(self):
+        stat = os.stat(self.result_path_raw)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def write(self, str_cfg, float_type=True, emu_time_scaled=True, debug=False, dt_scale=1e-15, include=None,
+              exclude=None):
+        """
+        Store conversion settings and probes for the raw result file, parameters are the same as for
+        ConvertWaveform.
+        """
+        probe = lambda p: {'name': p.name, 'width': int(p.width), 'signed': bool(getattr(p, 'signed', False))}
+        self.meta = {'version': self.version, 'stat': self._stat, 'float_type': float_type,
+                     'emu_time_scaled': emu_time_scaled, 'debug': debug, 'dt_scale': dt_scale,
+                     'include': list(include) if include is not None else None,
+                     'exclude': list(exclude) if exclude is not None else None,
+                     'analog_probes': [dict(probe(p), exponent=int(p.exponent)) for p in str_cfg.analog_probes],
+                     'digital_probes': [probe(p) for p in str_cfg.digital_probes],
+                     'dec_cmp': probe(str_cfg.dec_cmp), 'time_probe': probe(str_cfg.time_probe)}
+        with open(self.sidecar_path, 'w') as f:
+            json.dump(self.meta, f)
+
+    def load(self):
+        """
+        Load sidecar file.
+
+        :return: True if a valid sidecar for the current raw result file was found
+        """
+        try:
+            with open(self.sidecar_path, 'r') as f:
+                meta = json.load(f)
+            valid = meta.get('version') == self.version and meta['stat'] == self._stat
+        except (OSError, ValueError, KeyError):
+            valid = False
+        self.meta = meta if valid else None
+        return valid
+
+    @property
+    def str_cfg(self):
+        """
+        Structure config including the stored probes, as needed by ConvertWaveform.
+        """
+        return SimpleNamespace(analog_probes=[SimpleNamespace(**p) for p in self.meta['analog_probes']],
+                               digital_probes=[SimpleNamespace(**p) for p in self.meta['digital_probes']],
+                               dec_cmp=SimpleNamespace(**self.meta['dec_cmp']),
+                               time_probe=SimpleNamespace(**self.meta['time_probe']))
+
+    @property
+    def time_probe_path(self):
+        return 'top.trace_port_gen_i' + '.' + self.meta['time_probe']['name']
+
+    def select(self, nets):
+        """
+        Select signals, that would be kept in the converted result file.
+
+        :param nets: dict of nets of the raw result file, keys are full signal names
+        :return: list of full signal names
+        """
+        if self.meta['debug']:
+            include = self.meta.get('include')
+            scope_filter = ScopeFilter(include=include + ['top.trace_port_gen_i'] if include is not None else None,
+                                       exclude=self.meta.get('exclude'))
+            return [name for name, net in nets.items()
+                    if net['type'] != 'parameter' and scope_filter(net['hier'], net['name'])]
+        probes = self.meta['analog_probes'] + self.meta['digital_probes'] + [self.meta['dec_cmp'],
+                                                                             self.meta['time_probe']]
+        paths = {'top.trace_port_gen_i' + '.' + p['name'] for p in probes}
+        return [name for name in nets if name in paths]
+
+    def apply(self, net, cycle_cnt, value, time_probe):
+        """
+        Convert a single signal of the raw result file the same way ConvertWaveform does.
+
+        :param net: net of the signal in the raw result file
+        :param cycle_cnt: array of cycle counts of the signal
+        :param value: array of values of the signal, as returned by ParseVCD.parse_vcd_arrays
+        :param time_probe: tuple of cycle count and value array of the time probe in the raw result file
+        :return: tuple of net, timestamps and values of the converted signal
+        """
+        path = net['hier'] + '.' + net['name']
+        meta = ConvertWaveform.probe_meta(self.str_cfg, prefix='top.trace_port_gen_i.',
+                                          scaled=not self.meta['float_type'])
+        for p in self.meta['analog_probes']:
+            if path == 'top.trace_port_gen_i' + '.' + p['name']:
+                value = decode_fixed(value, width=p['width'], exponent=0 if self.meta['float_type'] else p['exponent'],
+                                     size=net['size'])
+                net = dict(net, type='real', size='64', **meta.get(path, {}))
+
+        for p in self.meta['digital_probes'] + [self.meta['dec_cmp'], self.meta['time_probe']]:
+            if path == 'top.trace_port_gen_i' + '.' + p['name']:
+                # drop bits above the probe's width, same as writing the converted result file does
+                width = int(p['width'])
+                if value.ndim == 2 and width <= 64:
+                    value = np.array([v & ((1 << width) - 1) for v in unpack_wide(value, int(net['size'])).tolist()],
+                                     dtype=np.uint64)
+                elif value.ndim == 1 and width < 64:
+                    value = value & np.uint64((1 << width) - 1)
+                net = dict(net, type='reg', size=str(width), **meta.get(path, {}))
+
+        if not self.meta['emu_time_scaled']:
+            return (net,) + changes_only(cycle_cnt, value)
+
+        # map cycle counts onto emu_time, the last value is held until the end of the converted time probe
+        time_cycles, time_stamps = time_probe[0], np.asarray(time_probe[1]).astype(np.int64)
+        offset = ConvertWaveform.emu_time_offset(time_cycles, time_stamps)
+        timestamps, valid = ConvertWaveform.map_emu_time(cycle_cnt, time_cycles, time_stamps, offset)
+        order = np.argsort(timestamps[valid], kind='stable')
+        timestamps, value = changes_only(timestamps[valid][order], value[valid][order])
+
+        end_stamps, end_valid = ConvertWaveform.map_emu_time(time_cycles, time_cycles, time_stamps, offset)
+        if len(timestamps) and end_valid.any() and timestamps[-1] < end_stamps[end_valid].max():
+            timestamps = np.append(timestamps, end_stamps[end_valid].max())
+            value = np.concatenate((value, value[-1:]))
+        return net, timestamps, value
+
+    def convert(self, result_path, result_type=ResultFileTypes.VCD, workers=1, compress=False, vcd2fst=None,
+                memory_limit=None, convert_workers=1):
+        """
+        Convert raw result file on demand, using the stored settings.
+
+        :param result_path: path to converted result file
+        :param memory_limit: approximate memory ceiling in bytes, see ConvertWaveform
+        :param convert_workers: number of processes used to decode signals, see ConvertWaveform
+        """
+        return ConvertWaveform(str_cfg=self.str_cfg, result_type_raw=ResultFileTypes.VCD,
+                               result_path_raw=self.result_path_raw, result_path=result_path,
+                               float_type=self.meta['float_type'], emu_time_scaled=self.meta['emu_time_scaled'],
+                               debug=self.meta['debug'], dt_scale=self.meta['dt_scale'], workers=workers,
+                               compress=compress, result_type=result_type, vcd2fst=vcd2fst,
+                               memory_limit=memory_limit, convert_workers=convert_workers,
+                               include=self.meta.get('include'), exclude=self.meta.get('exclude'))
@@ -0,0 +1,157 @@
+# coding: utf-8
+
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pytest
+
+from anasymod.utils.VCD_parser import ParseVCD, unpack_wide
+from anasymod.utils.column_store import ColumnStore
+from anasymod.utils.result_writer import WriteColumns
+
+def write_vcd(path, steps=100, seed=7):
+    rnd = random.Random(seed)
+    lines = ['$timescale 1ns $end', '$scope module top $end', '$var reg 12 ! a $end', '$var real 1 " b $end',
+             '$var reg 70 # c $end', '$upscope $end', '$enddefinitions $end', '#0', 'b0 !', 'r0 "', 'b0 #']
+    for k in range(1, steps + 1):
+        lines.append(f'#{k}')
+        lines.append(f'b{rnd.getrandbits(12):b} !')
+        lines.append(f'r{rnd.uniform(-1, 1):.4f} "')
+        lines.append(f'b{rnd.getrandbits(70):b} #')
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+def npy_files(store):
+    return sorted(f for f in os.listdir(store.store_path) if f.endswith('.npy'))
+
+def test_store_vcd(tmp_path):
+    vcd = write_vcd(tmp_path / 'a.vcd')
+    baseline = ParseVCD(vcd).parse_vcd()
+    data = ParseVCD(vcd).parse_vcd_arrays()
+
+    store = ColumnStore(vcd)
+    store.store_many((entry['nets'][0]['hier'] + '.' + entry['nets'][0]['name'], entry['time'], entry['value'],
+                      entry['nets'][0]) for entry in data.values())
+
+    # stored signals are found by a new store object, as long as the VCD file does not change
+    store = ColumnStore(vcd)
+    assert store.load_manifest()
+    assert sorted(store.names()) == ['top.a', 'top.b', 'top.c']
+    for code, name in [('!', 'top.a'), ('"', 'top.b'), ('#', 'top.c')]:
+        time, value, meta = store.load(name)
+        assert isinstance(value, np.memmap)
+        assert meta == baseline[code]['nets'][0]
+        assert time.tolist() == [c for c, _ in baseline[code]['cv']]
+        if code == '"':
+            assert value.tolist() == [v for _, v in baseline[code]['cv']]
+        else:
+            value = unpack_wide(value, 70) if value.ndim == 2 else value
+            assert value.tolist() == [int(v, 2) for _, v in baseline[code]['cv']]
+
+def test_store(tmp_path):
+    store = ColumnStore(source_path=None, store_path=str(tmp_path / 'res.cols'))
+    store.store('top/a.b', np.arange(3), np.array(['1', '22', '333']), meta={'size': 100})
+    store.store('top/a.c', np.arange(2), np.array([1.5, 2.5]))
+
+    store = ColumnStore(source_path=None, store_path=str(tmp_path / 'res.cols'))
+    assert 'top/a.b' in store and 'top/a' not in store
+    time, value, meta = store.load('top/a.b', mmap=False)
+    assert time.tolist() == [0, 1, 2] and value.tolist() == ['1', '22', '333'] and meta == {'size': 100}
+    assert store.load('top/a.c')[2] == {}
+    # files are named after a hash of the signal name
+    assert len(npy_files(store)) == 4 and not any('top' in f for f in npy_files(store))
+    with pytest.raises(KeyError):
+        store.load('top/a.d')
+
+def test_outdated_cache(tmp_path):
+    vcd = write_vcd(tmp_path / 'a.vcd')
+    store = ColumnStore(vcd)
+    store.store('top.a', np.arange(3), np.arange(3))
+
+    # touching the source file keeps the store, as its content did not change
+    os.utime(vcd, ns=(0, 0))
+    assert ColumnStore(vcd).load_manifest()
+
+    write_vcd(tmp_path / 'a.vcd', seed=8)
+    store = ColumnStore(vcd)
+    # readers never clear an outdated store
+    assert not store.load_manifest()
+    assert len(npy_files(store)) == 2
+    with pytest.raises(Exception):
+        store.names()
+
+    assert not store.load_manifest(clear_invalid=True)
+    assert npy_files(store) == [] and store.names() == []
+    store.store('top.b', np.arange(3), np.arange(3))
+    assert ColumnStore(vcd).names() == ['top.b']
+
+def test_invalid_result_store(tmp_path):
+    store = ColumnStore(source_path=None, store_path=str(tmp_path / 'res.cols'))
+    store.store('a', np.arange(3), np.arange(3))
+    with open(store.manifest_path, 'w') as f:
+        f.write('{')
+
+    # column stores read as result files are never cleared
+    store = ColumnStore(source_path=None, store_path=str(tmp_path / 'res.cols'))
+    with pytest.raises(Exception, match='not a valid column store'):
+        store.names()
+    assert len(npy_files(store)) == 2
+
+def _store_signals(store_path, source_path, worker, num):
+    store = ColumnStore(source_path, store_path=store_path)
+    for k in range(num):
+        store.store(f'sig_{worker}_{k}', np.arange(10), np.full(10, worker))
+
+def test_concurrent_writers(tmp_path):
+    vcd = write_vcd(tmp_path / 'a.vcd')
+    store_path = str(tmp_path / 'a.vcd.cols')
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        for future in [executor.submit(_store_signals, store_path, vcd, worker, 10) for worker in range(4)]:
+            future.result()
+
+    store = ColumnStore(vcd, store_path=store_path)
+    assert store.load_manifest()
+    assert len(store.names()) == 40
+    assert all(store.load(f'sig_{worker}_9')[1][0] == worker for worker in range(4))
+    assert not any(f.endswith('.tmp') or f.endswith('.lock') for f in os.listdir(store_path))
+
+def test_write_chunks(tmp_path):
+    rnd = np.random.default_rng(9)
+    time = np.cumsum(rnd.integers(1, 5, 1000))
+    # few distinct values, so value changes repeat the value of the previous chunk
+    waveforms = [('real', 1, rnd.choice([-0.5, 1.5], 1000)), ('reg', 12, rnd.integers(0, 3, 1000)),
+                 ('reg', 70, np.array([2**69 + int(v) for v in rnd.integers(0, 2, 1000)], dtype=object))]
+
+    def write(path, chunks):
+        writer = WriteColumns(str(tmp_path / path))
+        variables = [writer.register_var('top', f'v{k}', var_type, size=size)
+                     for k, (var_type, size, _) in enumerate(waveforms)]
+        if chunks is None:
+            for k, (var, (_, _, value)) in enumerate(zip(variables, waveforms)):
+                # last waveform ends before the other ones
+                stop = 800 if k == 2 else 1000
+                writer.set_waveform(var, time[:stop], value[:stop])
+            writer.write()
+            return
+        writer.open()
+        for chunk in np.array_split(np.arange(1000), chunks):
+            for k, (var, (_, _, value)) in enumerate(zip(variables, waveforms)):
+                part = chunk[chunk < 800] if k == 2 else chunk
+                writer.set_waveform(var, time[part], value[part])
+            writer.flush()
+            # chunks are not kept in memory
+            assert all(var['time'] is None for var in writer.vars)
+        writer.close()
+
+    write('all.cols', None)
+    write('chunks.cols', 7)
+    store = ColumnStore(source_path=None, store_path=str(tmp_path / 'all.cols'))
+    chunked = ColumnStore(source_path=None, store_path=str(tmp_path / 'chunks.cols'))
+    assert chunked.names() == store.names() == ['top.v0', 'top.v1', 'top.v2']
+    assert store.load('top.v2')[0][-1] == time[-1]
+    for name in store.names():
+        for array, expected in zip(chunked.load(name), store.load(name)):
+            assert np.array_equal(array, expected)
+    # temporary files of the chunks are removed
+    assert sorted(os.listdir(tmp_path)) == ['all.cols', 'chunks.cols']
@@ -0,0 +1,87 @@
+# coding: utf-8
+
+import random
+import numpy as np
+import pytest
+
+from anasymod.utils.VCD_parser import ParseVCD
+from anasymod.utils.fixed_point import to_signed, wide_to_limbs, decode_fixed
+
+WIDTHS = {'!': 8, '"': 25, '#': 64, '$': 100, '%': 130}
+
+def write_vcd(path, steps=200, seed=4):
+    rnd = random.Random(seed)
+    lines = ['$timescale 1ns $end', '$scope module top $end']
+    lines += [f'$var reg {width} {code} a{width} $end' for code, width in WIDTHS.items()]
+    lines += ['$upscope $end', '$enddefinitions $end', '#0']
+    for k in range(steps):
+        lines.append(f'#{k}')
+        for code, width in WIDTHS.items():
+            # include the extremes of the number range
+            raw = rnd.choice([0, 1, 2**(width-1) - 1, 2**(width-1), 2**width - 1, rnd.getrandbits(width)])
+            lines.append(f'b{raw:b} {code}')
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+def baseline_decode(cv, width, exponent):
+    """
+    Conversion of fixed-point numbers the VCD result file was converted with, one value after the other.
+    """
+    data = []
+    for c, v in cv:
+        v = '0' * (width - len(v)) + v
+        if v[0] == '1':
+            v = -1 * (int((''.join('1' if x == '0' else '0' for x in v)), 2) + 1)
+        else:
+            v = int(v, 2)
+        data.append(2 ** int(exponent) * v)
+    return np.array(data, dtype=np.float64)
+
+@pytest.mark.parametrize('exponent', [0, -12, 7])
+def test_decode_vcd(tmp_path, exponent):
+    vcd = write_vcd(tmp_path / 'a.vcd')
+    baseline = ParseVCD(vcd).parse_vcd()
+    data = ParseVCD(vcd).parse_vcd_arrays()
+
+    for code, width in WIDTHS.items():
+        decoded = decode_fixed(data[code]['value'], width, exponent=exponent, size=width)
+        expected = baseline_decode(baseline[code]['cv'], width, exponent)
+        assert decoded.dtype == np.float64
+        # wider numbers are rounded to float64 once per 64 bit limb
+        assert np.allclose(decoded, expected, rtol=1e-15, atol=0)
+        if width <= 53:
+            assert np.array_equal(decoded, expected)
+
+def test_decode_unsigned():
+    value = np.array([0, 1, 127, 128, 255], dtype=np.uint64)
+    assert decode_fixed(value, 8, signed=False).tolist() == [0, 1, 127, 128, 255]
+    assert decode_fixed(value, 8, exponent=-1, signed=False).tolist() == [0, 0.5, 63.5, 64, 127.5]
+    assert decode_fixed(value, 8).tolist() == [0, 1, 127, -128, -1]
+
+def test_decode_real():
+    value = np.array([-1.5, 0, 2.25])
+    assert decode_fixed(value, 16, exponent=2).tolist() == [-6, 0, 9]
+
+def test_decode_packed_requires_size():
+    with pytest.raises(Exception):
+        decode_fixed(np.zeros((2, 13), dtype=np.uint8), 100)
+
+@pytest.mark.parametrize('width', [1, 5, 32, 63, 64])
+def test_to_signed(width):
+    raw = [0, 1, 2**(width-1) - 1, 2**(width-1), 2**width - 1]
+    expected = [v - 2**width if v >> (width - 1) else v for v in raw]
+    assert to_signed(np.array(raw, dtype=np.uint64), width).tolist() == expected
+
+def test_to_signed_width():
+    with pytest.raises(Exception):
+        to_signed(np.zeros(1, dtype=np.uint64), 65)
+
+def test_wide_to_limbs(tmp_path):
+    vcd = write_vcd(tmp_path / 'a.vcd')
+    baseline = ParseVCD(vcd).parse_vcd()
+    value = ParseVCD(vcd).parse_vcd_arrays()['%']['value']
+
+    limbs = wide_to_limbs(value, 130)
+    assert limbs.shape == (len(value), 3)
+    assert [(int(a) << 128) | (int(b) << 64) | int(c) for a, b, c in limbs] == [int(v, 2) for _, v in
+                                                                                   baseline['%']['cv']]
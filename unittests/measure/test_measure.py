@@ -0,0 +1,121 @@
+# coding: utf-8
+
+import numpy as np
+import pytest
+
+from anasymod import measure
+from anasymod.utils.probe_waveform import ProbeWaveform
+
+def baseline_crossings(time, data, level=0, slope='rise', hysteresis=0):
+    """
+    Crossings as found by the sample by sample frequency measurement the waveform checks used before.
+    """
+    crossings = []
+    armed = False
+    for t, v in zip(time, data):
+        if slope == 'rise':
+            if armed and (v > (level + hysteresis)):
+                crossings.append(t)
+                armed = False
+            elif v < (level - hysteresis):
+                armed = True
+        else:
+            if armed and (v < (level - hysteresis)):
+                crossings.append(t)
+                armed = False
+            elif v > (level + hysteresis):
+                armed = True
+    return crossings
+
+def noisy_sine(num=5000, freq=3.0, noise=0.05, seed=9):
+    rnd = np.random.RandomState(seed)
+    time = np.sort(rnd.uniform(0, 4, num))
+    return time, np.sin(2*np.pi*freq*time) + noise*rnd.randn(num)
+
+def chunked(time, value, size):
+    return [(time[k:k+size], value[k:k+size]) for k in range(0, len(time), size)]
+
+@pytest.mark.parametrize('slope', ['rise', 'fall'])
+@pytest.mark.parametrize('hysteresis', [0, 0.1])
+@pytest.mark.parametrize('level', [0, 0.3])
+def test_crossings(slope, hysteresis, level):
+    time, value = noisy_sine()
+    expected = baseline_crossings(time, value, level=level, slope=slope, hysteresis=hysteresis)
+
+    found = measure.crossings((time, value), level=level, slope=slope, hysteresis=hysteresis)
+    assert found.tolist() == expected
+    # state is kept in between chunks
+    found = measure.crossings(chunked(time, value, 37), level=level, slope=slope, hysteresis=hysteresis)
+    assert found.tolist() == expected
+
+    freq = measure.frequency(np.array([time, value]), level=level, slope=slope, hysteresis=hysteresis)
+    assert freq == pytest.approx((len(expected) - 1) / (expected[-1] - expected[0]))
+    assert np.mean(measure.period((time, value), level=level, slope=slope, hysteresis=hysteresis)) == \
+           pytest.approx(1/freq)
+
+def test_interpolated_crossings():
+    time = np.linspace(0, 2, 401)
+    value = np.sin(2*np.pi*time)
+    found = measure.crossings((time, value), interpolate=True)
+    assert found == pytest.approx([1.0], abs=1e-4)
+    found = measure.crossings(chunked(time, value, 200), slope='fall', level=0.5, interpolate=True)
+    assert found == pytest.approx([5/12, 17/12], abs=1e-4)
+
+def test_frequency_without_period():
+    with pytest.raises(Exception):
+        measure.frequency((np.arange(3), np.array([-1, 1, 1])))
+
+def test_duty_cycle():
+    # square wave with a period of 10 and a high time of 3
+    time = np.arange(0, 100)
+    value = (time % 10 < 3).astype(float)
+    assert measure.duty_cycle((time, value), level=0.5) == pytest.approx(0.3)
+    assert measure.duty_cycle(chunked(time, value, 7), level=0.5) == pytest.approx(0.3)
+
+def test_statistics():
+    time, value = noisy_sine(num=1000)
+    # each value is held until the next sample
+    dt = np.diff(time)
+    mean = sum(v*d for v, d in zip(value[:-1], dt)) / (time[-1] - time[0])
+    rms = np.sqrt(sum(v*v*d for v, d in zip(value[:-1], dt)) / (time[-1] - time[0]))
+
+    for wave in [(time, value), chunked(time, value, 33)]:
+        assert measure.mean(wave) == pytest.approx(mean)
+        assert measure.rms(wave) == pytest.approx(rms)
+        assert measure.peak_to_peak(wave) == np.max(value) - np.min(value)
+    assert measure.mean((np.array([1.0]), np.array([-2.0]))) == -2.0
+    assert measure.rms((np.array([1.0]), np.array([-2.0]))) == 2.0
+
+def test_find_settled():
+    time = np.linspace(0, 10, 1001)
+    value = 1 - np.exp(-time)
+    # first sample in the settled range, as found by the waveform checks used before
+    idx = np.argmax((0.95 <= value) & (value <= 1.05))
+    assert measure.find_settled((time, value), 0.95, 1.05) == time[idx]
+    assert measure.find_settled(chunked(time, value, 50), 0.95, 1.05) == time[idx]
+    with pytest.raises(Exception):
+        measure.find_settled((time, value), 2, 3)
+
+def test_step_response():
+    tau = 0.5
+    time = np.linspace(0, 10, 100001)
+    step = 1 - np.exp(-time/tau)
+    assert measure.rise_time((time, step)) == pytest.approx(tau*np.log(9), rel=1e-3)
+    assert measure.rise_time((time, 1 - step)) == pytest.approx(tau*np.log(9), rel=1e-3)
+    assert measure.settling_time((time, step), tolerance=0.02, final=1) == pytest.approx(tau*np.log(50), rel=1e-3)
+    assert measure.overshoot((time, step)) == 0
+
+    # underdamped second order step response
+    zeta, wn = 0.3, 2*np.pi
+    wd = wn*np.sqrt(1 - zeta**2)
+    ringing = 1 - np.exp(-zeta*wn*time) * (np.cos(wd*time) + zeta/np.sqrt(1 - zeta**2)*np.sin(wd*time))
+    assert measure.overshoot((time, ringing)) == pytest.approx(np.exp(-zeta*np.pi/np.sqrt(1 - zeta**2)), rel=1e-3)
+
+def test_probe_waveform():
+    time, value = noisy_sine(num=500)
+    wave = ProbeWaveform(time=time, value=value, name='top.a')
+    assert measure.crossings(wave).tolist() == baseline_crossings(time, value)
+
+    wide = ProbeWaveform(time=np.arange(2), value=np.zeros((2, 13), dtype=np.uint8), name='top.w', width=100)
+    with pytest.raises(Exception, match='wider than 64 bits'):
+        measure.mean(wide)
@@ -0,0 +1,144 @@
+# coding: utf-8
+
+import random
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+from anasymod.enums import ResultFileTypes
+from anasymod.probe import ProbeVCD, ProbeColumns, ProbeCSV
+from anasymod.utils.VCD_parser import ParseVCD
+from anasymod.utils.resample import sample_and_hold
+from anasymod.wave import ConvertWaveform, ConversionSidecar
+
+STR_CFG = SimpleNamespace(analog_probes=[SimpleNamespace(name='v0', exponent=-10, width=16)],
+                          digital_probes=[SimpleNamespace(name='d0', width=4, signed=True)],
+                          dec_cmp=SimpleNamespace(name='dec_cmp', width=1),
+                          time_probe=SimpleNamespace(name='emu_time', width=64))
+
+def write_raw_vcd(path, steps=200, float_type=False, seed=10):
+    """
+    Write VCD file as dumped by simulating a CPU target, including the probes of STR_CFG.
+    """
+    rnd = random.Random(seed)
+    analog = 'real 1' if float_type else 'reg 16'
+    lines = ['$timescale 1fs $end', '$scope module top $end', '$scope module trace_port_gen_i $end',
+             f'$var {analog} ! v0 $end', '$var reg 4 " d0 $end', '$var reg 1 # dec_cmp $end',
+             '$var reg 64 $ emu_time $end', '$upscope $end', '$scope module tb_i $end', '$var wire 1 % clk $end',
+             '$upscope $end', '$upscope $end', '$enddefinitions $end']
+    for k in range(steps):
+        lines.append(f'#{10*k}')
+        lines.append(f'b{1000*k + rnd.randint(0, 999):b} $')
+        lines.append(f'{k % 2}%')
+        if k == 0 or rnd.random() < 0.5:
+            lines.append(f'r{rnd.uniform(-30, 30):.6f} !' if float_type else f'b{rnd.getrandbits(16):b} !')
+        if k == 0 or rnd.random() < 0.5:
+            lines.append(f'b{rnd.getrandbits(4):b} "')
+        if k == 0:
+            lines.append('b0 #')
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+def write_csv(path, rows=200, seed=11):
+    """
+    Write CSV file as written by the ILA of FPGA targets, including the probes of STR_CFG.
+    """
+    rnd = random.Random(seed)
+    lines = ['Sample in Buffer,Sample in Window,TRIGGER,trace_port_gen_i/v0[15:0],trace_port_gen_i/d0[3:0],'
+             'trace_port_gen_i/dec_cmp,trace_port_gen_i/emu_time[63:0]',
+             'Radix - UNSIGNED,UNSIGNED,UNSIGNED,SIGNED,SIGNED,UNSIGNED,UNSIGNED']
+    for k in range(rows):
+        lines.append(f'{k},{k},0,{rnd.randint(-2**15, 2**15 - 1)},{rnd.randint(-8, 7)},0,{1000*k}')
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+def make_target(result_path_raw, result_path, result_type_raw=ResultFileTypes.VCD, float_type=False,
+                disk_cache=False):
+    """
+    Target with the attributes used by probe objects.
+    """
+    cfg = SimpleNamespace(dt_scale=1e-15, vcd_parse_workers=1, probe_cache_limit=None, probe_disk_cache=disk_cache)
+    return SimpleNamespace(_name='sim', result_path_raw=result_path_raw, result_path=result_path,
+                           float_type=float_type, str_cfg=STR_CFG, prj_cfg=SimpleNamespace(cfg=cfg),
+                           cfg=SimpleNamespace(vcd_path=result_path, result_type_raw=result_type_raw))
+
+@pytest.mark.parametrize('emu_time', [False, True])
+def test_probe_many(tmp_path, emu_time):
+    vcd = write_raw_vcd(tmp_path / 'res.vcd')
+    names = ['top.trace_port_gen_i.v0', 'top.trace_port_gen_i.d0', 'top.tb_i.clk']
+    probe = ProbeVCD(make_target(vcd, vcd))
+    probed = probe._probe_many(['*.v0', 'top.trace_port_gen_i.d0', 'top.tb_i.*'], emu_time=emu_time)
+
+    assert list(probed) == names
+    # probe object without any cached signals
+    probe = ProbeVCD(make_target(vcd, vcd))
+    for name in names:
+        single = probe._probe(name, emu_time=emu_time)
+        assert np.array_equal(probed[name].time, single.time)
+        assert np.array_equal(probed[name].value, single.value)
+
+@pytest.mark.parametrize('disk_cache', [False, True])
+def test_parse_once(tmp_path, monkeypatch, disk_cache):
+    vcd = write_raw_vcd(tmp_path / 'res.vcd')
+    calls = []
+    parse_vcd_arrays = ParseVCD.parse_vcd_arrays
+    def count_calls(self, *args, **kwargs):
+        calls.append(kwargs.get('sigs'))
+        return parse_vcd_arrays(self, *args, **kwargs)
+    monkeypatch.setattr(ParseVCD, 'parse_vcd_arrays', count_calls)
+
+    # probing one signal after the other parses the result file only once
+    probe = ProbeVCD(make_target(vcd, vcd, disk_cache=disk_cache))
+    for name in probe._probes():
+        probe._probe(name, emu_time=True)
+    assert len(calls) == 1
+
+def probe_meta(probes):
+    """
+    Probe v0 and d0 with each probe object, returning exponent, signedness and values on the time basis of the first
+    probe object for each of them.
+    """
+    meta = {}
+    for backend, probe in probes.items():
+        data = probe._probe_many(['*trace_port_gen_i.v0', '*trace_port_gen_i.d0'], emu_time=False)
+        meta[backend] = {name.split('.')[-1]: (wave.exponent, wave.signed) for name, wave in data.items()}
+        if backend == list(probes)[0]:
+            ref = {name.split('.')[-1]: wave for name, wave in data.items()}
+        for name, wave in data.items():
+            ref_wave = ref[name.split('.')[-1]]
+            assert np.array_equal(sample_and_hold(wave.time, wave.value, ref_wave.time), ref_wave.value)
+    return meta
+
+@pytest.mark.parametrize('float_type', [False, True])
+def test_cpu_metadata(tmp_path, float_type):
+    raw = write_raw_vcd(tmp_path / 'raw.vcd', float_type=float_type)
+    for result_type, path in [(ResultFileTypes.VCD, 'res.vcd'), (ResultFileTypes.COLUMNS, 'res.cols')]:
+        ConvertWaveform(STR_CFG, ResultFileTypes.VCD, raw, str(tmp_path / path), float_type=float_type,
+                        result_type=result_type)
+    probes = {'vcd': ProbeVCD(make_target(raw, str(tmp_path / 'res.vcd'), float_type=float_type)),
+              'cols': ProbeColumns(make_target(raw, str(tmp_path / 'res.cols'), float_type=float_type))}
+    meta = probe_meta(probes)
+
+    # raw result file is probed directly, if it was not converted
+    ConversionSidecar(raw).write(STR_CFG, float_type=float_type)
+    meta.update(probe_meta({'lazy': ProbeVCD(make_target(raw, str(tmp_path / 'missing.vcd'),
+                                                         float_type=float_type))}))
+
+    # analog probes of simulation results are fixed-point numbers, unless float_type is set
+    expected = {'v0': (None, False) if float_type else (-10, True), 'd0': (None, True)}
+    assert meta == {'vcd': expected, 'cols': expected, 'lazy': expected}
+
+@pytest.mark.parametrize('float_type', [False, True])
+def test_fpga_metadata(tmp_path, float_type):
+    csv = write_csv(tmp_path / 'raw.csv')
+    for result_type, path in [(ResultFileTypes.VCD, 'res.vcd'), (ResultFileTypes.COLUMNS, 'res.cols')]:
+        ConvertWaveform(STR_CFG, ResultFileTypes.CSV, csv, str(tmp_path / path), float_type=float_type,
+                        result_type=result_type)
+    target = lambda path: make_target(csv, str(tmp_path / path), result_type_raw=ResultFileTypes.CSV,
+                                      float_type=float_type)
+    meta = probe_meta({'csv': ProbeCSV(target('res.csv')), 'vcd': ProbeVCD(target('res.vcd')),
+                       'cols': ProbeColumns(target('res.cols'))})
+
+    # analog probes of ILA results are always fixed-point numbers
+    expected = {'v0': (-10, True), 'd0': (None, True)}
+    assert meta == {'csv': expected, 'vcd': expected, 'cols': expected}
@@ -0,0 +1,127 @@
+# coding: utf-8
+
+import random
+import numpy as np
+import pytest
+
+from anasymod.utils.VCD_parser import ParseVCD
+from anasymod.utils.resample import sample_and_hold, window, map_time
+
+def write_vcd(path, steps=100, seed=5):
+    rnd = random.Random(seed)
+    lines = ['$timescale 1ns $end', '$scope module top $end', '$var reg 8 ! a $end', '$var real 1 " b $end',
+             '$upscope $end', '$enddefinitions $end', '#5', 'b1 !', 'r0.5 "']
+    for k in range(1, steps + 1):
+        lines.append(f'#{5 + 10*k}')
+        if rnd.random() < 0.5:
+            lines.append(f'b{rnd.getrandbits(8):b} !')
+        if rnd.random() < 0.3:
+            lines.append(f'r{rnd.uniform(-1, 1):.4f} "')
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+def baseline_value_at(cv, t, initial=0):
+    """
+    Value a signal holds at time t, from the value changes returned by the line based parser.
+    """
+    value = initial
+    for c, v in cv:
+        if c > t:
+            break
+        value = float(v) if isinstance(v, float) else int(v, 2)
+    return value
+
+def test_sample_and_hold(tmp_path):
+    vcd = write_vcd(tmp_path / 'a.vcd')
+    baseline = ParseVCD(vcd).parse_vcd()
+    data = ParseVCD(vcd).parse_vcd_arrays()
+    grid = np.arange(-3, 1030, 3)
+
+    for code, entry in data.items():
+        resampled = sample_and_hold(entry['time'], entry['value'], grid, initial=7)
+        assert resampled.dtype == entry['value'].dtype
+        assert resampled.tolist() == [baseline_value_at(baseline[code]['cv'], t, initial=7) for t in grid]
+
+def test_parser_resample(tmp_path):
+    vcd = write_vcd(tmp_path / 'a.vcd')
+    # the line based parser repeats each signal's value at each timestamp of the VCD file
+    baseline = ParseVCD(vcd).parse_vcd(update_data=True)
+    grid, columns = ParseVCD(vcd).resample(['top.a', 'top.b'])
+
+    for code, name in [('!', 'top.a'), ('"', 'top.b')]:
+        cv = baseline[code]['cv']
+        assert grid.tolist() == [c for c, _ in cv]
+        assert columns[name].tolist() == [baseline_value_at(cv, c) for c, _ in cv]
+
+def test_sample_and_hold_empty():
+    resampled = sample_and_hold(np.zeros(0, dtype=np.int64), np.zeros((0, 2), dtype=np.uint8), [1, 2], initial=3)
+    assert resampled.shape == (2, 2)
+    assert np.all(resampled == 3)
+
+@pytest.mark.parametrize('t_start,t_stop', [(None, None), (0, None), (5, 15), (23, 600), (600, 601), (None, 300),
+                                            (1000, 2000), (0, 4)])
+def test_window(tmp_path, t_start, t_stop):
+    vcd = write_vcd(tmp_path / 'a.vcd')
+    baseline = ParseVCD(vcd).parse_vcd()
+    data = ParseVCD(vcd).parse_vcd_arrays()
+
+    for code, entry in data.items():
+        time, value = window(entry['time'], entry['value'], t_start=t_start, t_stop=t_stop)
+        cv = baseline[code]['cv']
+        first, last = cv[0][0], cv[-1][0]
+        if t_stop is not None and t_stop < first:
+            assert len(time) == 0
+            continue
+
+        # value changes within the window, the window's edges holding the values at t_start and t_stop, the window is
+        # not extended beyond the last sample
+        start = first if t_start is None else max(t_start, first)
+        stop = last if t_stop is None else min(t_stop, last)
+        expected = sorted({start, stop} | {c for c, _ in cv if start < c < stop})
+        assert time.tolist() == expected
+        assert value.tolist() == [baseline_value_at(cv, t) for t in expected]
+
+@pytest.mark.parametrize('t_start,t_stop', [(22.5, 600.5), (4.1, 15.9), (None, 300.7), (0.5, None)])
+def test_window_fractional(tmp_path, t_start, t_stop):
+    vcd = write_vcd(tmp_path / 'a.vcd')
+    data = ParseVCD(vcd).parse_vcd_arrays()
+
+    # integer timestamps inside of the window are kept, same as for the integer bounds enclosed by it
+    for entry in data.values():
+        time, value = window(entry['time'], entry['value'], t_start=t_start, t_stop=t_stop)
+        expected = window(entry['time'], entry['value'], t_start=None if t_start is None else int(np.ceil(t_start)),
+                          t_stop=None if t_stop is None else int(np.floor(t_stop)))
+        assert time.dtype == entry['time'].dtype
+        assert t_start is None or time[0] >= t_start
+        assert t_stop is None or time[-1] <= t_stop
+        assert time.tolist() == expected[0].tolist()
+        assert value.tolist() == expected[1].tolist()
+
+def test_window_without_timestamps():
+    # no integer timestamp is inside of the window
+    time, value = window(np.array([0, 5, 10]), np.array([1, 2, 3]), t_start=5.2, t_stop=5.8)
+    assert len(time) == 0 and len(value) == 0
+
+@pytest.mark.parametrize('interpolate', [False, True])
+def test_map_time(interpolate):
+    rnd = random.Random(6)
+    ref_cycles = np.array(sorted(rnd.sample(range(10, 1000), 40)), dtype=np.int64)
+    ref_time = np.cumsum([rnd.uniform(0.1, 1) for _ in ref_cycles])
+    cycles = np.arange(0, 1100, 7)
+
+    expected = []
+    for c in cycles:
+        k = next((k for k, r in enumerate(ref_cycles) if r >= c), None)
+        if k is None:
+            # cycle counts after the last time probe sample are kept (without interpolation)
+            expected.append(ref_time[-1] if interpolate else float(c))
+        elif not interpolate or k == 0 or ref_cycles[k] == c:
+            expected.append(ref_time[k])
+        else:
+            frac = (c - ref_cycles[k-1]) / (ref_cycles[k] - ref_cycles[k-1])
+            expected.append(ref_time[k-1] + frac * (ref_time[k] - ref_time[k-1]))
+
+    assert np.allclose(map_time(cycles, ref_cycles, ref_time, interpolate=interpolate), expected, rtol=1e-12)
+
+def test_map_time_without_reference():
+    assert map_time([1, 2], [], []).tolist() == [1.0, 2.0]
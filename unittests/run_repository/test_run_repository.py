@@ -0,0 +1,79 @@
+# coding: utf-8
+
+import os
+from types import SimpleNamespace
+import pytest
+
+from anasymod.analysis import Analysis
+from anasymod.enums import ResultFileTypes
+from anasymod.utils.run_repository import RunRepository
+
+STR_CFG = SimpleNamespace(analog_probes=[], digital_probes=[], dec_cmp=SimpleNamespace(name='dec_cmp', width=1),
+                          time_probe=SimpleNamespace(name='emu_time', width=64))
+
+def write_vcd(path, values):
+    lines = ['$timescale 1fs $end', '$scope module top $end', '$var reg 8 ! a $end',
+             '$scope module trace_port_gen_i $end', '$var reg 64 " emu_time $end', '$upscope $end', '$upscope $end',
+             '$enddefinitions $end']
+    for k, value in enumerate(values):
+        lines += [f'#{10*k}', f'b{value:b} !', f'b{1000*k:b} "']
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+def make_target(result_path):
+    """
+    CPU target with the attributes used by the run repository and probe objects.
+    """
+    cfg = SimpleNamespace(dt_scale=1e-15, vcd_parse_workers=1, probe_cache_limit=None, probe_disk_cache=False)
+    return SimpleNamespace(_name='sim', result_path_raw=result_path, result_path=result_path, float_type=False,
+                           str_cfg=STR_CFG, prj_cfg=SimpleNamespace(cfg=cfg),
+                           cfg=SimpleNamespace(vcd_path=result_path, result_type=ResultFileTypes.VCD,
+                                               result_type_raw=ResultFileTypes.VCD))
+
+def test_probe_runs(tmp_path):
+    target = make_target(str(tmp_path / 'res.vcd'))
+    repository = RunRepository(root=str(tmp_path / 'runs'))
+    write_vcd(tmp_path / 'res.vcd', [1, 2, 3])
+    repository.add(target)
+    # as done by simulate/emulate
+    RunRepository.unshare(target)
+    write_vcd(tmp_path / 'res.vcd', [4, 5])
+    repository.add(target, run_id='b')
+
+    # analysis object, whose run repository was never accessed before
+    analysis = Analysis.__new__(Analysis)
+    analysis.args = SimpleNamespace(active_target='sim')
+    analysis._prj_cfg = SimpleNamespace(build_root_runs=str(tmp_path / 'runs'))
+    analysis.sim = target
+    grid, values, runs = analysis.probe_runs('top.a', runs=[0, 'b'])
+
+    assert runs == ['0', 'b']
+    assert grid.tolist() == [0, 10, 20]
+    assert values.tolist() == [[1, 2, 3], [4, 5, 5]]
+    assert sorted(os.listdir(repository.run_dir(0))) == ['res.vcd']
+
+@pytest.mark.parametrize('link', [True, False])
+def test_store_results(tmp_path, monkeypatch, link):
+    if not link:
+        # e.g. run repository on another file system
+        def no_link(src, dst):
+            raise OSError('cross-device link')
+        monkeypatch.setattr(os, 'link', no_link)
+    target = make_target(str(tmp_path / 'res.vcd'))
+    target.result_path_raw = write_vcd(tmp_path / 'raw.vcd', [1, 2, 3])
+    os.utime(target.result_path_raw, ns=(0, 10**9))
+    (tmp_path / 'raw.vcd.conv').write_text('{}')
+    write_vcd(tmp_path / 'res.vcd', [1, 2, 3])
+    repository = RunRepository(root=str(tmp_path / 'runs'))
+    run_id = repository.add(target, raw=True)
+
+    stored = os.path.join(repository.run_dir(run_id), 'raw.vcd')
+    assert sorted(os.listdir(repository.run_dir(run_id))) == ['raw.vcd', 'raw.vcd.conv', 'res.vcd']
+    assert os.path.samefile(stored, target.result_path_raw) == link
+    assert os.stat(stored).st_mtime_ns == 10**9
+
+    # result files shared with stored runs are removed before the next run writes them
+    RunRepository.unshare(target)
+    assert sorted(os.listdir(tmp_path)) == (['runs'] if link else ['raw.vcd', 'raw.vcd.conv', 'res.vcd', 'runs'])
+    write_vcd(tmp_path / 'raw.vcd', [4])
+    assert os.path.getsize(stored) > os.path.getsize(target.result_path_raw)
@@ -0,0 +1,103 @@
+# coding: utf-8
+
+import random
+import numpy as np
+import pytest
+
+from anasymod.utils.VCD_parser import ParseVCD
+from anasymod.utils.VCD_index import VCDIndex
+
+# id codes starting with '#' may be placed at the start of a block, as blocks are cut at spaces
+CODES = ['#', '#a', '!', '"']
+
+def write_vcd(path, steps=400, seed=1):
+    rnd = random.Random(seed)
+    lines = ['$timescale 1ns $end', '$scope module top $end',
+             '$var wire 11 # vec_a $end', '$var wire 11 #a vec_b $end',
+             '$var wire 1 ! bit_a $end', '$var real 1 " real_a $end',
+             '$upscope $end', '$enddefinitions $end', '#0',
+             'b0 #', 'b0 #a', '0!', 'r0 "']
+    for k in range(1, steps + 1):
+        lines.append(f'#{10*k}')
+        for code in rnd.sample(CODES, rnd.randint(1, len(CODES))):
+            if code == '!':
+                lines.append(f'{rnd.randint(0, 1)}!')
+            elif code == '"':
+                lines.append(f'r{rnd.randint(-100, 100)/8} "')
+            else:
+                lines.append(f'b{rnd.getrandbits(11):b} {code}')
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+@pytest.mark.parametrize('block_size', [37, 64, 300])
+def test_markers_at_timestamps(tmp_path, block_size):
+    vcd = write_vcd(tmp_path / 'index.vcd')
+    index = VCDIndex(vcd, marker_step=500)
+    index.build(parser=ParseVCD(vcd, block_size=block_size))
+
+    with open(vcd, 'rb') as f:
+        content = f.read()
+    assert len(index.markers) > 5
+    for time, offset, _ in index.markers:
+        assert content[offset - 1:offset] == b'\n'
+        assert content[offset:].split(None, 1)[0] == f'#{time}'.encode()
+
+@pytest.mark.parametrize('block_size', [37, 300])
+def test_windowed_parse(tmp_path, block_size):
+    vcd = write_vcd(tmp_path / 'index.vcd')
+    full = ParseVCD(vcd).parse_vcd_arrays()
+
+    parser = ParseVCD(vcd, block_size=block_size)
+    parser.index = VCDIndex(vcd, marker_step=500)
+    parser.index.build(parser=parser)
+    for t_start, t_stop in [(0, None), (1005, 2000), (2500, None), (3990, 4000)]:
+        windowed = parser.parse_vcd_arrays(t_start=t_start, t_stop=t_stop)
+        for code, entry in full.items():
+            time, value = entry['time'], entry['value']
+            first = max(np.searchsorted(time, t_start, 'right') - 1, 0)
+            last = len(time) if t_stop is None else np.searchsorted(time, t_stop, 'right')
+            assert windowed[code]['time'][0] == t_start
+            assert np.array_equal(windowed[code]['value'][:last - first], value[first:last])
+
+def test_store_load(tmp_path):
+    vcd = write_vcd(tmp_path / 'index.vcd')
+    index = VCDIndex(vcd, marker_step=500)
+    index.build(parser=ParseVCD(vcd))
+    index.store()
+
+    loaded = VCDIndex(vcd)
+    assert loaded.load() and loaded.is_current()
+    assert loaded.markers == index.markers and loaded.header_end == index.header_end
+    # signal table of the index is the same as the one in the VCD header
+    assert loaded.signal_table() == ParseVCD(vcd).read_header(use_index=False)[0]
+    assert loaded.signal_table(sigs=['top.bit_a']) == {'!': {'nets': [dict(type='wire', name='bit_a', size='1',
+                                                                           hier='top')]}}
+    assert loaded.find_marker(-1) is None
+    assert loaded.find_marker(10**9) == index.markers[-1]
+
+    # index is outdated as soon as the VCD file changes
+    write_vcd(tmp_path / 'index.vcd', steps=401)
+    assert not loaded.is_current() and not VCDIndex(vcd).load()
+
+def test_baseline_parser(tmp_path):
+    vcd = write_vcd(tmp_path / 'index.vcd')
+    baseline = ParseVCD(vcd).parse_vcd()
+
+    parser = ParseVCD(vcd, block_size=64)
+    parser.index = VCDIndex(vcd, marker_step=500)
+    parser.index.build(parser=parser)
+    t_start, t_stop = 1234, 3456
+    windowed = parser.parse_vcd_arrays(t_start=t_start, t_stop=t_stop)
+    for code, entry in baseline.items():
+        # value changes of the line based parser within the window, including the values held at t_start and t_stop
+        before = [(c, v) for c, v in entry['cv'] if c <= t_start][-1:]
+        inside = [(c, v) for c, v in entry['cv'] if t_start < c <= t_stop]
+        cv = [(t_start, before[0][1])] + inside
+        if cv[-1][0] != t_stop:
+            cv.append((t_stop, cv[-1][1]))
+        if entry['nets'][0]['type'] == 'real':
+            expected = [float(v) for _, v in cv]
+        else:
+            expected = [int(v, 2) for _, v in cv]
+        assert windowed[code]['time'].tolist() == [c for c, _ in cv]
+        assert windowed[code]['value'].tolist() == expected
@@ -0,0 +1,176 @@
+# coding: utf-8
+
+import gzip
+import random
+import numpy as np
+import pytest
+
+from anasymod.utils.VCD_parser import ParseVCD, unpack_wide, pack_wide
+from anasymod.utils.CSV_parser import ParseCSV
+
+# id code, type, width, scope and name of each variable, '"' is declared twice to check aliases
+VARS = [('!', 'wire', 1, 'top', 'clk'), ('"', 'reg', 8, 'top', 'byte'), ('#', 'reg', 64, 'top.sub', 'word'),
+        ('$x', 'reg', 100, 'top.sub', 'wide'), ('%', 'real', 1, 'top', 'volt'), ('"', 'reg', 8, 'top.sub', 'alias')]
+
+def _vector(rnd, width):
+    bits = ''.join(rnd.choice('0101010101xz') for _ in range(width))
+    # some simulators drop leading zeros
+    return bits.lstrip('0') or '0'
+
+def write_vcd(path, steps=300, seed=2):
+    rnd = random.Random(seed)
+    lines = ['$timescale 1ns $end']
+    scope = []
+    for code, type, width, hier, name in VARS:
+        hier = hier.split('.')
+        while scope != hier[:len(scope)]:
+            lines.append('$upscope $end')
+            scope.pop()
+        for s in hier[len(scope):]:
+            lines.append(f'$scope module {s} $end')
+            scope.append(s)
+        lines.append(f'$var {type} {width} {code} {name} $end')
+    lines += ['$upscope $end'] * len(scope) + ['$enddefinitions $end', '#0', '0!', 'b0 "', 'b0 #', 'b0 $x', 'r0 %']
+    for k in range(1, steps + 1):
+        lines.append(f'#{7*k + rnd.randint(0, 3)}')
+        for code, type, width, _, _ in rnd.sample(VARS[:5], rnd.randint(1, 5)):
+            if type == 'real':
+                lines.append(f'r{rnd.uniform(-5, 5):.6g} {code}')
+            elif width == 1:
+                lines.append(f'{rnd.choice("01xz")}{code}')
+            else:
+                lines.append(f'b{_vector(rnd, width)} {code}')
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+def baseline_arrays(entry):
+    """
+    Convert value changes returned by the line based parser into time and value arrays.
+    """
+    net = entry['nets'][0]
+    time = np.array([c for c, _ in entry['cv']], dtype=np.int64)
+    if net['type'] == 'real':
+        return time, [float(v) for _, v in entry['cv']]
+    # scalar x and z values are kept by the line based parser
+    return time, [int(v.replace('x', '0').replace('z', '0'), 2) for _, v in entry['cv']]
+
+def check_entry(entry, time, value):
+    size = int(entry['nets'][0]['size'])
+    assert np.array_equal(entry['time'], time)
+    if size > 64:
+        assert entry['value'].shape == (len(time), -(-size // 8))
+        assert unpack_wide(entry['value'], size).tolist() == value
+    else:
+        assert entry['value'].dtype == (np.float64 if entry['nets'][0]['type'] == 'real' else np.uint64)
+        assert entry['value'].tolist() == value
+
+@pytest.mark.parametrize('block_size', [53, 1024*1024])
+def test_parse_arrays(tmp_path, block_size):
+    vcd = write_vcd(tmp_path / 'a.vcd')
+    baseline = ParseVCD(vcd).parse_vcd()
+    data = ParseVCD(vcd, block_size=block_size).parse_vcd_arrays()
+
+    assert data.keys() == baseline.keys()
+    for code, entry in data.items():
+        assert entry['nets'] == baseline[code]['nets']
+        check_entry(entry, *baseline_arrays(baseline[code]))
+
+def test_parse_selected(tmp_path):
+    vcd = write_vcd(tmp_path / 'a.vcd')
+    sigs = ['top.sub.wide', 'top.sub.alias', 'top.volt']
+    baseline = ParseVCD(vcd).parse_vcd(sigs=sigs)
+    data = ParseVCD(vcd).parse_vcd_arrays(sigs=sigs)
+
+    assert sorted(data) == sorted(baseline) == sorted(['$x', '"', '%'])
+    assert data['"']['nets'] == [dict(type='reg', name='alias', size='8', hier='top.sub')]
+    for code, entry in data.items():
+        check_entry(entry, *baseline_arrays(baseline[code]))
+
+def test_parse_parallel(tmp_path):
+    vcd = write_vcd(tmp_path / 'a.vcd', steps=2000)
+    serial_parser = ParseVCD(vcd)
+    serial = serial_parser.parse_vcd_arrays(timestamps=True)
+    parser = ParseVCD(vcd, block_size=256, workers=3, parallel_min_size=0)
+    parallel = parser.parse_vcd_arrays(timestamps=True)
+
+    for code, entry in serial.items():
+        assert np.array_equal(parallel[code]['time'], entry['time'])
+        assert np.array_equal(parallel[code]['value'], entry['value'])
+    assert np.array_equal(parser.timestamps, serial_parser.timestamps)
+
+@pytest.mark.parametrize('chunk_size', [1, 17, 100000])
+def test_iter_arrays(tmp_path, chunk_size):
+    vcd = write_vcd(tmp_path / 'a.vcd')
+    names = ['top.clk', 'top.sub.wide', 'top.volt']
+    # time basis includes each timestamp at which any of the selected signals changes
+    data = ParseVCD(vcd).parse_vcd_arrays(sigs=names)
+    grid = np.unique(np.concatenate([entry['time'] for entry in data.values()]))
+    _, columns = ParseVCD(vcd).resample(names, grid=grid)
+    chunks = list(ParseVCD(vcd).iter_arrays(names, chunk_size=chunk_size))
+
+    assert all(len(time) == chunk_size for time, _ in chunks[:-1])
+    assert np.array_equal(np.concatenate([time for time, _ in chunks]), grid)
+    for name in names:
+        assert np.array_equal(np.concatenate([chunk[name] for _, chunk in chunks]), columns[name])
+
+def test_parse_compressed(tmp_path):
+    vcd = write_vcd(tmp_path / 'a.vcd')
+    with open(vcd, 'rb') as f_in, gzip.open(vcd + '.gz', 'wb') as f_out:
+        f_out.write(f_in.read())
+    data = ParseVCD(vcd).parse_vcd_arrays()
+    # compressed files are read sequentially, also if parallel parsing is requested
+    compressed = ParseVCD(vcd + '.gz', block_size=53, workers=2, parallel_min_size=0).parse_vcd_arrays()
+
+    assert compressed.keys() == data.keys()
+    for code, entry in data.items():
+        assert compressed[code]['nets'] == entry['nets']
+        assert np.array_equal(compressed[code]['time'], entry['time'])
+        assert np.array_equal(compressed[code]['value'], entry['value'])
+
+def test_pack_wide():
+    value = [0, 1, 2**99, 2**100 - 1, -1]
+    assert unpack_wide(pack_wide(value, 100), 100).tolist() == [0, 1, 2**99, 2**100 - 1, 2**100 - 1]
+
+def write_csv(path, rows=50, seed=3):
+    rnd = random.Random(seed)
+    lines = ['Sample in Buffer,trace_port_gen_i/emu_time[39:0],trace_port_gen_i/a[15:0],trace_port_gen_i/d[7:0],'
+             'trace_port_gen_i/h[11:0],trace_port_gen_i/w[79:0]',
+             'Radix - UNSIGNED,UNSIGNED,SIGNED,UNSIGNED,HEX,HEX']
+    for k in range(rows):
+        lines.append(f'{k},{10*k},{rnd.randint(-2**15, 2**15 - 1)},{rnd.randint(0, 255)},'
+                     f'{rnd.getrandbits(12):03X},{rnd.getrandbits(80):020X}')
+    content = '\n'.join(lines) + '\n'
+    if str(path).endswith('.gz'):
+        with gzip.open(path, 'wt') as f:
+            f.write(content)
+    else:
+        path.write_text(content)
+    return str(path)
+
+@pytest.mark.parametrize('file_name', ['a.csv', 'a.csv.gz'])
+def test_parse_csv(tmp_path, file_name):
+    csv = write_csv(tmp_path / file_name)
+    # numpy routine the CSV file was read with column by column
+    baseline = np.genfromtxt(csv, delimiter=',', skip_header=2, dtype=str)
+    columns, skip_header = ParseCSV(csv).read_header()
+    data = ParseCSV(csv).parse_csv_arrays()
+
+    assert skip_header == 2
+    assert [c['name'] for c in columns] == ['Sample in Buffer', 'trace_port_gen_i/emu_time', 'trace_port_gen_i/a',
+                                            'trace_port_gen_i/d', 'trace_port_gen_i/h', 'trace_port_gen_i/w']
+    assert [c['width'] for c in columns] == [None, 40, 16, 8, 12, 80]
+    assert data['trace_port_gen_i/emu_time'].dtype == np.uint64
+    assert data['trace_port_gen_i/a'].dtype == np.int64
+    assert data['trace_port_gen_i/w'].dtype == object
+    for k, column in enumerate(columns):
+        base = 16 if column['radix'] == 'HEX' else 10
+        assert data[column['name']].tolist() == [int(v, base) for v in baseline[:, k]]
+
+def test_iter_csv(tmp_path):
+    csv = write_csv(tmp_path / 'a.csv')
+    data = ParseCSV(csv).parse_csv_arrays(names=['trace_port_gen_i/a', 'trace_port_gen_i/w'])
+    chunks = list(ParseCSV(csv).iter_csv_arrays(names=['trace_port_gen_i/a', 'trace_port_gen_i/w'], chunk_size=16))
+
+    assert [len(chunk['trace_port_gen_i/a']) for chunk in chunks] == [16, 16, 16, 2]
+    for name, column in data.items():
+        assert np.concatenate([chunk[name] for chunk in chunks]).tolist() == column.tolist()
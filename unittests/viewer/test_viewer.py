@@ -0,0 +1,108 @@
+# coding: utf-8
+
+import os
+import random
+from types import SimpleNamespace
+import pytest
+
+import anasymod.viewer.gtkwave
+from anasymod.enums import ResultFileTypes
+from anasymod.utils.VCD_parser import ParseVCD
+from anasymod.viewer.gtkwave import GtkWaveViewer
+from anasymod.wave import ConvertWaveform, ConversionSidecar
+
+STR_CFG = SimpleNamespace(analog_probes=[SimpleNamespace(name='v0', exponent=-10, width=16)],
+                          digital_probes=[SimpleNamespace(name='d0', width=4, signed=False)],
+                          dec_cmp=SimpleNamespace(name='dec_cmp', width=1),
+                          time_probe=SimpleNamespace(name='emu_time', width=64))
+
+def write_raw_vcd(path, steps=50, seed=12):
+    """
+    Write VCD file as dumped by simulating a CPU target, including the probes of STR_CFG.
+    """
+    rnd = random.Random(seed)
+    lines = ['$timescale 1fs $end', '$scope module top $end', '$scope module trace_port_gen_i $end',
+             '$var reg 16 ! v0 $end', '$var reg 4 " d0 $end', '$var reg 1 # dec_cmp $end',
+             '$var reg 64 $ emu_time $end', '$upscope $end', '$upscope $end', '$enddefinitions $end']
+    for k in range(steps):
+        lines += [f'#{10*k}', f'b{1000*k:b} $', f'b{rnd.getrandbits(16):b} !', f'b{rnd.getrandbits(4):b} "']
+        if k == 0:
+            lines.append('b0 #')
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+def write_csv(path, rows=50, seed=13):
+    """
+    Write CSV file as written by the ILA of FPGA targets, including the probes of STR_CFG.
+    """
+    rnd = random.Random(seed)
+    lines = ['Sample in Buffer,trace_port_gen_i/v0[15:0],trace_port_gen_i/d0[3:0],trace_port_gen_i/dec_cmp,'
+             'trace_port_gen_i/emu_time[63:0]', 'Radix - UNSIGNED,SIGNED,UNSIGNED,UNSIGNED,UNSIGNED']
+    for k in range(rows):
+        lines.append(f'{k},{rnd.randint(-2**15, 2**15 - 1)},{rnd.getrandbits(4)},0,{1000*k}')
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+def make_viewer(tmp_path, result_path_raw, result_type, result_type_raw=ResultFileTypes.VCD):
+    vcd_path = str(tmp_path / 'top.vcd')
+    result_path = vcd_path if result_type == ResultFileTypes.VCD else str(tmp_path / f'top.{result_type}')
+    cfg = SimpleNamespace(dt_scale=1e-15, vcd_parse_workers=1, convert_memory_limit=None, convert_workers=1,
+                          compress_results=False)
+    gtkwave_config = SimpleNamespace(gtkwave='gtkwave', lsf_opts='', gtkw_config=None, vcd2fst=None)
+    target = SimpleNamespace(_name='sim', result_path_raw=result_path_raw, result_path=result_path, str_cfg=STR_CFG,
+                             prj_cfg=SimpleNamespace(cfg=cfg, gtkwave_config=gtkwave_config),
+                             cfg=SimpleNamespace(vcd_path=vcd_path, result_type=result_type,
+                                                 result_type_raw=result_type_raw))
+    return GtkWaveViewer(target=target)
+
+def view(viewer, monkeypatch):
+    """
+    Run viewer and return the result file passed to GTKWave.
+    """
+    cmds = []
+    monkeypatch.setattr(anasymod.viewer.gtkwave, 'call', cmds.append)
+    viewer.view()
+    return cmds[0][-1]
+
+def parse(path):
+    return {entry['nets'][0]['name']: (entry['time'].tolist(), entry['value'].tolist())
+            for entry in ParseVCD(path).parse_vcd_arrays().values()}
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_view_columns(tmp_path, monkeypatch, lazy):
+    raw = write_raw_vcd(tmp_path / 'raw.vcd')
+    ConvertWaveform(STR_CFG, ResultFileTypes.VCD, raw, str(tmp_path / 'ref.vcd'), float_type=False)
+    viewer = make_viewer(tmp_path, raw, ResultFileTypes.COLUMNS)
+    if lazy:
+        ConversionSidecar(raw).write(STR_CFG, float_type=False)
+    else:
+        ConvertWaveform(STR_CFG, ResultFileTypes.VCD, raw, viewer.target.result_path, float_type=False,
+                        result_type=ResultFileTypes.COLUMNS)
+
+    # column store is never opened by GTKWave, a VCD file is written next to it instead
+    vcd_path = view(viewer, monkeypatch)
+    assert vcd_path == viewer.target.cfg.vcd_path
+    assert os.path.isdir(viewer.target.result_path) != lazy
+    assert parse(vcd_path) == parse(str(tmp_path / 'ref.vcd'))
+
+    # VCD file is only written again, if results changed
+    os.utime(vcd_path, ns=(0, 0))
+    view(viewer, monkeypatch)
+    assert os.stat(vcd_path).st_mtime_ns > 0
+    mtime = os.stat(vcd_path).st_mtime_ns
+    view(viewer, monkeypatch)
+    assert os.stat(vcd_path).st_mtime_ns == mtime
+
+def test_view_csv(tmp_path, monkeypatch):
+    csv = write_csv(tmp_path / 'raw.csv')
+    ConvertWaveform(STR_CFG, ResultFileTypes.CSV, csv, str(tmp_path / 'ref.vcd'))
+    viewer = make_viewer(tmp_path, csv, ResultFileTypes.CSV, result_type_raw=ResultFileTypes.CSV)
+
+    vcd_path = view(viewer, monkeypatch)
+    assert vcd_path == viewer.target.cfg.vcd_path
+    assert parse(vcd_path) == parse(str(tmp_path / 'ref.vcd'))
+
+def test_view_missing(tmp_path, monkeypatch):
+    viewer = make_viewer(tmp_path, write_raw_vcd(tmp_path / 'raw.vcd'), ResultFileTypes.COLUMNS)
+    with pytest.raises(Exception, match='can\'t be viewed'):
+        view(viewer, monkeypatch)